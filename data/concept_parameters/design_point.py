@@ -0,0 +1,256 @@
+from functools import lru_cache
+from typing import Iterable, NamedTuple, get_args
+
+import numpy as np
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.aircraft_components import Aerofoil, Fuselage, Tail, Wing
+from data.concept_parameters.mission_profile import MissionPhase, MissionProfile, Phase, PhaseTable
+
+# Aircraft fields that are not design inputs, or are stored as labels instead of values
+_EXCLUDED_FIELDS = ('id', 'name', 'full_name', 'mass_breakdown',
+                    'mass_breakdown_dict')
+_COMPONENTS = {
+    'wing': (Wing, ('oswald_efficiency_factor', 'max_area', 'max_chord',
+                    'area', 'span')),
+    'tail': (Tail, tuple(Tail.model_fields)),
+    'fuselage': (Fuselage, tuple(Fuselage.model_fields)),
+}
+MISSION_PHASE_FIELDS = ('duration', 'horizontal_speed', 'distance',
+                        'vertical_speed', 'ending_altitude')
+
+
+class DesignSchema(NamedTuple):
+    phases: tuple[Phase, ...]
+    segments: tuple[str, ...]
+    paths: tuple[str, ...]
+    index: dict[str, int]
+    types: tuple[type, ...]
+
+
+class DesignLabels(NamedTuple):
+    id: str
+    name: str
+    aerofoil: str | None
+    mission_profile: str
+
+
+def _scalar_type(annotation) -> type | None:
+    types = [t for t in get_args(annotation) if t is not type(None)]
+    return types[0] if len(types) == 1 and types[0] in (int, float) else None
+
+
+@lru_cache(maxsize=None)
+def design_schema(segments: tuple[tuple[str, Phase], ...]) -> DesignSchema:
+    """
+    Layout of the values of a DesignPoint, which only depends on the segments of the mission profile.
+    :param segments: Name and phase of the segments of the mission profile, in order
+    :return: DesignSchema
+    """
+    paths, types = [], []
+    for name, field in Aircraft.model_fields.items():
+        scalar_type = _scalar_type(field.annotation)
+        if name not in _EXCLUDED_FIELDS and scalar_type is not None:
+            paths.append(name)
+            types.append(scalar_type)
+    for component, (model, attributes) in _COMPONENTS.items():
+        for attribute in attributes:
+            paths.append(f'{component}.{attribute}')
+            types.append(
+                _scalar_type(model.model_fields[attribute].annotation
+                             ) if attribute in model.model_fields else float)
+    for name, _ in segments:
+        for attribute in MISSION_PHASE_FIELDS:
+            paths.append(f'mission_profile.{name}.{attribute}')
+            types.append(float)
+    # the takeoff power is an input of the Class II model once it is set
+    paths.append('mission_profile.TAKEOFF.power')
+    types.append(float)
+    return DesignSchema(tuple(phase for _, phase in segments),
+                        tuple(name for name, _ in segments), tuple(paths), {
+                            path: i
+                            for i, path in enumerate(paths)
+                        }, tuple(types))
+
+
+def _value(obj, path: str) -> float:
+    for attribute in path.split('.'):
+        if obj is None:
+            return np.nan
+        obj = obj.phases[attribute] if isinstance(
+            obj, MissionProfile) else getattr(obj, attribute)
+    return np.nan if obj is None else obj
+
+
+def _uniform_propellers(aircraft: Aircraft) -> bool:
+    if aircraft.propellers is None:
+        return True
+    parameters = (aircraft.propeller_rotation_speed,
+                  aircraft.propeller_blade_number,
+                  aircraft.tension_coefficient, aircraft.propeller_radius)
+    return len(aircraft.propellers) == aircraft.motor_prop_count and all(
+        (propeller.rotation_speed, propeller.blade_number,
+         propeller.tension_coefficient, propeller.radius) == parameters
+        for propeller in aircraft.propellers)
+
+
+class DesignPoint:
+    """
+    Compact, immutable representation of the inputs of an Aircraft.
+
+    All numerical inputs are stored in one read-only float array, with None stored as NaN. Variants are created with
+    `replace`, which only copies that array, so many of them can be held in memory and stacked into a DesignBatch.
+    Sizing outputs (mass breakdown, phase energies, ...) are not part of a design point.
+    """
+    __slots__ = ('schema', 'values', 'labels')
+
+    def __init__(self, schema: DesignSchema, values: np.ndarray,
+                 labels: DesignLabels):
+        values.flags.writeable = False
+        object.__setattr__(self, 'schema', schema)
+        object.__setattr__(self, 'values', values)
+        object.__setattr__(self, 'labels', labels)
+
+    @classmethod
+    def from_aircraft(cls, aircraft: Aircraft) -> 'DesignPoint':
+        if not _uniform_propellers(aircraft):
+            raise ValueError(
+                f'{aircraft.full_name} has propellers that differ from its propeller parameters, '
+                f'which a design point cannot represent')
+        schema = design_schema(
+            tuple(
+                zip(aircraft.mission_profile.phases.names,
+                    aircraft.mission_profile.phases.kinds)))
+        values = np.array([_value(aircraft, path) for path in schema.paths],
+                          dtype=float)
+        labels = DesignLabels(
+            aircraft.id, aircraft.name,
+            aircraft.wing.aerofoil.name if aircraft.wing is not None
+            and aircraft.wing.aerofoil is not None else None,
+            aircraft.mission_profile.name)
+        return cls(schema, values, labels)
+
+    def _get(self, path: str):
+        i = self.schema.index[path]
+        value = self.values[i]
+        if np.isnan(value):
+            return None
+        return self.schema.types[i](value)
+
+    def _component(self, component: str) -> Wing | Tail | Fuselage | None:
+        model, attributes = _COMPONENTS[component]
+        component_data = {
+            attribute: self._get(f'{component}.{attribute}')
+            for attribute in attributes
+        }
+        if all(value is None for value in component_data.values()):
+            return None
+        if component == 'wing' and self.labels.aerofoil is not None:
+            component_data['aerofoil'] = Aerofoil(name=self.labels.aerofoil)
+        return model(
+            **{
+                key: value
+                for key, value in component_data.items() if value is not None
+            })
+
+    def to_aircraft(self) -> Aircraft:
+        data = {
+            path: self._get(path)
+            for path in self.schema.paths if '.' not in path
+        }
+        for component in _COMPONENTS:
+            value = self._component(component)
+            if value is not None:
+                data[component] = value
+        phases = PhaseTable(
+            MissionPhase(phase=phase,
+                         name=name,
+                         **{
+                             attribute:
+                             self._get(f'mission_profile.{name}.{attribute}')
+                             for attribute in MISSION_PHASE_FIELDS
+                         })
+            for name, phase in zip(self.schema.segments, self.schema.phases))
+        phases[Phase.TAKEOFF].power = self._get(
+            'mission_profile.TAKEOFF.power')
+        return Aircraft(id=self.labels.id,
+                        name=self.labels.name,
+                        mission_profile=MissionProfile(
+                            name=self.labels.mission_profile, phases=phases),
+                        **data)
+
+    def update_aircraft(self, aircraft: Aircraft,
+                        paths: Iterable[str]) -> Aircraft:
+        """
+        Write the values of some paths onto an aircraft of this schema, e.g. one from to_aircraft, instead of building
+        a new one. Components are rebuilt as a whole, since their attributes depend on each other.
+        :param aircraft: Aircraft to update
+        :param paths: Paths whose values changed
+        :return: The updated aircraft
+        """
+        for path in paths:
+            head, _, attribute = path.rpartition('.')
+            if not head:
+                setattr(aircraft, path, self._get(path))
+            elif head in _COMPONENTS:
+                setattr(aircraft, head, self._component(head))
+            else:
+                segment = head.split('.', 1)[1]
+                setattr(aircraft.mission_profile.phases[segment], attribute,
+                        self._get(path))
+        return aircraft
+
+    def replace(self,
+                overrides: dict[str, float] = None,
+                **kwargs: float) -> 'DesignPoint':
+        """
+        Create a variant of this design point.
+        :param overrides: New values by attribute path, e.g. {'wing.span': 12, 'mission_profile.CRUISE.duration': 1800}
+        :param kwargs: New values of top-level Aircraft fields
+        :return: New DesignPoint
+        """
+        values = self.values.copy()
+        index = self.schema.index
+        for path, value in (overrides or {}).items():
+            values[index[path]] = value
+        for path, value in kwargs.items():
+            values[index[path]] = value
+        point = object.__new__(DesignPoint)
+        values.flags.writeable = False
+        object.__setattr__(point, 'schema', self.schema)
+        object.__setattr__(point, 'values', values)
+        object.__setattr__(point, 'labels', self.labels)
+        return point
+
+    def __getitem__(self, path: str) -> float:
+        return self.values[self.schema.index[path]]
+
+    def __getattr__(self, item: str) -> float:
+        if item in DesignPoint.__slots__:
+            raise AttributeError(item)
+        try:
+            return self.values[self.schema.index[item]]
+        except KeyError:
+            raise AttributeError(f"No such attribute: {item}") from None
+
+    def __setattr__(self, key, value):
+        raise AttributeError('DesignPoint is immutable, use replace instead')
+
+    def __reduce__(self):
+        return DesignPoint, (self.schema, self.values.copy(), self.labels)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, DesignPoint) and self.schema.paths == other.schema.paths and \
+            self.labels == other.labels and np.array_equal(self.values, other.values, equal_nan=True)
+
+    def __hash__(self) -> int:
+        return hash((self.schema.paths, self.labels, self.values.tobytes()))
+
+    def __repr__(self) -> str:
+        return f'DesignPoint(id={self.labels.id})'
+
+
+def as_aircraft(aircraft: Aircraft | DesignPoint) -> Aircraft:
+    """Convert a design point to an Aircraft, Aircraft objects are returned as is"""
+    return aircraft.to_aircraft() if isinstance(aircraft,
+                                                DesignPoint) else aircraft
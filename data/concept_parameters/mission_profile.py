@@ -1,6 +1,9 @@
 from enum import Enum
+from typing import Any, Iterable, Iterator
 
-from pydantic import BaseModel, field_validator, PrivateAttr
+import numpy as np
+from pydantic import BaseModel, GetCoreSchemaHandler
+from pydantic_core import core_schema
 
 from utility.log import logger
 from utility.unit_conversion import convert_float
@@ -15,52 +18,115 @@ class Phase(Enum):
     LANDING = 'landing'
 
 
-class MissionPhase(BaseModel):
-    phase: Phase
-    duration: float  # in seconds
-    horizontal_speed: float  # in m/second
-    distance: float  # in m
-    vertical_speed: float  # in m/second
-    ending_altitude: float  # in m
-    _energy: float = PrivateAttr(None)
-    _power: float = PrivateAttr(None)
-    _C_L: float = PrivateAttr(None)
+# Inputs of a mission segment
+SEGMENT_FIELDS = ('duration', 'horizontal_speed', 'distance', 'vertical_speed',
+                  'ending_altitude')
+# Set by the sizing models, None until then
+RESULT_FIELDS = ('power', 'energy', 'C_L')
 
-    @property
-    def energy(self):
-        return self._energy
 
-    @energy.setter
-    def energy(self, value):
-        self._energy = value
+def _column_property(column: str) -> property:
 
-    @property
-    def power(self):
-        return self._power
+    def getter(self: 'MissionPhase') -> float | None:
+        value = self._table.columns[column][self._row]
+        return None if value != value else float(value)
+
+    def setter(self: 'MissionPhase', value: float | None):
+        self._table.columns[column][
+            self._row] = np.nan if value is None else value
+
+    return property(getter, setter)
+
+
+class MissionPhase:
+    """
+    One segment of a mission. Segments of a mission profile are views of a row of its PhaseTable, a segment created on
+    its own has a table with only itself.
+    """
+    __slots__ = ('_table', '_row')
 
-    @power.setter
-    def power(self, value):
-        self._power = value
+    def __init__(self,
+                 phase: Phase | str,
+                 duration: float,
+                 horizontal_speed: float,
+                 distance: float,
+                 vertical_speed: float,
+                 ending_altitude: float,
+                 name: str = None,
+                 power: float = None,
+                 energy: float = None,
+                 C_L: float = None):
+        """
+        :param phase: Type of the segment, which determines how its power is computed, or its value or name
+        :param duration: Duration in s
+        :param horizontal_speed: Horizontal speed in m/s
+        :param distance: Distance in m
+        :param vertical_speed: Vertical speed in m/s, negative when descending
+        :param ending_altitude: Altitude at the end of the segment in m
+        :param name: Unique name of the segment within its mission, the name of the phase by default
+        """
+        if not isinstance(phase, Phase):
+            phase = Phase._value2member_map_.get(phase) or Phase[phase]
+        values = dict(duration=duration,
+                      horizontal_speed=horizontal_speed,
+                      distance=distance,
+                      vertical_speed=vertical_speed,
+                      ending_altitude=ending_altitude,
+                      power=power,
+                      energy=energy,
+                      C_L=C_L)
+        for column in ('duration', 'horizontal_speed', 'distance',
+                       'ending_altitude'):  # vertical_speed can be negative
+            if values[column] < 0:
+                logger.error(
+                    f'negative {column} in {name or phase.name}: {values[column]}'
+                )
+        table = PhaseTable()
+        table._append(name or phase.name, phase, values)
+        table._standalone = True
+        self._bind(table, 0)
+
+    def _bind(self, table: 'PhaseTable', row: int):
+        self._table = table
+        self._row = row
 
     @property
-    def C_L(self):
-        return self._C_L
+    def phase(self) -> Phase:
+        return self._table.kinds[self._row]
 
-    @C_L.setter
-    def C_L(self, value):
-        self._C_L = value
+    @property
+    def name(self) -> str:
+        return self._table.names[self._row]
 
-    @classmethod
-    @field_validator('duration', 'horizontal_speed', 'distance',
-                     'ending_altitude')  # vertical_speed can be negative
-    def check_positive(cls, v):
-        if v < 0:
-            logger.error(f'negative value in {cls.__name__}: {v}')
-        return v
+    duration = _column_property('duration')
+    horizontal_speed = _column_property('horizontal_speed')
+    distance = _column_property('distance')
+    vertical_speed = _column_property('vertical_speed')
+    ending_altitude = _column_property('ending_altitude')
+    power = _column_property('power')
+    energy = _column_property('energy')
+    C_L = _column_property('C_L')
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'name': self.name,
+            'phase': self.phase,
+            **{
+                column: getattr(self, column)
+                for column in SEGMENT_FIELDS + RESULT_FIELDS
+            }
+        }
 
     def __hash__(self):
         return hash(self.phase)
 
+    def __eq__(self, other) -> bool:
+        return isinstance(other,
+                          MissionPhase) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f'MissionPhase(name={self.name!r}, phase={self.phase})'
+
     def __str__(self):
         return f'{self.phase.value} phase:\n' + \
             f' duration: {self.duration:.2f} seconds,\n' + \
@@ -70,52 +136,174 @@ class MissionPhase(BaseModel):
             f' ending altitude: {self.ending_altitude:.2f} m\n'
 
 
+class PhaseTable:
+    """
+    Ordered segments of a mission, stored as one float array per column with None stored as NaN.
+
+    Segments are found by position, by name, or by Phase (or its name) for the first segment of that phase, all in
+    O(1). The same phase can occur any number of times, e.g. repeated cruise legs or a reserve hover; repeated
+    segments are named CRUISE_2, CRUISE_3, ... unless named explicitly. Iterating gives the segment names, values()
+    the MissionPhase views in mission order.
+    """
+
+    def __init__(self, segments: Iterable[MissionPhase] = ()):
+        self.kinds: list[Phase] = []
+        self.names: list[str] = []
+        self.columns: dict[str, np.ndarray] = {
+            column: np.empty(0)
+            for column in SEGMENT_FIELDS + RESULT_FIELDS
+        }
+        self._index: dict[str | Phase, int] = {}
+        self._views: list[MissionPhase] = []
+        # table of a segment created on its own
+        self._standalone = False
+        for segment in segments:
+            self.append(segment)
+
+    def _append(self, name: str, phase: Phase, values: dict[str,
+                                                            float | None]):
+        if name in self.names:
+            count = self.kinds.count(phase) + 1
+            while f'{name}_{count}' in self.names:
+                count += 1
+            name = f'{name}_{count}'
+        self.kinds.append(phase)
+        self.names.append(name)
+        for column, array in self.columns.items():
+            value = values.get(column)
+            self.columns[column] = np.append(
+                array, np.nan if value is None else value)
+        self._reindex()
+
+    def _reindex(self):
+        self._index = {name: row for row, name in enumerate(self.names)}
+        for row, phase in enumerate(self.kinds):
+            self._index.setdefault(phase, row)
+            self._index.setdefault(phase.name, row)
+        while len(self._views) < len(self.names):
+            view = object.__new__(MissionPhase)
+            view._bind(self, len(self._views))
+            self._views.append(view)
+
+    def append(self, segment: MissionPhase) -> MissionPhase:
+        """
+        Add a copy of a segment at the end of the mission. A segment that was created on its own becomes the view of
+        the new row, so changes to it show up in the mission.
+        :param segment: Segment to add
+        :return: The segment in this table
+        """
+        self._append(segment.name, segment.phase, segment.to_dict())
+        if segment._table._standalone:
+            segment._bind(self, len(self) - 1)
+            self._views[-1] = segment
+        return self._views[-1]
+
+    def row(self, key: int | str | Phase) -> int:
+        return key if isinstance(key, int) else self._index[key]
+
+    def column(self, name: str) -> np.ndarray:
+        """Values of a column for all segments, in mission order; writable"""
+        return self.columns[name]
+
+    @property
+    def energy(self) -> np.ndarray:
+        """Energy per segment in J, power times duration"""
+        return self.columns['power'] * self.columns['duration']
+
+    def __getitem__(self, key: int | str | Phase) -> MissionPhase:
+        return self._views[self.row(key)]
+
+    def __setitem__(self, key: int | str | Phase, segment: MissionPhase):
+        row = self.row(key)
+        if segment.phase != self.kinds[row]:
+            raise ValueError(
+                f'{self.names[row]} is a {self.kinds[row]} segment, not {segment.phase}'
+            )
+        for column, array in self.columns.items():
+            array[row] = segment._table.columns[column][segment._row]
+
+    def __contains__(self, key) -> bool:
+        return key in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def keys(self) -> list[str]:
+        return list(self.names)
+
+    def values(self) -> list[MissionPhase]:
+        return list(self._views)
+
+    def items(self) -> list[tuple[str, MissionPhase]]:
+        return list(zip(self.names, self._views))
+
+    def to_list(self) -> list[dict[str, Any]]:
+        return [segment.to_dict() for segment in self._views]
+
+    def __eq__(self, other) -> bool:
+        return isinstance(
+            other, PhaseTable
+        ) and self.names == other.names and self.kinds == other.kinds and all(
+            np.array_equal(array, other.columns[column], equal_nan=True)
+            for column, array in self.columns.items())
+
+    def __repr__(self) -> str:
+        return f'PhaseTable({self.names})'
+
+    @classmethod
+    def validate(
+        cls,
+        value: 'PhaseTable | dict[Phase | str, MissionPhase | dict] | list'
+    ) -> 'PhaseTable':
+        """Create a table from segments, a dict of segments by Phase or name, or the output of to_list"""
+        if isinstance(value, PhaseTable):
+            return value
+        if isinstance(value, dict):
+            # the phase of a segment stored by phase, as in JSON of the former dict format, defaults to its key
+            value = [
+                segment if isinstance(segment, MissionPhase) else {
+                    'phase': phase,
+                    **segment
+                } for phase, segment in value.items()
+            ]
+        return cls(
+            segment if isinstance(segment, MissionPhase) else MissionPhase(
+                **segment) for segment in value)
+
+    @classmethod
+    def __get_pydantic_core_schema__(
+            cls, source: Any,
+            handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda table: table.to_list()))
+
+
 class MissionProfile(BaseModel):
+    """
+    Mission of an aircraft. Segments are accessed as attributes by name or phase, e.g. `mission_profile.CRUISE` for
+    the first cruise segment and `mission_profile.CRUISE_2` for the second.
+    """
     name: str = 'unnamed'
-    phases: dict[Phase, MissionPhase]
+    phases: PhaseTable
 
     @property
-    def energy(self):
-        return sum([phase.energy for phase in self.phases.values()])
+    def energy(self) -> float:
+        return float(self.phases.column('energy').sum())
 
     def __getattr__(self, item):
-        try:
-            if Phase[item] in self.phases:
-                return self.phases[Phase[item]]
-        except KeyError:
-            if item in self.phases:
-                return self.phases[item]
-        else:
-            raise AttributeError(f"No such attribute: {Phase[item]}")
+        phases = self.__dict__.get('phases')
+        if phases is not None and item in phases:
+            return phases[item]
+        raise AttributeError(f"No such attribute: {item}")
 
     def __setattr__(self, key, value):
-        try:
-            if Phase[key] in self.phases:
-                self.phases[Phase[key]] = value
-            else:
-                super().__setattr__(key, value)
-        except KeyError:
-            if key in self.phases:
-                self.phases[key] = value
-            else:
-                super().__setattr__(key, value)
-
-    @classmethod
-    @field_validator('phases')
-    def check_phases(cls, v):
-        if len(v) == 0:
-            logger.error(f'no phase in {cls.name}')
-        if len(v) != len(set(v)):
-            logger.error(f'duplicate phase in {cls.name}')
-        if v[0].phase != Phase.TAKEOFF:
-            logger.warning(
-                f'first phase is not takeoff, but {v[0].name}, in {cls.name}')
-        if v[-1].phase != Phase.LANDING:
-            logger.warning(
-                f'last phase is not landing, but {v[-1].name}, in {cls.name}')
-        if len(v) < 2:
-            logger.warning(f'only one phase in {cls.name}')
-        if len(v) != 5:
-            logger.warning(
-                f'number of phases is not 5, but {len(v)}, in {cls.name}')
-        return v
+        phases = self.__dict__.get('phases')
+        if phases is not None and key in phases:
+            phases[key] = value
+        else:
+            super().__setattr__(key, value)
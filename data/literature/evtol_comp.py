@@ -1,7 +1,13 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
 import numpy as np
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
 # Create the data frame based on the given table
 data = {
     "Aircraft": [
@@ -14,48 +20,46 @@ data = {
     "Payload (kg)": [250, 410, 453, 400, 450, 200, 700, 220]
 }
 
-df = pd.DataFrame(data)
-
-# Plot MTOW vs Range
-plt.figure(figsize=(12, 6))
-
-# Scatter plot MTOW vs Range
-for i in range(len(df)):
-    plt.scatter(df["Range (km)"][i],
-                df["MTOW (kg)"][i],
-                label=df["Aircraft"][i])
-plt.xlabel("Range (km)")
-plt.ylabel("MTOW (kg)")
-plt.title("MTOW vs Range")
-
-# Calculate and plot regression line for MTOW vs Range
-x1 = df["Range (km)"]
-y1 = df["MTOW (kg)"]
-m1, b1 = np.polyfit(x1, y1, 1)
-plt.plot(x1, m1 * x1 + b1, color='red')
-
-plt.legend(loc='lower right')
-plt.grid(True)
-plt.show()
-
-# Plot MTOW vs Payload
-plt.figure(figsize=(12, 6))
-
-# Scatter plot MTOW vs Payload
-for i in range(len(df)):
-    plt.scatter(df["Payload (kg)"][i],
-                df["MTOW (kg)"][i],
-                label=df["Aircraft"][i])
-plt.xlabel("Payload (kg)")
-plt.ylabel("MTOW (kg)")
-plt.title("MTOW vs Payload")
-
-# Calculate and plot regression line for MTOW vs Payload
-x2 = df["Payload (kg)"]
-y2 = df["MTOW (kg)"]
-m2, b2 = np.polyfit(x2, y2, 1)
-plt.plot(x2, m2 * x2 + b2, color='red')
-
-plt.legend(loc='lower right')
-plt.grid(True)
-plt.show()
+
+def comparison_data() -> pd.DataFrame:
+    import pandas as pd
+
+    return pd.DataFrame(data)
+
+
+def plot_mtow_over(column: str,
+                   df: pd.DataFrame = None) -> tuple[plt.Figure, plt.Axes]:
+    """
+    Scatter plot of the MTOW over another column, with a linear regression line.
+    :param column: Column on the x-axis, e.g. "Range (km)" or "Payload (kg)"
+    :param df: Comparison data, defaults to comparison_data()
+    """
+    import matplotlib.pyplot as plt
+
+    df = comparison_data() if df is None else df
+    fig, ax = plt.subplots(figsize=(12, 6))
+
+    for i in range(len(df)):
+        ax.scatter(df[column][i], df["MTOW (kg)"][i], label=df["Aircraft"][i])
+    ax.set_xlabel(column)
+    ax.set_ylabel("MTOW (kg)")
+    ax.set_title(f"MTOW vs {column.split(' (')[0]}")
+
+    # Calculate and plot regression line
+    x = df[column]
+    y = df["MTOW (kg)"]
+    m, b = np.polyfit(x, y, 1)
+    ax.plot(x, m * x + b, color='red')
+
+    ax.legend(loc='lower right')
+    ax.grid(True)
+    return fig, ax
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    plot_mtow_over("Range (km)")
+    plt.show()
+    plot_mtow_over("Payload (kg)")
+    plt.show()
@@ -1,10 +1,14 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-from pandas import DataFrame
+from __future__ import annotations
 
-from utility.data_management.df_generation import df_from_markdown
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-vtol_data = df_from_markdown("""
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+    from pandas import DataFrame
+
+# Markdown table of existing eVTOLs, parsed by load_vtol_data
+VTOL_TABLE = """
     | Name | Developer | Country Code | Primary Class | Range (km) | Payload (kg) | Mass (kg) | Source |
     | Acubed Vahana    | Airbus | US | PL | 96.6 | 204.1 | 930.0 | [54] |
     | AMVA | Micor Technologies | US | PL | 125.0 | 450.0 | 1300.0 | [72] |
@@ -20,30 +24,50 @@ vtol_data = df_from_markdown("""
     | Volocopter (2-seater) | Volocopter | DE | WL | 27.4 | 158.8 | 449.1 | [57] |
     | Voyager X2 | XPeng | CN | WL | 76.0 | 200.0 | 560.2 | [80] |
     | VTOL | Napoleon Aero | RU | PL | 100.0 | 400.0 | 1500.0 | [81] |
-    """)
-
-data_from_philip = pd.DataFrame({
-    "Name": [
-        "CityAirbus NextGen", "Prosperity 1 (V1500M)", "Joby S4",
-        "Jaunt Air Mobility Journey", "Archer Aviation Midnight",
-        "Volocopter VoloCity", "Lilium Jet", "Ehang 216-S"
-    ],
-    "Range (km)": [80, 250, 161, 129, 161, 45, 250, 35],
-    "Mass (kg)": [2200, 1500, 2404, 2722, 3175, 900, 3175, 600],
-    "Payload (kg)": [250, 410, 453, 400, 450, 200, 700, 220]
-})
-
-vtol_data = pd.concat([vtol_data, data_from_philip], ignore_index=True)
-vtol_data["Primary Class"] = vtol_data["Primary Class"].fillna("PL")
-vtol_data = vtol_data[vtol_data['Name'] != 'VTOL']
-vtol_data = vtol_data[vtol_data['Name'] != 'Lilium Jet']
-vtol_data = vtol_data[vtol_data['Name'] != 'Joby eVTOL']
-vtol_data = vtol_data.sort_values(by='Mass (kg)', ascending=True)
+    """
+
+
+@lru_cache(maxsize=1)
+def load_vtol_data() -> DataFrame:
+    """Literature data of existing eVTOLs, parsed on first use"""
+    import pandas as pd
+
+    from utility.data_management.df_generation import df_from_markdown
+
+    vtol_data = df_from_markdown(VTOL_TABLE)
+
+    data_from_philip = pd.DataFrame({
+        "Name": [
+            "CityAirbus NextGen", "Prosperity 1 (V1500M)", "Joby S4",
+            "Jaunt Air Mobility Journey", "Archer Aviation Midnight",
+            "Volocopter VoloCity", "Lilium Jet", "Ehang 216-S"
+        ],
+        "Range (km)": [80, 250, 161, 129, 161, 45, 250, 35],
+        "Mass (kg)": [2200, 1500, 2404, 2722, 3175, 900, 3175, 600],
+        "Payload (kg)": [250, 410, 453, 400, 450, 200, 700, 220]
+    })
+
+    vtol_data = pd.concat([vtol_data, data_from_philip], ignore_index=True)
+    vtol_data["Primary Class"] = vtol_data["Primary Class"].fillna("PL")
+    vtol_data = vtol_data[vtol_data['Name'] != 'VTOL']
+    vtol_data = vtol_data[vtol_data['Name'] != 'Lilium Jet']
+    vtol_data = vtol_data[vtol_data['Name'] != 'Joby eVTOL']
+    vtol_data = vtol_data.sort_values(by='Mass (kg)', ascending=True)
+    return vtol_data
+
+
+def __getattr__(name: str):
+    # vtol_data is only parsed when it is first used
+    if name == 'vtol_data':
+        return load_vtol_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # @save
-def plot_range_over_mass(
-        df: DataFrame = vtol_data) -> tuple[plt.Figure, plt.Axes]:
+def plot_range_over_mass(df: DataFrame = None) -> tuple[plt.Figure, plt.Axes]:
+    import matplotlib.pyplot as plt
+
+    df = load_vtol_data() if df is None else df
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for i, row in df.iterrows():
@@ -59,7 +83,10 @@ def plot_range_over_mass(
 
 # @save
 def plot_range_over_payload(
-        df: DataFrame = vtol_data) -> tuple[plt.Figure, plt.Axes]:
+        df: DataFrame = None) -> tuple[plt.Figure, plt.Axes]:
+    import matplotlib.pyplot as plt
+
+    df = load_vtol_data() if df is None else df
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for i, row in df.iterrows():
@@ -75,7 +102,10 @@ def plot_range_over_payload(
 
 # @save
 def plot_mass_over_payload(
-        df: DataFrame = vtol_data) -> tuple[plt.Figure, plt.Axes]:
+        df: DataFrame = None) -> tuple[plt.Figure, plt.Axes]:
+    import matplotlib.pyplot as plt
+
+    df = load_vtol_data() if df is None else df
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for i, row in df.iterrows():
@@ -90,7 +120,7 @@ def plot_mass_over_payload(
 
 
 if __name__ == '__main__':
-    print(vtol_data.to_string())
+    print(load_vtol_data().to_string())
     plot_range_over_mass()
     plot_range_over_payload()
     plot_mass_over_payload()
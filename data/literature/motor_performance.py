@@ -1,14 +1,19 @@
-from typing import Callable
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Callable
 
 import numpy as np
-import pandas as pd
-from matplotlib import pyplot as plt
 
 from sizing_tools.formula.emperical import engine_mass
-from utility.data_management.df_generation import df_from_markdown
 from utility.plotting import show, save
 
-engine_data = df_from_markdown("""
+if TYPE_CHECKING:
+    import pandas as pd
+    from matplotlib import pyplot as plt
+
+# Markdown table of electric motors, parsed by load_engine_data
+ENGINE_TABLE = """
      | Motor(s)               | Power (kW) | Mass (kg) | Source |
      | Emrax 188              |         52 |         7 | [82]   |
      | Emrax 208              |         68 |       9.1 | [82]   |
@@ -36,13 +41,31 @@ engine_data = df_from_markdown("""
      | Yuneec Power Drive 40  |         40 |        19 | [86]   |
      | Yuneec Power Drive 60  |         60 |        30 | [86]   |
 
-    """)
+    """
+
+
+@lru_cache(maxsize=1)
+def load_engine_data() -> pd.DataFrame:
+    """Literature data of electric motors, parsed on first use"""
+    from utility.data_management.df_generation import df_from_markdown
+
+    return df_from_markdown(ENGINE_TABLE)
+
+
+def __getattr__(name: str):
+    # engine_data is only parsed when it is first used
+    if name == 'engine_data':
+        return load_engine_data()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # @show
 # @save
 def plot_power_over_mass_data(
-        df: pd.DataFrame = engine_data) -> tuple[plt.Figure, plt.Axes]:
+        df: pd.DataFrame = None) -> tuple[plt.Figure, plt.Axes]:
+    from matplotlib import pyplot as plt
+
+    df = load_engine_data() if df is None else df
     fig, ax = plt.subplots(figsize=(10, 6))
 
     for i, row in df.iterrows():
@@ -59,7 +82,7 @@ def plot_power_over_mass_data(
 
 @show
 @save
-def plot_power_over_mass(mass_over_power_fn: Callable[[np.ndarray], np.ndarray], df: pd.DataFrame = engine_data) -> \
+def plot_power_over_mass(mass_over_power_fn: Callable[[np.ndarray], np.ndarray], df: pd.DataFrame = None) -> \
 tuple[plt.Figure, plt.Axes]:
     fig, ax = plot_power_over_mass_data(df)
     # get y axis limits
@@ -0,0 +1,250 @@
+import ast
+import hashlib
+import importlib.util
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from data.concept_parameters.design_point import DesignPoint
+from utility import save_path
+from utility.log import logger
+
+# Modules whose source code determines the sizing results, together with all first-party modules they import; cached
+# results are invalidated when any of them changes
+MODEL_MODULES = (
+    'sizing_tools.mass_model.iteration',
+    'sizing_tools.sweep',
+)
+FIRST_PARTY_PACKAGES = ('data', 'sizing_tools', 'utility')
+ROOT = Path(__file__).parents[1]
+# Aircraft fields that are written by the sizing models and do not change their results
+SIZING_OUTPUTS = ('TA', 'hinge_load', 'hinge_moment')
+
+
+def _source(name: str) -> Path | None:
+    """Source file of a first-party module or package, None for a namespace package or no module"""
+    path = ROOT.joinpath(*name.split('.'))
+    for file in (path.with_suffix('.py'), path / '__init__.py'):
+        if file.is_file():
+            return file
+    return None
+
+
+def _imported_modules(name: str) -> set[str]:
+    """First-party modules imported anywhere in the source of a module, including their parent packages"""
+    file = _source(name)
+    if file is None:
+        return set()
+    package = name if file.name == '__init__.py' else name.rpartition('.')[0]
+    candidates = set()
+    for node in ast.walk(ast.parse(file.read_bytes())):
+        if isinstance(node, ast.Import):
+            candidates.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            module = importlib.util.resolve_name(
+                '.' * node.level + (node.module or ''), package)
+            candidates.add(module)
+            # from a package import a module
+            candidates.update(f'{module}.{alias.name}' for alias in node.names)
+    modules = set()
+    for candidate in candidates:
+        parts = candidate.split('.')
+        if parts[0] not in FIRST_PARTY_PACKAGES:
+            continue
+        for i in range(1, len(parts) + 1):
+            # an imported name that is not a module is neither a file nor a directory
+            if _source('.'.join(parts[:i])) is None and not ROOT.joinpath(
+                    *parts[:i]).is_dir():
+                break
+            modules.add('.'.join(parts[:i]))
+    return modules
+
+
+@lru_cache(maxsize=1)
+def model_modules() -> tuple[str, ...]:
+    """MODEL_MODULES and the first-party modules they import, directly or indirectly"""
+    modules = set()
+    pending = list(MODEL_MODULES)
+    while pending:
+        name = pending.pop()
+        if name not in modules:
+            modules.add(name)
+            pending.extend(_imported_modules(name))
+    return tuple(sorted(modules))
+
+
+@lru_cache(maxsize=1)
+def model_version() -> str:
+    """Hash of the source code of the sizing models"""
+    digest = hashlib.sha256()
+    for name in model_modules():
+        digest.update(name.encode())
+        file = _source(name)
+        if file is not None:
+            digest.update(file.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _update(digest, obj: Any):
+    match obj:
+        case None:
+            digest.update(b'N')
+        case DesignPoint():
+            values = np.array(obj.values)
+            for path in SIZING_OUTPUTS:
+                values[obj.schema.index[path]] = np.nan
+            _update(digest, obj.schema.paths)
+            _update(digest, values)
+            _update(digest, obj.labels)
+        case np.ndarray():
+            if obj.dtype.kind == 'f':
+                # -0.0 and all NaN payloads hash like 0.0 and NaN
+                obj = np.where(np.isnan(obj), np.nan, obj + 0.)
+            obj = np.ascontiguousarray(obj)
+            digest.update(f'A{obj.dtype.str}{obj.shape}'.encode() +
+                          (obj.tobytes() if obj.dtype.kind !=
+                           'U' else '\0'.join(obj.ravel()).encode()))
+        case Enum():
+            digest.update(f'E{type(obj).__name__}.{obj.name}'.encode())
+        case bool() | int() | float() | np.number():
+            _update(digest, np.asarray(obj, dtype=float))
+        case str():
+            digest.update(b'S' + obj.encode() + b'\0')
+        case dict():
+            digest.update(f'D{len(obj)}'.encode())
+            for key in sorted(obj, key=str):
+                _update(digest, key)
+                _update(digest, obj[key])
+        case list() | tuple():
+            digest.update(f'L{len(obj)}'.encode())
+            for item in obj:
+                _update(digest, item)
+        case _ if is_dataclass(obj):
+            digest.update(f'C{type(obj).__name__}'.encode())
+            for field in fields(obj):
+                _update(digest, field.name)
+                _update(digest, getattr(obj, field.name))
+        case _:
+            raise TypeError(f'Cannot hash {type(obj).__name__} for the cache')
+
+
+def canonical_hash(*parts: Any) -> str:
+    """
+    Stable hash of sizing inputs, independent of the process and of the Python hash seed.
+
+    Supports design points (without the sizing outputs in SIZING_OUTPUTS), numpy arrays, dataclasses such as
+    DesignBatch, enums, numbers, strings and dicts, lists and tuples of these. Numbers hash by their float value.
+    :param parts: Objects to hash together
+    :return: Hexadecimal digest
+    """
+    digest = hashlib.sha256()
+    _update(digest, model_version())
+    _update(digest, parts)
+    return digest.hexdigest()
+
+
+class SizingCache:
+    """
+    Content-addressed cache of sizing results: an in-memory LRU in front of a directory of pickles.
+
+    Keys come from canonical_hash, so they already include the model version. Results are stored per model version,
+    so stale entries are never read and can be removed with `prune`.
+    """
+
+    def __init__(self,
+                 path: Path | str = None,
+                 maxsize: int = 1024,
+                 enabled: bool = True):
+        """
+        :param path: Directory of the on-disk store, memory only if None
+        :param maxsize: Maximum number of results kept in memory
+        :param enabled: Whether results are stored and looked up at all
+        """
+        self.path = Path(path) if path is not None else None
+        self.maxsize = maxsize
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _file(self, key: str) -> Path:
+        return self.path / model_version() / f'{key}.pkl'
+
+    def _remember(self, key: str, value: Any):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.maxsize:
+                self._memory.popitem(last=False)
+
+    def __contains__(self, key: str) -> bool:
+        return self.enabled and (key in self._memory or self.path is not None
+                                 and self._file(key).exists())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+        if self.path is not None and self._file(key).exists():
+            try:
+                value = pickle.loads(self._file(key).read_bytes())
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                logger.warning(f'Ignoring unreadable cache entry {key}: {e}')
+            else:
+                self._remember(key, value)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def put(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        self._remember(key, value)
+        if self.path is None:
+            return
+        file = self._file(key)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so concurrent readers never see a partial pickle
+        temporary = file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}')
+        temporary.write_bytes(pickle.dumps(value))
+        os.replace(temporary, file)
+
+    def clear(self):
+        """Remove all results of the current model version"""
+        with self._lock:
+            self._memory.clear()
+        if self.path is not None and (self.path / model_version()).exists():
+            for file in (self.path / model_version()).glob('*.pkl'):
+                file.unlink()
+
+    def prune(self):
+        """Remove the results of all other model versions from disk"""
+        if self.path is None or not self.path.exists():
+            return
+        for directory in self.path.iterdir():
+            if directory.is_dir() and directory.name != model_version():
+                for file in directory.iterdir():
+                    file.unlink()
+                directory.rmdir()
+
+
+# Shared cache of Iteration.run and DesignSweep.run, kept in memory by default; SIZING_CACHE=disk also stores the
+# results in save/sizing_cache, SIZING_CACHE=off disables it
+sizing_cache = SizingCache(path=save_path / 'sizing_cache' if os.environ.get(
+    'SIZING_CACHE', 'memory') == 'disk' else None,
+                           enabled=os.environ.get('SIZING_CACHE', 'memory')
+                           != 'off')
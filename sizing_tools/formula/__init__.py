@@ -0,0 +1,7 @@
+"""
+Formulas of the sizing models.
+
+Formulas only use arithmetic operators and numpy functions, never the math module, so they accept floats, numpy
+arrays (broadcasting against each other) and CasADi symbols alike; numpy dispatches its functions on CasADi values to
+their CasADi equivalents. See mass_model.classII.symbolic for the mass model as a symbolic graph.
+"""
@@ -1,5 +1,6 @@
-from math import sqrt, pi
+from typing import Callable
 
+import numpy as np
 from scipy.optimize import minimize
 
 
@@ -29,7 +30,7 @@ def velocity_from_lift(lift: float, rho: float, C_L: float,
     :param surface_area: The wing surface area in m^2
     :return: The velocity of the aircraft in m/s
     """
-    return sqrt(2 * lift / (rho * C_L * surface_area))
+    return np.sqrt(2 * lift / (rho * C_L * surface_area))
 
 
 # Function to calculate the drag force
@@ -59,30 +60,46 @@ def C_D_from_CL(C_L: float, C_D0: float, aspect_ratio: float,
     :param e: The Oswald efficiency factor
     :return: The drag coefficient
     """
-    return C_D0 + C_L**2 / (pi * aspect_ratio * e)
+    return C_D0 + C_L**2 / (np.pi * aspect_ratio * e)
 
 
-def C_L_climb_opt(C_D0: float, aspect_ratio: float, e: float) -> float:
+def C_L_climb_opt(C_D0: float,
+                  aspect_ratio: float,
+                  e: float,
+                  drag_polar: Callable[..., float] = None) -> float:
     """
     Calculate the optimal lift coefficient (C_L) for climb (max C_L^3/C_D^2).
+    For the parabolic drag polar of C_D_from_CL this is sqrt(3 C_D0 pi A e), other polars are optimized numerically, for
+    floats only.
     :param C_D0: The zero-lift drag coefficient
     :param aspect_ratio: The aspect ratio of the wing
     :param e: The Oswald efficiency factor
+    :param drag_polar: Drag polar with the signature of C_D_from_CL, the parabolic polar if None
     :return: The optimal lift coefficient
     """
-    min_func = lambda C_L: -C_L**3 / C_D_from_CL(C_L, C_D0, aspect_ratio, e)**2
+    if drag_polar is None:
+        return np.sqrt(3 * C_D0 * np.pi * aspect_ratio * e)
+    min_func = lambda C_L: -C_L**3 / drag_polar(C_L, C_D0, aspect_ratio, e)**2
     return minimize(min_func, x0=0.5).x[0]
 
 
-def C_L_cruise_opt(C_D0: float, aspect_ratio: float, e: float) -> float:
+def C_L_cruise_opt(C_D0: float,
+                   aspect_ratio: float,
+                   e: float,
+                   drag_polar: Callable[..., float] = None) -> float:
     """
     Calculate the optimal lift coefficient (C_L) for cruise (max C_L/C_D).
+    For the parabolic drag polar of C_D_from_CL this is sqrt(C_D0 pi A e), other polars are optimized numerically, for
+    floats only.
     :param C_D0: The zero-lift drag coefficient
     :param aspect_ratio: The aspect ratio of the wing
     :param e: The Oswald efficiency factor
+    :param drag_polar: Drag polar with the signature of C_D_from_CL, the parabolic polar if None
     :return: The optimal lift coefficient
     """
-    min_func = lambda C_L: -C_L / C_D_from_CL(C_L, C_D0, aspect_ratio, e)
+    if drag_polar is None:
+        return np.sqrt(C_D0 * np.pi * aspect_ratio * e)
+    min_func = lambda C_L: -C_L / drag_polar(C_L, C_D0, aspect_ratio, e)
     return minimize(min_func, x0=0.5).x[0]
 
 
@@ -114,7 +131,7 @@ def hover_power(rotor_disk_thrust: float, rotor_disk_area: float,
     :return: The power required for hovering in W
     """
     return rotor_disk_thrust**(3 / 2) / (figure_of_merit *
-                                         sqrt(2 * rho * rotor_disk_area))
+                                         np.sqrt(2 * rho * rotor_disk_area))
 
 
 def hover_velocity(hover_power: float, rotor_disk_thrust: float):
@@ -136,4 +153,4 @@ def rotor_disk_area(radius: float) -> float:
     :param radius: The radius of the rotor disk in m
     :return: The rotor disk area in m^2
     """
-    return 2 * pi * radius**2
+    return 2 * np.pi * radius**2
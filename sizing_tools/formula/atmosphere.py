@@ -0,0 +1,85 @@
+from functools import lru_cache
+
+import numpy as np
+
+from utility.profiling import stage
+
+# Altitude range in m covered by the interpolation table, with a 1 m step
+TABLE_ALTITUDE_RANGE = (0., 6000.)
+
+
+@lru_cache(maxsize=256)
+def _state(altitude: float) -> tuple[float, float, float, float]:
+    # aerosandbox imports matplotlib and pandas, so it is only imported when the atmosphere is first needed
+    from aerosandbox import Atmosphere
+
+    atmosphere = Atmosphere(altitude=altitude)
+    return (float(atmosphere.density()), float(atmosphere.pressure()),
+            float(atmosphere.temperature()),
+            float(atmosphere.speed_of_sound()))
+
+
+@lru_cache(maxsize=1)
+def _table() -> tuple[np.ndarray, np.ndarray]:
+    from aerosandbox import Atmosphere
+
+    altitudes = np.arange(TABLE_ALTITUDE_RANGE[0],
+                          TABLE_ALTITUDE_RANGE[1] + 1.)
+    atmosphere = Atmosphere(altitude=altitudes)
+    return altitudes, np.stack([
+        atmosphere.density(),
+        atmosphere.pressure(),
+        atmosphere.temperature(),
+        atmosphere.speed_of_sound(),
+    ])
+
+
+@stage('atmosphere.lookup')
+def _lookup(altitude: float | np.ndarray, column: int) -> float | np.ndarray:
+    if np.ndim(altitude) == 0:
+        return _state(float(altitude))[column]
+    altitude = np.asarray(altitude, dtype=float)
+    altitudes, table = _table()
+    in_table = (altitude >= altitudes[0]) & (altitude <= altitudes[-1])
+    if in_table.all():
+        return np.interp(altitude, altitudes, table[column])
+    values = np.empty_like(altitude)
+    values[in_table] = np.interp(altitude[in_table], altitudes, table[column])
+    values[~in_table] = [_state(float(h))[column] for h in altitude[~in_table]]
+    return values
+
+
+def density(altitude: float | np.ndarray = 0.) -> float | np.ndarray:
+    """
+    ISA air density, cached for scalar altitudes and interpolated from a table for arrays.
+    :param altitude: Geopotential altitude in m
+    :return: Density in kg/m^3
+    """
+    return _lookup(altitude, 0)
+
+
+def pressure(altitude: float | np.ndarray = 0.) -> float | np.ndarray:
+    """
+    ISA air pressure, cached for scalar altitudes and interpolated from a table for arrays.
+    :param altitude: Geopotential altitude in m
+    :return: Pressure in Pa
+    """
+    return _lookup(altitude, 1)
+
+
+def temperature(altitude: float | np.ndarray = 0.) -> float | np.ndarray:
+    """
+    ISA air temperature, cached for scalar altitudes and interpolated from a table for arrays.
+    :param altitude: Geopotential altitude in m
+    :return: Temperature in K
+    """
+    return _lookup(altitude, 2)
+
+
+def speed_of_sound(altitude: float | np.ndarray = 0.) -> float | np.ndarray:
+    """
+    ISA speed of sound, cached for scalar altitudes and interpolated from a table for arrays.
+    :param altitude: Geopotential altitude in m
+    :return: Speed of sound in m/s
+    """
+    return _lookup(altitude, 3)
@@ -0,0 +1,101 @@
+"""
+Constraints of the W/P-W/S (constraint) diagram.
+
+All functions broadcast over numpy arrays, so a wing loading grid of shape (m,) combined with aircraft parameters of
+shape (n, 1) gives the constraint of n aircraft over the grid as an (n, m) array.
+"""
+import numpy as np
+
+from sizing_tools.formula.aero import C_D_from_CL, C_L_climb_opt
+
+
+def stall_wing_loading(v_stall: float, rho: float, C_L_max: float) -> float:
+    """
+    Calculate the maximum wing loading at which the aircraft can fly at the stall speed.
+
+    :param v_stall: The stall speed in m/s
+    :param rho: The air density in kg/m^3
+    :param C_L_max: The maximum lift coefficient
+    :return: The maximum wing loading in N/m^2
+    """
+    return 0.5 * v_stall**2 * rho * C_L_max
+
+
+def cruise_power_loading(wing_loading: float,
+                         cruise_velocity: float,
+                         C_D0: float,
+                         aspect_ratio: float,
+                         e: float,
+                         propulsion_efficiency: float,
+                         rho: float,
+                         rho_0: float,
+                         power_setting: float = 1,
+                         mtow_setting: float = 1) -> float:
+    """
+    Calculate the maximum power loading to cruise at the cruise velocity.
+
+    :param wing_loading: The wing loading in N/m^2
+    :param cruise_velocity: The cruise velocity in m/s
+    :param C_D0: The zero-lift drag coefficient
+    :param aspect_ratio: The aspect ratio of the wing
+    :param e: The Oswald efficiency factor
+    :param propulsion_efficiency: The propulsion efficiency
+    :param rho: The air density at cruise altitude in kg/m^3
+    :param rho_0: The air density at sea level in kg/m^3
+    :param power_setting: The fraction of the maximum power used in cruise
+    :param mtow_setting: The fraction of the MTOW in cruise
+    :return: The maximum power loading in N/W
+    """
+    wing_loading = mtow_setting * wing_loading
+    return power_setting * propulsion_efficiency * (rho / rho_0)**(3 / 4) * (
+        C_D0 * 0.5 * rho * cruise_velocity**3 / wing_loading + wing_loading /
+        (np.pi * aspect_ratio * e * 0.5 * rho * cruise_velocity))**(-1)
+
+
+def vertical_climb_power_loading(wing_loading: float,
+                                 takeoff_load_factor: float,
+                                 vertical_speed: float, fuselage_area: float,
+                                 wing_area: float, figure_of_merit: float,
+                                 propulsion_efficiency: float,
+                                 disk_loading: float, rho: float) -> float:
+    """
+    Calculate the maximum power loading to climb vertically, including the download on the wing and fuselage.
+
+    :param wing_loading: The wing loading in N/m^2
+    :param takeoff_load_factor: The load factor at takeoff
+    :param vertical_speed: The vertical climb speed in m/s
+    :param fuselage_area: The projected area of the fuselage in m^2
+    :param wing_area: The wing area in m^2
+    :param figure_of_merit: The figure of merit of the rotors
+    :param propulsion_efficiency: The propulsion efficiency
+    :param disk_loading: The disk loading of the rotors in N/m^2
+    :param rho: The air density in kg/m^3
+    :return: The maximum power loading in N/W
+    """
+    T_over_W = takeoff_load_factor * (
+        1 + 1 / wing_loading * rho * vertical_speed**2 *
+        (fuselage_area + wing_area) / wing_area)
+    return 1 / (T_over_W * (1 / (figure_of_merit * propulsion_efficiency)) *
+                np.sqrt(disk_loading / (2 * rho)))
+
+
+def climb_power_loading(wing_loading: float, rate_of_climb: float, C_D0: float,
+                        aspect_ratio: float, e: float,
+                        propulsion_efficiency: float, rho: float) -> float:
+    """
+    Calculate the maximum power loading to climb at the rate of climb in wing-borne flight, at the optimal climb lift
+    coefficient.
+
+    :param wing_loading: The wing loading in N/m^2
+    :param rate_of_climb: The rate of climb in m/s
+    :param C_D0: The zero-lift drag coefficient
+    :param aspect_ratio: The aspect ratio of the wing
+    :param e: The Oswald efficiency factor
+    :param propulsion_efficiency: The propulsion efficiency
+    :param rho: The air density in kg/m^3
+    :return: The maximum power loading in N/W
+    """
+    C_L = C_L_climb_opt(C_D0, aspect_ratio, e)
+    C_D = C_D_from_CL(C_L, C_D0, aspect_ratio, e)
+    return propulsion_efficiency * (rate_of_climb + C_D / C_L**(3 / 2) *
+                                    np.sqrt(2 * wing_loading / rho))**-1
@@ -1,3 +1,17 @@
+import numpy as np
+
+from utility.unit_conversion import convert_float
+
+# Exponent of the total mass in each of the airframe mass laws below, so d(mass)/d(total_mass) = k * mass / total_mass
+TOTAL_MASS_EXPONENTS = {
+    'fuselage': 0.144,
+    'wing': 0.397,
+    'horizontal_tail': 0.887,
+    'vertical_tail': 0.567,
+    'landing_gear': 0.684,
+}
+
+
 def engine_mass(total_power: float, power_margin: float,
                 number_of_engines: float) -> float:
     """
@@ -8,3 +22,97 @@ def engine_mass(total_power: float, power_margin: float,
     :return: Mass of a single engine in kg
     """
     return 0.165 * total_power * (1 + power_margin) / number_of_engines
+
+
+def propeller_mass(propeller_radius: float, total_power: float,
+                   number_of_engines: float,
+                   propeller_blade_number: float) -> float:
+    """
+    Calculate the mass of a single propeller
+    :param propeller_radius: Radius of the propeller in m
+    :param total_power: Max power of all engines combined in kW
+    :param number_of_engines: Number of engines
+    :param propeller_blade_number: Number of blades per propeller
+    :return: Mass of a single propeller in kg
+    """
+    return 0.144 * (2 * propeller_radius * (total_power / number_of_engines) *
+                    propeller_blade_number**0.5)**0.782
+
+
+def fuselage_mass(total_mass: float, length: float,
+                  maximum_section_perimeter: float, n_pax: float) -> float:
+    """
+    Calculate the mass of the fuselage
+    :param total_mass: Total mass of the aircraft in kg
+    :param length: Length of the fuselage in m
+    :param maximum_section_perimeter: Maximum perimeter of the fuselage cross-section in m
+    :param n_pax: Number of passengers
+    :return: Mass of the fuselage in kg
+    """
+    return convert_float(
+        14.86 * convert_float(total_mass, 'kg', 'lbs')**0.144 *
+        (length / maximum_section_perimeter)**0.778 *
+        convert_float(length, 'm', 'ft')**0.383 * n_pax**0.455, 'lbs', 'kg')
+
+
+def wing_mass(total_mass: float, wing_area: float, design_load_factor: float,
+              aspect_ratio: float) -> float:
+    """
+    Calculate the mass of the wing
+    :param total_mass: Total mass of the aircraft in kg
+    :param wing_area: Wing area in m^2
+    :param design_load_factor: Design load factor
+    :param aspect_ratio: Aspect ratio of the wing
+    :return: Mass of the wing in kg
+    """
+    return convert_float(
+        0.04674 * convert_float(total_mass, 'kg', 'lbs')**0.397 *
+        convert_float(wing_area, 'm^2', 'ft^2')**0.360 *
+        design_load_factor**0.397 * aspect_ratio**1.712, 'lbs', 'kg')
+
+
+def horizontal_tail_mass(total_mass: float, S_th: float, AR_th: float,
+                         t_rh: float) -> float:
+    """
+    Calculate the mass of the horizontal tail
+    :param total_mass: Total mass of the aircraft in kg
+    :param S_th: Horizontal tail area in m^2
+    :param AR_th: Horizontal tail aspect ratio
+    :param t_rh: Horizontal tail root thickness in m
+    :return: Mass of the horizontal tail in kg
+    """
+    return convert_float(
+        (3.184 * convert_float(total_mass, 'kg', 'lbs')**0.887 *
+         convert_float(S_th, 'm^2', 'ft^2')**0.101 * AR_th**0.138) /
+        (174.04 * convert_float(t_rh, 'm', 'ft')**0.223), 'lbs', 'kg')
+
+
+def vertical_tail_mass(total_mass: float, S_tv: float, AR_tv: float,
+                       t_rv: float, lambda_quart_tv: float) -> float:
+    """
+    Calculate the mass of the vertical tail
+    :param total_mass: Total mass of the aircraft in kg
+    :param S_tv: Vertical tail area in m^2
+    :param AR_tv: Vertical tail aspect ratio
+    :param t_rv: Vertical tail root thickness in m
+    :param lambda_quart_tv: Quarter chord sweep of the vertical tail in rad
+    :return: Mass of the vertical tail in kg
+    """
+    return convert_float(
+        (1.68 * convert_float(total_mass, 'kg', 'lbs')**0.567 *
+         convert_float(S_tv, 'm^2', 'ft^2')**1.249 * AR_tv**0.482) /
+        (639.95 * convert_float(t_rv, 'm', 'ft')**0.747 *
+         np.cos(lambda_quart_tv)**0.882), 'lbs', 'kg')
+
+
+def landing_gear_mass(total_mass: float, l_lg: float, eta_lg: float) -> float:
+    """
+    Calculate the mass of the landing gear
+    :param total_mass: Total mass of the aircraft in kg
+    :param l_lg: Length of the landing gear in m
+    :param eta_lg: Landing gear load factor
+    :return: Mass of the landing gear in kg
+    """
+    return convert_float(
+        0.054 * convert_float(l_lg, 'm', 'ft')**0.501 *
+        (convert_float(total_mass, 'kg', 'lbs') * eta_lg)**0.684, 'lbs', 'kg')
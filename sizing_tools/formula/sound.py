@@ -1,5 +1,4 @@
-from math import log10, pi
-
+import numpy as np
 from scipy.constants import speed_of_sound
 
 
@@ -17,9 +16,9 @@ def SPL_1_max(engine_power: float,
     :param propeller_number: Number of propellers (default 1)
     :return: Sound pressure level in dB
     """
-    return (+83.4 + 15.3 * log10(engine_power) - 20.0 * log10(prop_diameter) +
-            38.5 * tip_mach_number - 3 * (propeller_blade_number - 2) +
-            10 * log10(propeller_number))
+    return (+83.4 + 15.3 * np.log10(engine_power) -
+            20.0 * np.log10(prop_diameter) + 38.5 * tip_mach_number - 3 *
+            (propeller_blade_number - 2) + 10 * np.log10(propeller_number))
 
 
 def tip_mach_number(prop_diameter: float, prop_rpm: float) -> float:
@@ -29,4 +28,4 @@ def tip_mach_number(prop_diameter: float, prop_rpm: float) -> float:
     :param prop_rpm: RPM of the propeller
     :return: Tip Mach number
     """
-    return pi * prop_diameter * prop_rpm / 60 / speed_of_sound
+    return np.pi * prop_diameter * prop_rpm / 60 / speed_of_sound
@@ -0,0 +1,354 @@
+"""
+Global sensitivity analysis of the sizing outputs to the design inputs.
+
+Inputs are sampled within bounds by their Aircraft attribute path (see DesignBatch.set_path), evaluated in vectorized
+chunks over a process pool by sweep.evaluate_batch, and all outputs are computed from the same samples. With a store
+directory every evaluated chunk is written to disk, so an interrupted analysis resumes where it stopped.
+
+    analysis = SensitivityAnalysis(concept_C2_1, relative_bounds(concept_C2_1, ['battery_energy_density', ...]))
+    indices = analysis.sobol(n=2**14, store=save_path / 'sobol_C2_1')
+    indices.total_order['total_mass']
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+from scipy.stats import qmc
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.cache import canonical_hash
+from sizing_tools.mass_model.classII.batch import DesignBatch
+from sizing_tools.sweep import SweepStore, evaluate_samples, map_chunks
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OUTPUTS = ('total_mass', 'energy', 'takeoff_power', 'hinge_moment')
+# Inputs of the default analysis, all of which the sizing outputs depend on
+DEFAULT_PARAMETERS = (
+    'battery_energy_density',
+    'battery_system_efficiency',
+    'figure_of_merit',
+    'estimated_CD0',
+    'propulsion_efficiency',
+    'propeller_radius',
+    'wing.oswald_efficiency_factor',
+    'tail.S_th',
+    'tail.S_tv',
+    'fuselage.length',
+    'fuselage.maximum_section_perimeter',
+)
+
+
+def relative_bounds(
+    aircraft: Aircraft,
+    parameters: Sequence[str] = DEFAULT_PARAMETERS,
+    spread: float = 0.1,
+) -> dict[str, tuple[float, float]]:
+    """
+    Bounds of +-spread around the values of an aircraft. Efficiencies and factors that cannot exceed 1 are capped.
+    :param aircraft: Aircraft with the nominal values
+    :param parameters: Aircraft attribute paths
+    :param spread: Relative half width of the bounds
+    :return: Lower and upper bound per path
+    """
+    point = DesignPoint.from_aircraft(aircraft)
+    return {
+        path: (point[path] * (1 - spread),
+               capped_upper_bound(path, point[path] * (1 + spread)))
+        for path in parameters
+    }
+
+
+def capped_upper_bound(path: str, upper: float) -> float:
+    """
+    :param path: Aircraft attribute path
+    :param upper: Upper bound of the values of the path
+    :return: The upper bound, capped at 1 for efficiencies and factors that cannot exceed it
+    """
+    if 'efficiency' in path or path == 'figure_of_merit':
+        return min(upper, 1.)
+    return upper
+
+
+@dataclass(frozen=True)
+class SobolIndices:
+    parameters: tuple[str, ...]
+    # per output, one index per parameter
+    first_order: dict[str, np.ndarray]
+    total_order: dict[str, np.ndarray]
+    # half width of the 95% bootstrap confidence interval
+    first_order_confidence: dict[str, np.ndarray]
+    total_order_confidence: dict[str, np.ndarray]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.concat(
+            {
+                output:
+                pd.DataFrame(
+                    {
+                        'S1': self.first_order[output],
+                        'S1_conf': self.first_order_confidence[output],
+                        'ST': self.total_order[output],
+                        'ST_conf': self.total_order_confidence[output],
+                    },
+                    index=list(self.parameters))
+                for output in self.first_order
+            },
+            names=['output', 'parameter'])
+
+
+@dataclass(frozen=True)
+class MorrisIndices:
+    parameters: tuple[str, ...]
+    # per output, one value per parameter; elementary effects are taken over the bounds scaled to [0, 1]
+    mu: dict[str, np.ndarray]
+    mu_star: dict[str, np.ndarray]
+    sigma: dict[str, np.ndarray]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.concat(
+            {
+                output:
+                pd.DataFrame(
+                    {
+                        'mu': self.mu[output],
+                        'mu_star': self.mu_star[output],
+                        'sigma': self.sigma[output],
+                    },
+                    index=list(self.parameters))
+                for output in self.mu
+            },
+            names=['output', 'parameter'])
+
+
+class SensitivityAnalysis:
+    """
+    Sobol and Morris sensitivity indices of the Class II sizing outputs of an aircraft.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 bounds: dict[str, tuple[float, float]],
+                 outputs: Sequence[str] = OUTPUTS,
+                 chunk_size: int = 4096):
+        """
+        :param aircraft: Aircraft with the values of all inputs that are not sampled
+        :param bounds: Lower and upper bound per sampled Aircraft attribute path
+        :param outputs: Columns of sweep.evaluate_batch to compute the indices of
+        :param chunk_size: Number of samples per evaluated (and stored) chunk
+        """
+        self.base = DesignBatch.from_aircraft(aircraft)
+        self.parameters = tuple(bounds)
+        self.lower, self.upper = np.array(
+            [bounds[path] for path in self.parameters]).T
+        self.outputs = tuple(outputs)
+        self.chunk_size = chunk_size
+
+    def _scale(self, unit: np.ndarray) -> np.ndarray:
+        return self.lower + unit * (self.upper - self.lower)
+
+    def sobol_samples(self, n: int, seed: int = 0) -> np.ndarray:
+        """
+        Saltelli's scheme on a scrambled Sobol sequence: base matrices A and B, followed by A with column i taken
+        from B for every parameter i.
+        :param n: Number of base samples, preferably a power of 2
+        :param seed: Seed of the scrambling
+        :return: Samples of shape (n * (k + 2), k) for k parameters
+        """
+        k = len(self.parameters)
+        unit = qmc.Sobol(d=2 * k, scramble=True, seed=seed).random(n)
+        A, B = unit[:, :k], unit[:, k:]
+        AB = np.repeat(A[None], k, axis=0)
+        AB[np.arange(k), :, np.arange(k)] = B.T
+        return self._scale(np.concatenate([A, B, *AB]))
+
+    def morris_samples(self,
+                       trajectories: int,
+                       levels: int = 4,
+                       seed: int = 0) -> np.ndarray:
+        """
+        One-at-a-time trajectories on a grid of levels, each changing every parameter once by a step of
+        levels / (2 (levels - 1)) of its range, in a random order and direction.
+        :param trajectories: Number of trajectories
+        :param levels: Number of grid levels per parameter, even
+        :param seed: Seed of the random trajectories
+        :return: Samples of shape (trajectories * (k + 1), k) for k parameters
+        """
+        k = len(self.parameters)
+        rng = np.random.default_rng(seed)
+        delta = levels / (2 * (levels - 1))
+        # start levels from which a step of delta stays within [0, 1]
+        start = rng.integers(0, levels // 2,
+                             size=(trajectories, k)) / (levels - 1)
+        direction = rng.choice([-1., 1.], size=(trajectories, k))
+        start = np.where(direction < 0, start + delta, start)
+        order = np.argsort(rng.random((trajectories, k)), axis=1)
+        rows = np.arange(trajectories)
+        steps = np.zeros((trajectories, k + 1, k))
+        for i in range(k):
+            steps[rows, i + 1, order[:,
+                                     i]] = direction[rows, order[:, i]] * delta
+        unit = start[:, None, :] + np.cumsum(steps, axis=1)
+        return self._scale(unit.reshape(-1, k))
+
+    def _signature(self, method: str, samples: np.ndarray) -> str:
+        return canonical_hash('sensitivity', method, self.base,
+                              list(self.parameters), self.lower, self.upper,
+                              list(self.outputs), self.chunk_size, samples)
+
+    def evaluate(self,
+                 samples: np.ndarray,
+                 store: SweepStore | Path | str = None,
+                 max_workers: int = None,
+                 signature: str = None) -> dict[str, np.ndarray]:
+        """
+        Evaluate the outputs at all samples, skipping the chunks that are already in the store.
+        :param samples: Samples of shape (n, k)
+        :param store: Store or directory to stream the chunks to, in memory if None
+        :param max_workers: Number of worker processes, evaluated in this process if 1
+        :param signature: Identifies the samples, a store holding other samples is not resumed
+        :return: Columns of the outputs (and 'converged') with one row per sample
+        """
+        store = store if isinstance(store, SweepStore) else SweepStore(
+            store, resume=True)
+        signature = signature or canonical_hash('sensitivity', samples)
+        if store.path is not None:
+            problem = store.path / 'problem.json'
+            if not problem.exists() and len(store):
+                raise ValueError(
+                    f'{store.path} holds chunks that are not of an analysis')
+            if problem.exists() and json.loads(
+                    problem.read_text())['signature'] != signature:
+                raise ValueError(
+                    f'{store.path} holds the results of another analysis')
+            problem.write_text(
+                json.dumps({
+                    'signature': signature,
+                    'parameters': list(self.parameters),
+                    'outputs': list(self.outputs),
+                    'samples': len(samples),
+                }))
+        chunks = [
+            samples[start:start + self.chunk_size]
+            for start in range(0, len(samples), self.chunk_size)
+        ]
+        done = len(store)
+        missing = chunks[done:]
+        logger.info(
+            f'Evaluating {len(samples)} samples of {list(self.parameters)}, {done} of {len(chunks)} chunks done'
+        )
+        for columns in map_chunks(
+                partial(evaluate_samples, self.base, self.parameters,
+                        self.outputs), missing, max_workers):
+            store.append(columns)
+        results = store.load()
+        not_converged = int((~results['converged']).sum())
+        if not_converged:
+            logger.warning(
+                f'{not_converged} of {len(samples)} samples did not converge')
+        return results
+
+    def sobol(self,
+              n: int = 1024,
+              seed: int = 0,
+              store: SweepStore | Path | str = None,
+              max_workers: int = None,
+              bootstrap: int = 100) -> SobolIndices:
+        """
+        First and total order Sobol indices with the estimators of Saltelli (2010) and Jansen (1999).
+        :param n: Number of base samples, the model is evaluated n * (k + 2) times for k parameters
+        :param seed: Seed of the samples and of the bootstrap
+        :param store: Store or directory to stream the results to, see evaluate
+        :param max_workers: Number of worker processes
+        :param bootstrap: Number of bootstrap resamples of the confidence intervals
+        :return: SobolIndices of every output
+        """
+        samples = self.sobol_samples(n, seed)
+        results = self.evaluate(samples,
+                                store,
+                                max_workers,
+                                signature=self._signature('sobol', samples))
+        k = len(self.parameters)
+        rng = np.random.default_rng(seed)
+        resamples = rng.integers(0, n, size=(bootstrap, n))
+        indices = {
+            key: {}
+            for key in ('first', 'total', 'first_conf', 'total_conf')
+        }
+        for output in self.outputs:
+            y = results[output].reshape(k + 2, n)
+            first, total = self._sobol_estimates(y[0], y[1], y[2:])
+            first_boot, total_boot = self._sobol_estimates(
+                y[0][resamples], y[1][resamples], y[2:][:, resamples])
+            indices['first'][output] = first
+            indices['total'][output] = total
+            indices['first_conf'][output] = 1.96 * first_boot.std(axis=1)
+            indices['total_conf'][output] = 1.96 * total_boot.std(axis=1)
+        return SobolIndices(self.parameters, indices['first'],
+                            indices['total'], indices['first_conf'],
+                            indices['total_conf'])
+
+    @staticmethod
+    def _sobol_estimates(f_A: np.ndarray, f_B: np.ndarray,
+                         f_AB: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # the samples are on the last axis and f_AB has the parameters on the first, bootstrap resamples in between
+        f = np.concatenate([f_A, f_B], axis=-1)
+        # centred, as the estimator of the first order index is not invariant to an offset of the output, which
+        # inflates its variance by the squared mean over the variance of the output
+        mean = f.mean(axis=-1, keepdims=True)
+        f_A, f_B, f_AB = f_A - mean, f_B - mean, f_AB - mean
+        variance = np.var(f, axis=-1)
+        first = np.mean(f_B * (f_AB - f_A), axis=-1) / variance
+        total = 0.5 * np.mean((f_A - f_AB)**2, axis=-1) / variance
+        return first, total
+
+    def morris(self,
+               trajectories: int = 100,
+               levels: int = 4,
+               seed: int = 0,
+               store: SweepStore | Path | str = None,
+               max_workers: int = None) -> MorrisIndices:
+        """
+        Morris elementary effects screening, with the mu* of Campolongo et al. (2007).
+        :param trajectories: Number of trajectories, the model is evaluated trajectories * (k + 1) times
+        :param levels: Number of grid levels per parameter
+        :param seed: Seed of the trajectories
+        :param store: Store or directory to stream the results to, see evaluate
+        :param max_workers: Number of worker processes
+        :return: MorrisIndices of every output
+        """
+        k = len(self.parameters)
+        samples = self.morris_samples(trajectories, levels, seed)
+        results = self.evaluate(samples,
+                                store,
+                                max_workers,
+                                signature=self._signature('morris', samples))
+        unit = ((samples - self.lower) / (self.upper - self.lower)).reshape(
+            trajectories, k + 1, k)
+        step = np.diff(unit, axis=1)
+        # the parameter that changes in every step of every trajectory
+        changed = np.argmax(np.abs(step), axis=2)
+        rows = np.arange(trajectories)[:, None]
+        mu, mu_star, sigma = {}, {}, {}
+        for output in self.outputs:
+            y = results[output].reshape(trajectories, k + 1)
+            effects = np.empty((trajectories, k))
+            effects[rows,
+                    changed] = np.diff(y, axis=1) / step[rows,
+                                                         np.arange(k), changed]
+            mu[output] = effects.mean(axis=0)
+            mu_star[output] = np.abs(effects).mean(axis=0)
+            sigma[output] = effects.std(axis=0, ddof=1)
+        return MorrisIndices(self.parameters, mu, mu_star, sigma)
@@ -1,17 +1,40 @@
+from dataclasses import dataclass
+
 import numpy as np
 from scipy.constants import g
 
 from data.concept_parameters.aircraft import Aircraft
 from data.concept_parameters.concepts import concept_C2_1, concept_C2_6, concept_C2_10
+from sizing_tools.mass_model.classII.batch import DesignBatch
 from sizing_tools.mass_model.iteration import Iteration
 from sizing_tools.model import Model
 from utility.log import logger
 
 
+@dataclass(frozen=True)
+class HingeLoadCase:
+    """Configuration specific load cases at the wing hinge"""
+    # the hinge carries the load of two engines, relieved by half the wing, propulsion and battery weight
+    paired_engine_load: bool = False
+    # the hinge moment is at least the engine load
+    engine_load_moment: bool = False
+    # both wing halves load a single hinge, which carries twice the shear and no moment
+    single_hinge: bool = False
+
+
+# Load cases per concept id, concepts that are not listed use the default HingeLoadCase
+HINGE_LOAD_CASES = {
+    concept_C2_1.id: HingeLoadCase(paired_engine_load=True),
+    concept_C2_6.id: HingeLoadCase(engine_load_moment=True),
+    concept_C2_10.id: HingeLoadCase(single_hinge=True),
+}
+
+
 class HingeLoadingModel(Model):
 
     def __init__(self, aircraft: Aircraft):
         super().__init__(aircraft)
+        self.load_case = HINGE_LOAD_CASES.get(aircraft.id, HingeLoadCase())
 
     @property
     def necessary_parameters(self) -> list[str]:
@@ -92,7 +115,7 @@ class HingeLoadingModel(Model):
     def engine_load(
             self) -> float:  # no idea why this is different from W_engine
         V_hinge = self.aircraft.total_mass * g * self.aircraft.design_load_factor / self.aircraft.motor_prop_count
-        if self.aircraft == concept_C2_1:
+        if self.load_case.paired_engine_load:
             V_hinge = V_hinge * 2 - (
                 self.aircraft.mass_breakdown.airframe.wing.mass +
                 self.aircraft.mass_breakdown.propulsion.mass +
@@ -116,18 +139,206 @@ class HingeLoadingModel(Model):
 
         :return: Shear [N] and Moment [Nm] at hinge
         """
-        shear = max(self.get_load()[0], self.engine_load())
-        moment = self.get_load()[1]
-        if self.aircraft == concept_C2_6:
-            moment = max(moment, self.engine_load())
-        if self.aircraft == concept_C2_10:
-            shear = self.get_load()[0] * 2
-            moment = 0
+        shear, moment = self.get_load()
+        engine_load = self.engine_load()
+        if self.load_case.single_hinge:
+            shear, moment = shear * 2, 0
+        else:
+            shear = max(shear, engine_load)
+            if self.load_case.engine_load_moment:
+                moment = max(moment, engine_load)
         self.aircraft.hinge_load = shear
         self.aircraft.hinge_moment = moment
         return shear, moment
 
 
+class BatchHingeLoadingModel:
+    """
+    Vectorized version of HingeLoadingModel for all design points of a DesignBatch.
+
+    Spanwise locations are given either per design point, with shape (n,), or as a grid per design point, with shape
+    (n, n_eta), so whole-span distributions of all design points are evaluated in one pass.
+    """
+
+    def __init__(self, batch: DesignBatch,
+                 mass_breakdown: dict[str,
+                                      np.ndarray | dict[str, np.ndarray]]):
+        """
+        :param batch: Design points
+        :param mass_breakdown: Mass breakdown as returned by BatchClassIIModel.mass_breakdown
+        """
+        self.batch = batch
+        self.total_mass = mass_breakdown['total']
+        self.airframe_mass = mass_breakdown['airframe']['total']
+        self.wing_mass = mass_breakdown['airframe']['wing']
+        self.propulsion_mass = mass_breakdown['propulsion']['total']
+        self.battery_mass = mass_breakdown['battery']['total']
+        self.load_cases = {
+            name:
+            np.isin(batch.id, [
+                concept_id
+                for concept_id, load_case in HINGE_LOAD_CASES.items()
+                if getattr(load_case, name)
+            ])
+            for name in HingeLoadCase.__dataclass_fields__
+        }
+
+    @staticmethod
+    def _per_design(value: np.ndarray, eta: np.ndarray) -> np.ndarray:
+        return value[:, None] if np.ndim(eta) == 2 else value
+
+    def L(self, eta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+
+        :param eta: Spanwise location per design point, shape (n,) or (n, n_eta)
+        :return: [N] [Nm]
+        """
+        b = self.batch
+        taper = self._per_design(b.taper, eta)
+        half_span = self._per_design(b.wing_span / 2, eta)
+        mass_without_wing = self.total_mass - self.airframe_mass - \
+            self.propulsion_mass / b.motor_prop_count * (b.motor_prop_count - b.motor_wing_count)
+        distributed_load = self._per_design(
+            b.design_load_factor * mass_without_wing * g / b.wing_span * 2 /
+            (1 + b.taper), eta)
+        V = distributed_load * half_span * (1 - eta + (taper - 1) * 0.5 *
+                                            (1 - eta**2))
+        M = distributed_load * half_span**2 * (1 - eta - 0.5 * (1 - eta**2) +
+                                               (taper - 1) * 0.5 *
+                                               (1 - eta - 1 / 3 *
+                                                (1 - eta**3)))
+        return V, M
+
+    def W_engine(self, eta: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+
+        :param eta: Spanwise location per design point, shape (n,) or (n, n_eta)
+        :return: [N] [Nm]
+        """
+        engine_weight = self._per_design(
+            self.propulsion_mass / self.batch.motor_prop_count * g, eta)
+        l_1 = 0.3
+        l_2 = 0.8
+        inboard = l_1 > eta
+        outboard = np.logical_and(l_2 > eta, eta >= l_1)
+        count = self._per_design(self.batch.motor_wing_count, eta)
+        V = np.select([count == 4, count == 2, count == 0], [
+            -2 * engine_weight * inboard - engine_weight * outboard,
+            -engine_weight * inboard, 0
+        ], np.nan)
+        M = np.select([count == 4, count == 2, count == 0], [
+            -((l_1 - eta) +
+              (l_2 - eta)) * engine_weight * inboard - engine_weight *
+            (l_2 - eta) * outboard, -(l_1 - eta) * engine_weight * inboard, 0
+        ], np.nan)
+        unsupported = np.isnan(V) & ~np.isnan(count)
+        if unsupported.any():
+            logger.error(
+                f"Unsupported number of engines on wing: {np.unique(np.broadcast_to(count, V.shape)[unsupported])}"
+            )
+        return V, M
+
+    def engine_load(self) -> np.ndarray:
+        b = self.batch
+        V_hinge = self.total_mass * g * b.design_load_factor / b.motor_prop_count
+        return np.where(
+            self.load_cases['paired_engine_load'], V_hinge * 2 -
+            (self.wing_mass + self.propulsion_mass + self.battery_mass) * g /
+            2, V_hinge)
+
+    def get_load(self,
+                 eta: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+
+        :param eta: Spanwise location per design point, shape (n,) or (n, n_eta), the hinge location if None
+        :return: [N] [Nm]
+        """
+        eta = eta if eta is not None else self.batch.hinge_location
+        L = self.L(eta)
+        engine = self.W_engine(eta)
+        return L[0] + engine[0], L[1] + engine[1]
+
+    def hinge_loads(self,
+                    eta: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Shear and moment a hinge at eta has to carry, with the load cases of HINGE_LOAD_CASES applied.
+        :param eta: Spanwise location per design point, shape (n,) or (n, n_eta), the hinge location if None
+        :return: Shear [N] and Moment [Nm]
+        """
+        eta = eta if eta is not None else self.batch.hinge_location
+        shear, moment = self.get_load(eta)
+        engine_load = self._per_design(self.engine_load(), eta)
+        shear_out = np.maximum(shear, engine_load)
+        moment_out = np.where(
+            self._per_design(self.load_cases['engine_load_moment'], eta),
+            np.maximum(moment, engine_load), moment)
+        single_hinge = self._per_design(self.load_cases['single_hinge'], eta)
+        return np.where(single_hinge, shear * 2,
+                        shear_out), np.where(single_hinge, 0., moment_out)
+
+    def shear_and_moment_at_hinge(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+
+        :return: Shear [N] and Moment [Nm] at hinge per design point
+        """
+        return self.hinge_loads()
+
+    def distribution(
+            self,
+            eta: np.ndarray = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hinge loads over the span of all design points.
+        :param eta: Spanwise locations shared by all design points, 101 points from root to tip if None
+        :return: eta (n_eta,), shear [N] and moment [Nm] with shape (n, n_eta)
+        """
+        eta = np.linspace(0, 1, 101) if eta is None else np.asarray(eta)
+        shear, moment = self.hinge_loads(
+            np.broadcast_to(eta, (len(self.batch), len(eta))))
+        return eta, shear, moment
+
+    def optimal_hinge_location(
+        self,
+        eta: np.ndarray = None,
+        max_folded_span: float | np.ndarray = None,
+        shear_arm: float = 0.,
+        span_weight: float | np.ndarray = 0.
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hinge location that trades the hinge load off against the folded span per design point, searched over a
+        spanwise grid.
+
+        The cost is |moment| + shear_arm * |shear| + span_weight * folded span, where the folded span is the span of
+        the inner wing, eta * wing span. The hinge loads fall towards the tip, so the folded span has to be weighted or
+        bounded by max_folded_span, e.g. for a parking footprint. Ties go to the innermost location.
+        :param eta: Candidate spanwise locations, 101 points from root to tip if None
+        :param max_folded_span: Maximum span in m of the inner wing, per design point or for all
+        :param shear_arm: Weight of the shear in m, to trade it off against the moment
+        :param span_weight: Weight of the folded span in N, the hinge moment in Nm worth a metre of folded span, per
+        design point or for all
+        :return: Optimal location, and the shear [N] and moment [Nm] there, per design point; NaN if no location is
+        allowed
+        """
+        if max_folded_span is None and not np.any(span_weight):
+            raise ValueError(
+                'The hinge loads are lowest at the tip, give a span_weight or a max_folded_span'
+            )
+        eta, shear, moment = self.distribution(eta)
+        folded_span = eta * self.batch.wing_span[:, None]
+        cost = np.abs(moment) + shear_arm * np.abs(shear) + np.reshape(
+            span_weight, (-1, 1)) * folded_span
+        if max_folded_span is not None:
+            allowed = folded_span <= np.reshape(max_folded_span, (-1, 1))
+            cost = np.where(allowed, cost, np.inf)
+        index = np.argmin(cost, axis=1)
+        rows = np.arange(len(self.batch))
+        feasible = np.isfinite(cost[rows, index])
+        return (np.where(feasible, eta[index],
+                         np.nan), np.where(feasible, shear[rows, index],
+                                           np.nan),
+                np.where(feasible, moment[rows, index], np.nan))
+
+
 if __name__ == '__main__':
     from data.concept_parameters.concepts import all_concepts
 
@@ -1,5 +1,8 @@
+from __future__ import annotations
+
 import os
 import sys
+from typing import TYPE_CHECKING
 
 from scipy.constants import g
 
@@ -11,17 +14,20 @@ parent_dir = os.path.dirname(parent_dir)
 sys.path.append(parent_dir)
 
 from sizing_tools.model import Model
-from sizing_tools.formula.aero import C_D_from_CL, C_L_climb_opt
+from sizing_tools.formula.constraint import climb_power_loading, cruise_power_loading, stall_wing_loading, \
+    vertical_climb_power_loading
+from sizing_tools.mass_model.constraint_diagram import C_L_MAX, DEFAULT_WING_LOADING, ConstraintDiagram, \
+    ConstraintInputs, constraint_diagram
 
-import matplotlib.pyplot as plt
 import numpy as np
-from aerosandbox import Atmosphere
+from sizing_tools.formula.atmosphere import density
 from data.concept_parameters.mission_profile import Phase
-from utility.plotting import show, save
 from data.concept_parameters.aircraft import Aircraft
 from utility.log import logger
+from utility.profiling import stage
 
-C_L_MAX = 1.1
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 
 class ClassIModel(Model):
@@ -31,10 +37,8 @@ class ClassIModel(Model):
                  power_setting: float = 0.75,
                  mtow_setting: float = 1):
         super().__init__(aircraft)
-        self.atmosphere = Atmosphere(
-            altitude=self.aircraft.cruise_altitude if self.aircraft.
-            cruise_altitude is not None else 0)
-        self.rho = self.atmosphere.density()
+        self.rho = density(self.aircraft.cruise_altitude if self.aircraft.
+                           cruise_altitude is not None else 0)
         self.power_setting = power_setting
         self.mtow_setting = mtow_setting
 
@@ -52,46 +56,47 @@ class ClassIModel(Model):
         ]
 
     def _wp(self, ws: np.ndarray) -> np.ndarray:
-        ws = self.mtow_setting * ws
-        wp = self.power_setting * self.aircraft.propulsion_efficiency * (
-            self.rho / Atmosphere().density())**(
-                3 / 4) * (self.aircraft.estimated_CD0 * 0.5 * self.rho *
-                          self.aircraft.cruise_velocity**3 / ws + ws /
-                          (np.pi * self.aircraft.wing.aspect_ratio *
-                           self.aircraft.wing.oswald_efficiency_factor * 0.5 *
-                           self.rho * self.aircraft.cruise_velocity))**(-1)
-        return wp
+        return cruise_power_loading(
+            ws,
+            self.aircraft.cruise_velocity,
+            self.aircraft.estimated_CD0,
+            self.aircraft.wing.aspect_ratio,
+            self.aircraft.wing.oswald_efficiency_factor,
+            self.aircraft.propulsion_efficiency,
+            self.rho,
+            density(),
+            power_setting=self.power_setting,
+            mtow_setting=self.mtow_setting)
 
     def w_s_stall_speed(self):
-        w_s_min = 0.5 * self.aircraft.v_stall**2 * self.rho * C_L_MAX
+        w_s_min = stall_wing_loading(self.aircraft.v_stall, self.rho, C_L_MAX)
         self.aircraft.wing.area = self.aircraft.total_mass * g / w_s_min
         return w_s_min
 
     def ver_climb(self, ws):
-        T_over_W = self.aircraft.takeoff_load_factor * (
-            1 + 1 / ws * self.rho * self.aircraft.mission_profile.phases[
-                Phase.CLIMB].vertical_speed**2 *
-            (self.aircraft.s_fus + self.aircraft.wing.area) /
-            self.aircraft.wing.area)
-        W_over_p = 1 / (T_over_W * (1 /
-                                    (self.aircraft.figure_of_merit *
-                                     self.aircraft.propulsion_efficiency)) *
-                        np.sqrt(self.aircraft.TA / (2 * self.rho)))
-        return W_over_p
-
-    def steady_climb(self):
-        c_l_opt = C_L_climb_opt(self.aircraft.estimated_CD0,
-                                self.aircraft.wing.aspect_ratio,
-                                self.aircraft.wing.oswald_efficiency_factor)
-        c_d = C_D_from_CL(c_l_opt, self.aircraft.estimated_CD0,
-                          self.aircraft.wing.aspect_ratio,
-                          self.aircraft.wing.oswald_efficiency_factor)
-        cd_cl_three_over_2 = c_d / c_l_opt**(3 / 2)
-        W_P = self.aircraft.propulsion_efficiency * (
-            self.aircraft.rate_of_climb + cd_cl_three_over_2 *
-            np.sqrt(2 * np.arange(1, 2000) / self.rho))**-1
-        return W_P
-
+        return vertical_climb_power_loading(
+            ws, self.aircraft.takeoff_load_factor,
+            self.aircraft.mission_profile.phases[Phase.CLIMB].vertical_speed,
+            self.aircraft.s_fus, self.aircraft.wing.area,
+            self.aircraft.figure_of_merit, self.aircraft.propulsion_efficiency,
+            self.aircraft.TA, self.rho)
+
+    def steady_climb(self, ws: np.ndarray = DEFAULT_WING_LOADING):
+        return climb_power_loading(ws, self.aircraft.rate_of_climb,
+                                   self.aircraft.estimated_CD0,
+                                   self.aircraft.wing.aspect_ratio,
+                                   self.aircraft.wing.oswald_efficiency_factor,
+                                   self.aircraft.propulsion_efficiency,
+                                   self.rho)
+
+    def diagram(self,
+                ws: np.ndarray = DEFAULT_WING_LOADING) -> ConstraintDiagram:
+        """All constraints of the W/P-W/S diagram of the aircraft over a wing loading grid"""
+        return constraint_diagram(
+            ConstraintInputs.from_aircraft(self.aircraft, self.power_setting,
+                                           self.mtow_setting), ws)
+
+    @stage('classI.output')
     def output(self) -> tuple[float, float]:
         ws_output = self.w_s_stall_speed()
         wp_output = self.ver_climb(ws_output)
@@ -102,24 +107,12 @@ class ClassIModel(Model):
     # @show
     @save_with_name(lambda self: self.aircraft.name)
     def plot_wp_ws(self) -> tuple[plt.Figure, plt.Axes]:
-        fig, ax = plt.subplots(figsize=(6, 6))
-        xx = np.arange(1, 2000)
-
-        plt.axvline(x=self.w_s_stall_speed(),
-                    label=' Stall Speed',
-                    color='red')
-        plt.plot(
-            xx,
-            self._wp(xx),
-            label='Cruise',
-        )
-        plt.plot(xx, self.ver_climb(xx), label='Vertical Climb')
-        plt.plot(xx, self.steady_climb(), label='Cruise Climb')
-        plt.xlabel('W/S [N/m$^2$]')
-        plt.ylabel('W/P [N/W]')
+        from sizing_tools.misc_plots.constraint_diagram import plot_constraint_diagram
+
+        # sizes the wing at the stall wing loading, as output does
+        self.w_s_stall_speed()
         # plt.title(f"Concept: {self.aircraft.name}")
-        plt.legend(loc='upper right')
-        return fig, ax
+        return plot_constraint_diagram(self.diagram())
 
 
 if __name__ == '__main__':
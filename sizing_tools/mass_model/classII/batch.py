@@ -0,0 +1,441 @@
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+from scipy.constants import g
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.formula.aero import C_L_from_lift, hover_power, hover_velocity, rotor_disk_area, C_D_from_CL, drag, \
+    power_required, C_L_climb_opt, velocity_from_lift
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.formula.battery import mass_from_energy
+from sizing_tools.formula.emperical import engine_mass, propeller_mass, fuselage_mass, wing_mass, \
+    horizontal_tail_mass, vertical_tail_mass, landing_gear_mass
+from utility.log import logger
+from utility.unit_conversion import convert_float
+
+# Aircraft attribute paths that are copied into a DesignBatch, keyed by the batch field name
+AIRCRAFT_FIELDS = {
+    'payload_mass': 'payload_mass',
+    'cruise_velocity': 'cruise_velocity',
+    'n_pax': 'n_pax',
+    'figure_of_merit': 'figure_of_merit',
+    'estimated_CD0': 'estimated_CD0',
+    'propulsion_efficiency': 'propulsion_efficiency',
+    'motor_power_margin': 'motor_power_margin',
+    'SoC_min': 'SoC_min',
+    'battery_energy_density': 'battery_energy_density',
+    'battery_system_efficiency': 'battery_system_efficiency',
+    'design_load_factor': 'design_load_factor',
+    'motor_prop_count': 'motor_prop_count',
+    'motor_wing_count': 'motor_wing_count',
+    'propeller_radius': 'propeller_radius',
+    'propeller_blade_number': 'propeller_blade_number',
+    'propeller_rotation_speed': 'propeller_rotation_speed',
+    'wing_area': 'wing.area',
+    'wing_span': 'wing.span',
+    'oswald_efficiency_factor': 'wing.oswald_efficiency_factor',
+    'fuselage_length': 'fuselage.length',
+    'fuselage_maximum_section_perimeter': 'fuselage.maximum_section_perimeter',
+    'S_th': 'tail.S_th',
+    'AR_th': 'tail.AR_th',
+    't_rh': 'tail.t_rh',
+    'S_tv': 'tail.S_tv',
+    'AR_tv': 'tail.AR_tv',
+    't_rv': 'tail.t_rv',
+    'lambda_quart_tv': 'tail.lambda_quart_tv',
+    'l_lg': 'tail.l_lg',
+    'eta_lg': 'tail.eta_lg',
+    'taper': 'taper',
+    'hinge_location': 'hinge_location',
+}
+PATH_FIELDS = {path: name for name, path in AIRCRAFT_FIELDS.items()}
+PHASE_FIELDS = ('duration', 'vertical_speed', 'ending_altitude')
+
+
+@dataclass
+class DesignBatch:
+    """
+    Struct-of-arrays representation of a set of design points.
+
+    Every scalar field is an array of shape (n,), the mission phase fields have shape (n, n_phases) with the columns
+    ordered as in `phases`, the phase of each segment of the mission, and `segments`, their names. A NaN takeoff
+    power means it is computed from the initial total mass guess, like the scalar EnergySystemMassModel does when the
+    mission profile has no takeoff power yet.
+    """
+    id: np.ndarray
+    payload_mass: np.ndarray
+    cruise_velocity: np.ndarray
+    n_pax: np.ndarray
+    figure_of_merit: np.ndarray
+    estimated_CD0: np.ndarray
+    propulsion_efficiency: np.ndarray
+    motor_power_margin: np.ndarray
+    SoC_min: np.ndarray
+    battery_energy_density: np.ndarray
+    battery_system_efficiency: np.ndarray
+    design_load_factor: np.ndarray
+    motor_prop_count: np.ndarray
+    motor_wing_count: np.ndarray
+    propeller_radius: np.ndarray
+    propeller_blade_number: np.ndarray
+    propeller_rotation_speed: np.ndarray
+    wing_area: np.ndarray
+    wing_span: np.ndarray
+    oswald_efficiency_factor: np.ndarray
+    fuselage_length: np.ndarray
+    fuselage_maximum_section_perimeter: np.ndarray
+    S_th: np.ndarray
+    AR_th: np.ndarray
+    t_rh: np.ndarray
+    S_tv: np.ndarray
+    AR_tv: np.ndarray
+    t_rv: np.ndarray
+    lambda_quart_tv: np.ndarray
+    l_lg: np.ndarray
+    eta_lg: np.ndarray
+    taper: np.ndarray
+    hinge_location: np.ndarray
+    takeoff_power: np.ndarray
+    phases: tuple[Phase, ...]
+    segments: tuple[str, ...]
+    phase_duration: np.ndarray
+    phase_vertical_speed: np.ndarray
+    phase_ending_altitude: np.ndarray
+
+    @classmethod
+    def from_aircraft(cls, aircraft: Aircraft | DesignPoint
+                      | list[Aircraft | DesignPoint],
+                      **overrides) -> 'DesignBatch':
+        """
+        Create a batch from one or more aircraft or design points.
+
+        Overrides are broadcast against the aircraft, so a single aircraft with an array of payloads gives one design
+        point per payload. Besides the batch fields, `range` is accepted and sets the cruise duration at the (possibly
+        overridden) cruise velocity.
+        :param aircraft: Aircraft or list of aircraft to take the base values from
+        :param overrides: Arrays or scalars replacing the values of the aircraft
+        :return: DesignBatch
+        """
+        aircraft_list = aircraft if isinstance(aircraft, list) else [aircraft]
+        return cls.from_design_points([
+            ac
+            if isinstance(ac, DesignPoint) else DesignPoint.from_aircraft(ac)
+            for ac in aircraft_list
+        ], **overrides)
+
+    @classmethod
+    def from_design_points(cls, points: list[DesignPoint],
+                           **overrides) -> 'DesignBatch':
+        """
+        Stack design points into a batch, see from_aircraft for the overrides.
+        :param points: Design points sharing the same mission profile layout
+        :param overrides: Arrays or scalars replacing the values of the design points
+        :return: DesignBatch
+        """
+        schema = points[0].schema
+        for point in points:
+            if point.schema.segments != schema.segments or point.schema.phases != schema.phases:
+                raise ValueError(
+                    f'{point.labels.id} has a different mission profile layout than {points[0].labels.id}'
+                )
+        phases, segments = schema.phases, schema.segments
+        values = np.stack([point.values for point in points])
+        data = {
+            name: values[:, schema.index[path]]
+            for name, path in AIRCRAFT_FIELDS.items()
+        }
+        data['id'] = np.array([point.labels.id for point in points])
+        data['takeoff_power'] = values[:, schema.
+                                       index['mission_profile.TAKEOFF.power']]
+        for attr in PHASE_FIELDS:
+            data[f'phase_{attr}'] = values[:, [
+                schema.index[f'mission_profile.{name}.{attr}']
+                for name in segments
+            ]]
+
+        flight_range = overrides.pop('range', None)
+        unknown = set(overrides) - set(data)
+        if unknown:
+            raise ValueError(f'Unknown design batch fields: {unknown}')
+        data.update({
+            key: np.asarray(value, dtype=float)
+            for key, value in overrides.items()
+        })
+
+        shapes = [np.shape(value)[:1] for value in data.values()]
+        n, = np.broadcast_shapes(*shapes, np.shape(flight_range))
+        for key, value in data.items():
+            if key.startswith('phase_'):
+                data[key] = np.array(np.broadcast_to(value, (n, len(phases))))
+            else:
+                data[key] = np.array(np.broadcast_to(value, (n, )))
+
+        batch = cls(phases=phases, segments=segments, **data)
+        if flight_range is not None:
+            batch.set_path('range', flight_range)
+        return batch
+
+    def set_path(self, path: str, values: float | np.ndarray):
+        """
+        Set a field by its Aircraft attribute path, e.g. 'wing.span' or 'mission_profile.CRUISE.duration'.
+        Setting 'range' changes the duration of the first cruise segment at the current cruise velocity.
+        :param path: Attribute path on Aircraft
+        :param values: Value or array of values for all design points
+        """
+        parts = path.split('.')
+        if path == 'range':
+            cruise = self.phases.index(Phase.CRUISE)
+            self.phase_duration[:, cruise] = np.asarray(
+                values) / self.cruise_velocity
+        elif parts[0] == 'mission_profile' and len(
+                parts) == 3 and parts[2] in PHASE_FIELDS:
+            column = self.segments.index(
+                parts[1]) if parts[1] in self.segments else self.phases.index(
+                    Phase[parts[1]])
+            getattr(self, f'phase_{parts[2]}')[:, column] = values
+        elif path in PATH_FIELDS:
+            setattr(
+                self, PATH_FIELDS[path],
+                np.array(np.broadcast_to(values, (len(self), )), dtype=float))
+        else:
+            raise ValueError(f'{path} is not a design batch field')
+
+    @property
+    def aspect_ratio(self) -> np.ndarray:
+        return self.wing_span**2 / self.wing_area
+
+    def __len__(self) -> int:
+        return len(self.payload_mass)
+
+    def __getitem__(self, item) -> 'DesignBatch':
+        return replace(
+            self, **{
+                f.name: getattr(self, f.name)[item]
+                for f in fields(self) if f.name not in ('phases', 'segments')
+            })
+
+
+@dataclass
+class BatchResult:
+    total_mass: np.ndarray
+    converged: np.ndarray
+    iterations: np.ndarray
+
+
+class BatchClassIIModel:
+    """
+    Vectorized version of the Class II mass closure, solving all design points of a DesignBatch at once.
+    """
+
+    def __init__(self, batch: DesignBatch, initial_total_mass: float = 1500.):
+        self.batch = batch
+        self.initial_total_mass = initial_total_mass
+        self.rho = density(batch.phase_ending_altitude)
+        # the optimal climb lift coefficient does not depend on the mass, so it is computed once
+        self.C_L_climb = C_L_climb_opt(batch.estimated_CD0, batch.aspect_ratio,
+                                       batch.oswald_efficiency_factor)
+        self.takeoff_power = batch.takeoff_power.copy()
+        # the takeoff power is never a complex step or symbolic variable, but can be stored as one
+        unset = np.isnan(np.real(self.takeoff_power).astype(float))
+        self.takeoff_power[unset] = self._hover_power(
+            initial_total_mass,
+            self.rho[:, batch.phases.index(Phase.TAKEOFF)])[unset]
+
+    def _subset(self, index: np.ndarray) -> 'BatchClassIIModel':
+        model = object.__new__(BatchClassIIModel)
+        model.batch = self.batch[index]
+        model.initial_total_mass = self.initial_total_mass
+        model.rho = self.rho[index]
+        model.C_L_climb = self.C_L_climb[index]
+        model.takeoff_power = self.takeoff_power[index]
+        return model
+
+    def _hover_power(self, total_mass: np.ndarray,
+                     rho: np.ndarray) -> np.ndarray:
+        disk_area = rotor_disk_area(
+            self.batch.propeller_radius) * self.batch.motor_prop_count
+        return hover_power(total_mass * g, disk_area,
+                           self.batch.figure_of_merit, rho)
+
+    def _climb_power(self, total_mass: np.ndarray, rho: np.ndarray,
+                     vertical_speed: np.ndarray) -> np.ndarray:
+        Ph = self._hover_power(total_mass, rho)
+        vh = hover_velocity(Ph, total_mass * g)
+        Ratio = vertical_speed / (2 * vh) + ((vertical_speed /
+                                              (2 * vh))**2 + 1)**(0.5)
+        return Ph * Ratio
+
+    def _climb_power_cruise_config(self, total_mass: np.ndarray,
+                                   rho: np.ndarray,
+                                   vertical_speed: np.ndarray) -> np.ndarray:
+        C_D = C_D_from_CL(self.C_L_climb, self.batch.estimated_CD0,
+                          self.batch.aspect_ratio,
+                          self.batch.oswald_efficiency_factor)
+        velocity = velocity_from_lift(total_mass * g, rho, self.C_L_climb,
+                                      self.batch.wing_area)
+        return total_mass * g * (
+            velocity * C_D / self.C_L_climb +
+            vertical_speed) / self.batch.propulsion_efficiency
+
+    def _cruise_power_fixed_velocity(self, total_mass: np.ndarray,
+                                     rho: np.ndarray) -> np.ndarray:
+        C_L = C_L_from_lift(total_mass * g, rho, self.batch.cruise_velocity,
+                            self.batch.wing_area)
+        C_D = C_D_from_CL(C_L, self.batch.estimated_CD0,
+                          self.batch.aspect_ratio,
+                          self.batch.oswald_efficiency_factor)
+        D = drag(C_D, rho, self.batch.cruise_velocity, self.batch.wing_area)
+        return power_required(D, self.batch.cruise_velocity,
+                              self.batch.propulsion_efficiency)
+
+    def power(self, phase: Phase, total_mass: np.ndarray, rho: np.ndarray,
+              vertical_speed: np.ndarray) -> np.ndarray:
+        """
+        Power of one mission phase. The design points are on the last axis, so arrays of shape (k, n) give the power
+        at k flight states per design point.
+        :param phase: Mission phase
+        :param total_mass: Total mass in kg
+        :param rho: Air density in kg/m^3
+        :param vertical_speed: Vertical speed in m/s
+        :return: Power in W
+        """
+        match phase:
+            case Phase.TAKEOFF:
+                return np.broadcast_to(self.takeoff_power,
+                                       np.broadcast(total_mass, rho).shape)
+            case Phase.HOVER_CLIMB:
+                return self._climb_power(total_mass, rho, vertical_speed)
+            case Phase.CLIMB:
+                return self._climb_power_cruise_config(total_mass, rho,
+                                                       vertical_speed)
+            case Phase.CRUISE:
+                return self._cruise_power_fixed_velocity(total_mass, rho)
+            case Phase.DESCENT:
+                return np.zeros(np.broadcast(total_mass, rho).shape)
+            case Phase.LANDING:
+                return self._hover_power(total_mass, rho)
+            case _:
+                logger.error(f'unknown phase {phase}')
+                return np.zeros(np.broadcast(total_mass, rho).shape)
+
+    def phase_power(self, total_mass: np.ndarray) -> np.ndarray:
+        """
+        Power per mission phase, mirrors evaluation.phase_results.
+        :param total_mass: Total mass per design point in kg
+        :return: Power in W, shape (n, n_phases)
+        """
+        power = np.zeros_like(self.batch.phase_duration)
+        for i, phase in enumerate(self.batch.phases):
+            power[:, i] = self.power(phase, total_mass, self.rho[:, i],
+                                     self.batch.phase_vertical_speed[:, i])
+        return power
+
+    def phase_energy(self, total_mass: np.ndarray) -> np.ndarray:
+        return self.phase_power(total_mass) * self.batch.phase_duration
+
+    def battery_mass(self, total_mass: np.ndarray) -> np.ndarray:
+        return mass_from_energy(
+            self.phase_energy(total_mass).sum(axis=1),
+            self.batch.battery_energy_density,
+            self.batch.battery_system_efficiency, self.batch.SoC_min)
+
+    def airframe_mass(self, total_mass: np.ndarray) -> dict[str, np.ndarray]:
+        batch = self.batch
+        masses = {
+            'fuselage':
+            fuselage_mass(total_mass, batch.fuselage_length,
+                          batch.fuselage_maximum_section_perimeter,
+                          batch.n_pax),
+            'wing':
+            wing_mass(total_mass, batch.wing_area, batch.design_load_factor,
+                      batch.aspect_ratio),
+            'horizontal_tail':
+            horizontal_tail_mass(total_mass, batch.S_th, batch.AR_th,
+                                 batch.t_rh),
+            'vertical_tail':
+            vertical_tail_mass(total_mass, batch.S_tv, batch.AR_tv, batch.t_rv,
+                               batch.lambda_quart_tv),
+            'landing_gear':
+            landing_gear_mass(total_mass, batch.l_lg, batch.eta_lg),
+        }
+        return {'total': sum(masses.values()), **masses}
+
+    def propulsion_mass(self) -> dict[str, np.ndarray]:
+        batch = self.batch
+        takeoff_power = convert_float(self.takeoff_power, 'W', 'kW')
+        motors = engine_mass(takeoff_power, batch.motor_power_margin,
+                             batch.motor_prop_count) * batch.motor_prop_count
+        propellers = propeller_mass(
+            batch.propeller_radius, takeoff_power, batch.motor_prop_count,
+            batch.propeller_blade_number) * batch.motor_prop_count
+        return {
+            'total': motors + propellers,
+            'motors': motors,
+            'propellers': propellers,
+        }
+
+    def total_mass_estimation(self, total_mass: np.ndarray) -> np.ndarray:
+        return (self.battery_mass(total_mass) +
+                self.airframe_mass(total_mass)['total'] +
+                self.propulsion_mass()['total'] + self.batch.payload_mass)
+
+    def total_mass(self,
+                   xtol: float = 1e-8,
+                   maxiter: int = 500) -> BatchResult:
+        """
+        Solve the mass closure for all design points with Steffensen's method, like scipy.optimize.fixed_point.
+
+        Design points that have converged are dropped from the active set, so later iterations only evaluate the
+        remaining ones.
+        :param xtol: Relative convergence tolerance
+        :param maxiter: Maximum number of iterations
+        :return: BatchResult with the total mass, convergence mask and iteration count per design point
+        """
+        n = len(self.batch)
+        total_mass = np.full(n, self.initial_total_mass, dtype=float)
+        converged = np.zeros(n, dtype=bool)
+        iterations = np.zeros(n, dtype=int)
+        active = np.arange(n)
+        model = self
+        for _ in range(maxiter):
+            p0 = total_mass[active]
+            p1 = model.total_mass_estimation(p0)
+            p2 = model.total_mass_estimation(p1)
+            d = p2 - 2.0 * p1 + p0
+            with np.errstate(divide='ignore', invalid='ignore'):
+                p = np.where(d != 0, p0 - (p1 - p0)**2 / d, p2)
+                relerr = np.where(p0 != 0, (p - p0) / p0, p)
+            total_mass[active] = p
+            iterations[active] += 1
+            done = np.abs(relerr) < xtol
+            if done.any():
+                converged[active[done]] = True
+                active = active[~done]
+                if active.size == 0:
+                    break
+                model = self._subset(active)
+        if active.size:
+            logger.warning(
+                f'{active.size} of {n} design points did not converge after {maxiter} iterations'
+            )
+        return BatchResult(total_mass, converged, iterations)
+
+    def mass_breakdown(
+        self, total_mass: np.ndarray
+    ) -> dict[str, np.ndarray | dict[str, np.ndarray]]:
+        """
+        Mass breakdown per design point, with the same layout as ClassIIModel.mass_breakdown.
+        """
+        return {
+            'total': total_mass,
+            'payload': {
+                'total': self.batch.payload_mass,
+            },
+            'battery': {
+                'total': self.battery_mass(total_mass),
+            },
+            'airframe': self.airframe_mass(total_mass),
+            'propulsion': self.propulsion_mass(),
+        }
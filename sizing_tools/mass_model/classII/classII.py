@@ -1,24 +1,28 @@
-from scipy.optimize import fixed_point
-
 from data.concept_parameters.aircraft import Aircraft
-from data.concept_parameters.aircraft_components import MassObject
-from data.literature.evtols import joby_s4
+from data.concept_parameters.design_point import DesignPoint, as_aircraft
 from sizing_tools.mass_model.classII.airframe import AirframeMassModel
 from sizing_tools.mass_model.classII.energy_system import EnergySystemMassModel
+from sizing_tools.mass_model.classII.evaluation import ClassIIResult, apply_result, evaluate
 from sizing_tools.mass_model.classII.propulsion_system import PropulsionSystemMassModel
 from sizing_tools.mass_model.mass_model import MassModel
-from sizing_tools.misc_plots.mass_breakdown import plot_mass_breakdown
 from utility.log import logger
+from utility.profiling import stage
 
 
 class ClassIIModel(MassModel):
+    """
+    Adapter around the functional core in evaluation.py, which writes the results onto the aircraft.
+    Use evaluate for a side-effect-free evaluation.
+    """
 
-    def __init__(self, aircraft: Aircraft, initial_total_mass: float = None):
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 initial_total_mass: float = None):
+        aircraft = as_aircraft(aircraft)
         if aircraft.total_mass is None:
             self.initial_total_mass = initial_total_mass if initial_total_mass else aircraft.payload_mass
         else:
             self.initial_total_mass = aircraft.total_mass
-            aircraft.total_mass = None
         self.energy_system_mass_model = EnergySystemMassModel(
             aircraft, self.initial_total_mass)
         self.airframe_mass_model = AirframeMassModel(aircraft,
@@ -26,6 +30,7 @@ class ClassIIModel(MassModel):
         self.propulsion_system_mass_model = PropulsionSystemMassModel(
             aircraft, self.initial_total_mass)
         super().__init__(aircraft, self.initial_total_mass)
+        self.result: ClassIIResult | None = None
 
     @property
     def necessary_parameters(self) -> list[str]:
@@ -39,52 +44,30 @@ class ClassIIModel(MassModel):
                 self.propulsion_system_mass_model.total_mass() +
                 self.aircraft.payload_mass)
 
+    def evaluate(self, **kwargs) -> ClassIIResult:
+        """Evaluate the model without modifying the aircraft"""
+        return evaluate(self.aircraft,
+                        self.initial_total_mass,
+                        xtol=kwargs.get('xtol', 1e-8),
+                        maxiter=kwargs.get('maxiter', 500))
+
+    @stage('classII.total_mass')
     def total_mass(self, **kwargs) -> float:
-        self.aircraft.total_mass = fixed_point(self.total_mass_estimation,
-                                               self.initial_total_mass,
-                                               xtol=kwargs.get('xtol', 1e-8),
-                                               maxiter=kwargs.get(
-                                                   'maxiter', 500))
+        self.result = self.evaluate(**kwargs)
+        apply_result(self.aircraft, self.result, mass_breakdown=False)
         return self.aircraft.total_mass
 
     def mass_breakdown(self) -> dict[str, float | dict[str, float]]:
-        self.aircraft.mass_breakdown_dict = {
-            'total':
-            self.aircraft.total_mass
-            if self.aircraft.total_mass else self.total_mass(),
-            'payload': {
-                'total': self.aircraft.payload_mass,
-            },
-            'battery': {
-                'total': self.energy_system_mass_model.total_mass(),
-            },
-            'airframe': {
-                'total': self.airframe_mass_model.total_mass(),
-                'fuselage': self.airframe_mass_model.fuselage_mass(),
-                'wing': self.airframe_mass_model.wing_mass(),
-                'horizontal_tail':
-                self.airframe_mass_model.horizontal_tail_mass(),
-                'vertical_tail': self.airframe_mass_model.vertical_tail_mass(),
-                'landing_gear': self.airframe_mass_model.landing_gear_mass(),
-            },
-            'propulsion': {
-                'total':
-                self.propulsion_system_mass_model.total_mass(),
-                'motors':
-                self.propulsion_system_mass_model.motor_mass() *
-                self.aircraft.motor_prop_count,
-                'propellers':
-                self.propulsion_system_mass_model.propeller_mass() *
-                self.aircraft.motor_prop_count,
-            }
-        }
-        self.aircraft.mass_breakdown = MassObject.from_mass_dict(
-            'total', self.aircraft.mass_breakdown_dict)
+        if self.result is None:
+            self.total_mass()
+        apply_result(self.aircraft, self.result)
         # self.aircraft.mass_breakdown.set_cg_from_dict(example_cg_dict)
         return self.aircraft.mass_breakdown_dict
 
 
 def concept_iteration(concepts: list[Aircraft]):
+    from sizing_tools.misc_plots.mass_breakdown import plot_mass_breakdown
+
     estimations = {key: {} for key in concepts}
 
     for concept in concepts:
@@ -95,6 +78,7 @@ def concept_iteration(concepts: list[Aircraft]):
 
 if __name__ == '__main__':
     from data.concept_parameters.concepts import concept_C1_5, concept_C2_1, concept_C2_6, concept_C2_10
+    from data.literature.evtols import joby_s4
 
     concept_iteration(
         [concept_C1_5, concept_C2_1, concept_C2_6, concept_C2_10])
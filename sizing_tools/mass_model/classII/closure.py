@@ -0,0 +1,147 @@
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.constants import g
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint, as_aircraft
+from data.concept_parameters.mission_profile import MissionPhase, Phase
+from sizing_tools.formula.aero import C_D_from_CL, drag, hover_velocity, power_required
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.formula.battery import mass_from_energy
+from sizing_tools.formula.emperical import TOTAL_MASS_EXPONENTS
+from sizing_tools.mass_model.classII.evaluation import PhaseResult, airframe_masses, battery_mass, \
+    hover_phase_power, phase_results, propulsion_masses, takeoff_power
+from utility.log import logger, solver_logger
+from utility.profiling import stage
+
+
+@dataclass(frozen=True)
+class ClosureResult:
+    total_mass: float  # kg
+    takeoff_power: float  # W
+    converged: bool
+    iterations: int  # every iteration evaluates the mass laws and their derivative once
+    method: str  # method of the last step, 'newton' or 'anderson'
+    residuals: tuple[float, ...]  # residual in kg before every step
+
+
+def _phase_power_derivative(aircraft: Aircraft, phase: MissionPhase,
+                            result: PhaseResult, total_mass: float) -> float:
+    match result.phase:
+        case Phase.HOVER_CLIMB:
+            # P = Ph * (x + sqrt(x^2 + 1)) with Ph ~ m^1.5 and x = roc / (2 vh) ~ m^-0.5
+            Ph = hover_phase_power(aircraft, phase, total_mass)
+            x = phase.vertical_speed / (2 * hover_velocity(Ph, total_mass * g))
+            return result.power / total_mass * (1.5 - 0.5 * x /
+                                                (x**2 + 1)**0.5)
+        case Phase.CLIMB:
+            # P = m g (V C_D / C_L + roc) / eta with V ~ m^0.5 at constant C_L
+            C_D = C_D_from_CL(result.C_L, aircraft.estimated_CD0,
+                              aircraft.wing.aspect_ratio,
+                              aircraft.wing.oswald_efficiency_factor)
+            return g * (1.5 * result.horizontal_speed * C_D / result.C_L +
+                        phase.vertical_speed) / aircraft.propulsion_efficiency
+        case Phase.CRUISE:
+            # the induced part of the power scales with C_L^2 ~ m^2, the zero-lift part is constant
+            velocity = result.horizontal_speed
+            zero_lift_power = power_required(
+                drag(aircraft.estimated_CD0, density(phase.ending_altitude),
+                     velocity, aircraft.wing.area), velocity,
+                aircraft.propulsion_efficiency)
+            return 2 * (result.power - zero_lift_power) / total_mass
+        case Phase.LANDING:
+            return 1.5 * result.power / total_mass
+        case _:
+            return 0.
+
+
+def closure_residual(aircraft: Aircraft, total_mass: float,
+                     takeoff_power: float) -> tuple[float, float]:
+    """
+    Residual of the mass closure m = battery(m) + airframe(m) + propulsion + payload, with its analytic derivative.
+    :param aircraft: Aircraft
+    :param total_mass: Total mass in kg
+    :param takeoff_power: Takeoff power in W the motors are sized for
+    :return: Residual in kg and its derivative to the total mass
+    """
+    phases = phase_results(aircraft, total_mass, takeoff_power)
+    airframe = airframe_masses(aircraft, total_mass)
+    estimate = (battery_mass(aircraft, phases) + airframe['total'] +
+                propulsion_masses(aircraft, takeoff_power)['total'] +
+                aircraft.payload_mass)
+    energy_derivative = sum(
+        _phase_power_derivative(aircraft, phase, result, total_mass) *
+        result.duration for phase, result in zip(
+            aircraft.mission_profile.phases.values(), phases))
+    estimate_derivative = mass_from_energy(
+        energy_derivative, aircraft.battery_energy_density,
+        aircraft.battery_system_efficiency, aircraft.SoC_min) + sum(
+            exponent * airframe[key] / total_mass
+            for key, exponent in TOTAL_MASS_EXPONENTS.items())
+    return total_mass - estimate, 1 - estimate_derivative
+
+
+@stage('closure.mass_closure')
+def mass_closure(aircraft: Aircraft | DesignPoint,
+                 initial_total_mass: float = 1500.,
+                 tolerance: float = 1e-6,
+                 maxiter: int = 50,
+                 method: str = 'newton',
+                 fixed_takeoff_power: float = None) -> ClosureResult:
+    """
+    Solve the mass closure with Newton's method on the analytic derivative of the mass laws.
+
+    Steps where the derivative cannot be used (not positive, not finite, or leading to a negative mass) fall back to
+    Anderson mixing of depth one on the fixed point map. The takeoff power is sized at the initial total mass, like in
+    Iteration, unless it is given, so a solve can be warm started from another total mass.
+    :param aircraft: Aircraft or design point
+    :param initial_total_mass: Initial guess of the total mass in kg
+    :param tolerance: Convergence tolerance on the mass update in kg
+    :param maxiter: Maximum number of iterations
+    :param method: 'newton', or 'anderson' to only use Anderson mixing
+    :param fixed_takeoff_power: Takeoff power in W, instead of the one of the mission profile or at the initial mass
+    :return: ClosureResult
+    """
+    if method not in ('newton', 'anderson'):
+        raise ValueError(f'Unknown mass closure method: {method}')
+    aircraft = as_aircraft(aircraft)
+    power = takeoff_power(
+        aircraft, initial_total_mass
+    ) if fixed_takeoff_power is None else fixed_takeoff_power
+    total_mass = float(initial_total_mass)
+    residuals = []
+    previous = None
+    converged = False
+    for iteration in range(1, maxiter + 1):
+        residual, derivative = closure_residual(aircraft, total_mass, power)
+        residuals.append(residual)
+        fixed_point_map = total_mass - residual
+        step = -residual / derivative if method == 'newton' and np.isfinite(
+            derivative) and derivative > 0 else np.nan
+        if not np.isfinite(step) or total_mass + step <= 0:
+            method = 'anderson'
+            step = -residual
+            if previous is not None and residual != previous[1]:
+                previous_map, previous_residual = previous
+                step = fixed_point_map - residual / (
+                    residual - previous_residual) * (fixed_point_map -
+                                                     previous_map) - total_mass
+        previous = fixed_point_map, residual
+        total_mass += step
+        solver_logger.debug(
+            'mass closure iteration %d: %s kg, residual %s kg (%s)', iteration,
+            total_mass, residual, method)
+        if abs(step) < tolerance:
+            converged = True
+            break
+    if not converged:
+        logger.warning(
+            f'Mass closure of {aircraft.id} did not converge after {maxiter} iterations'
+        )
+    return ClosureResult(total_mass=total_mass,
+                         takeoff_power=power,
+                         converged=converged,
+                         iterations=len(residuals),
+                         method=method,
+                         residuals=tuple(residuals))
@@ -0,0 +1,444 @@
+from dataclasses import dataclass
+from math import atan
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+import numpy as np
+from scipy.constants import g
+from scipy.optimize import fixed_point
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.aircraft_components import MassObject
+from data.concept_parameters.design_point import DesignPoint, as_aircraft
+from data.concept_parameters.mission_profile import MissionPhase, Phase
+from sizing_tools.formula.aero import C_L_from_lift, hover_power, hover_velocity, rotor_disk_area, C_D_from_CL, drag, \
+    power_required, C_L_climb_opt, velocity_from_lift, C_L_cruise_opt
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.formula.battery import mass_from_energy
+from sizing_tools.formula.emperical import engine_mass, propeller_mass, fuselage_mass, wing_mass, \
+    horizontal_tail_mass, vertical_tail_mass, landing_gear_mass
+from utility.log import logger, solver_logger
+from utility.profiling import stage, timed
+from utility.unit_conversion import convert_float
+
+# Functional core of the Class II mass model. Nothing in this module writes to the aircraft it is given, all derived
+# quantities are returned as immutable records and written back by apply_result.
+
+
+@dataclass(frozen=True)
+class PhaseResult:
+    phase: Phase
+    power: float  # W
+    energy: float  # J
+    duration: float  # s
+    horizontal_speed: float  # m/s
+    distance: float  # m
+    vertical_speed: float  # m/s
+    C_L: float | None = None
+
+
+@dataclass(frozen=True)
+class ClassIIResult:
+    total_mass: float  # kg
+    initial_total_mass: float  # kg
+    takeoff_power: float  # W
+    disk_loading: float  # N/m^2
+    phases: tuple[PhaseResult, ...]
+    mass_breakdown: Mapping[str, Mapping[str, float] | float]
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, 'mass_breakdown',
+            MappingProxyType({
+                key:
+                MappingProxyType(dict(value))
+                if isinstance(value, Mapping) else value
+                for key, value in self.mass_breakdown.items()
+            }))
+
+    def __reduce__(self):
+        return ClassIIResult, (self.total_mass, self.initial_total_mass,
+                               self.takeoff_power, self.disk_loading,
+                               self.phases, self.mass_breakdown_dict())
+
+    @property
+    def energy(self) -> float:
+        return sum(phase.energy for phase in self.phases)
+
+    def mass_breakdown_dict(self) -> dict[str, float | dict[str, float]]:
+        """Mutable copy of the mass breakdown, in the layout of Aircraft.mass_breakdown_dict"""
+        return {
+            key: dict(value) if isinstance(value, Mapping) else value
+            for key, value in self.mass_breakdown.items()
+        }
+
+
+def disk_loading(aircraft: Aircraft, total_mass: float) -> float:
+    """
+    Rotor disk loading in hover, without vertical speed.
+    :param aircraft: Aircraft
+    :param total_mass: Total mass in kg
+    :return: Disk loading in N/m^2
+    """
+    return total_mass * g / (rotor_disk_area(aircraft.propeller_radius) *
+                             aircraft.motor_prop_count)
+
+
+def hover_phase_power(aircraft: Aircraft, phase: MissionPhase,
+                      total_mass: float) -> float:
+    assert phase.phase in (Phase.TAKEOFF, Phase.LANDING, Phase.HOVER_CLIMB)
+    disk_area = rotor_disk_area(
+        aircraft.propeller_radius) * aircraft.motor_prop_count
+    return hover_power(total_mass * g, disk_area, aircraft.figure_of_merit,
+                       density(phase.ending_altitude))
+
+
+def takeoff_power(aircraft: Aircraft, total_mass: float) -> float:
+    """
+    Takeoff power of the mission profile, or the hover power at the takeoff altitude if it has not been set yet.
+    :param aircraft: Aircraft
+    :param total_mass: Total mass in kg used for the hover power
+    :return: Takeoff power in W
+    """
+    takeoff = aircraft.mission_profile.TAKEOFF
+    if takeoff.power is not None:
+        return takeoff.power
+    return hover_phase_power(aircraft, takeoff, total_mass)
+
+
+@stage('classII.phase.hover_climb')
+def _hover_climb(aircraft: Aircraft, phase: MissionPhase,
+                 total_mass: float) -> PhaseResult:
+    Ph = hover_phase_power(aircraft, phase, total_mass)
+    roc = phase.vertical_speed
+    vh = hover_velocity(Ph, total_mass * g)
+    Ratio = roc / (2 * vh) + ((roc / (2 * vh))**2 + 1)**(0.5)
+    return _phase_result(phase, Ph * Ratio)
+
+
+@stage('classII.phase.climb')
+def _climb_cruise_config(aircraft: Aircraft, phase: MissionPhase,
+                         total_mass: float) -> PhaseResult:
+    wing = aircraft.wing
+    C_L = C_L_climb_opt(aircraft.estimated_CD0, wing.aspect_ratio,
+                        wing.oswald_efficiency_factor)
+    C_D = C_D_from_CL(C_L, aircraft.estimated_CD0, wing.aspect_ratio,
+                      wing.oswald_efficiency_factor)
+    velocity = velocity_from_lift(total_mass * g,
+                                  density(phase.ending_altitude), C_L,
+                                  wing.area)
+    power = total_mass * g * (velocity * C_D / C_L + phase.vertical_speed
+                              ) / aircraft.propulsion_efficiency
+    return _phase_result(phase, power, C_L=C_L, horizontal_speed=velocity)
+
+
+@stage('classII.phase.cruise')
+def _cruise_fixed_velocity(aircraft: Aircraft, phase: MissionPhase,
+                           total_mass: float) -> PhaseResult:
+    wing = aircraft.wing
+    velocity = aircraft.cruise_velocity
+    rho = density(phase.ending_altitude)
+    C_L = C_L_from_lift(total_mass * g, rho, velocity, wing.area)
+    C_D = C_D_from_CL(C_L, aircraft.estimated_CD0, wing.aspect_ratio,
+                      wing.oswald_efficiency_factor)
+    D = drag(C_D, rho, velocity, wing.area)
+    power = power_required(D, velocity, aircraft.propulsion_efficiency)
+    return _phase_result(phase, power, C_L=C_L, horizontal_speed=velocity)
+
+
+@stage('classII.phase.descent')
+def _descent(aircraft: Aircraft, phase: MissionPhase,
+             start_altitude: float) -> PhaseResult:
+    # gliding descent at the cruise velocity and the glide angle of the best lift to drag ratio
+    wing = aircraft.wing
+    C_L = C_L_cruise_opt(aircraft.estimated_CD0, wing.aspect_ratio,
+                         wing.oswald_efficiency_factor)
+    C_D = C_D_from_CL(C_L, aircraft.estimated_CD0, wing.aspect_ratio,
+                      wing.oswald_efficiency_factor)
+    velocity = aircraft.cruise_velocity
+    vertical_speed = -velocity * atan(C_D / C_L)
+    # the altitude lost over the negative vertical speed, the duration and distance are positive
+    duration = (phase.ending_altitude - start_altitude) / vertical_speed
+    return PhaseResult(phase.phase,
+                       0.,
+                       0.,
+                       duration=duration,
+                       horizontal_speed=velocity,
+                       distance=velocity * duration,
+                       vertical_speed=vertical_speed,
+                       C_L=C_L)
+
+
+@stage('classII.phase.takeoff')
+def _takeoff(phase: MissionPhase, takeoff_power: float) -> PhaseResult:
+    return _phase_result(phase, takeoff_power)
+
+
+@stage('classII.phase.landing')
+def _landing(aircraft: Aircraft, phase: MissionPhase,
+             total_mass: float) -> PhaseResult:
+    return _phase_result(phase, hover_phase_power(aircraft, phase, total_mass))
+
+
+def _phase_result(phase: MissionPhase,
+                  power: float,
+                  C_L: float = None,
+                  horizontal_speed: float = None) -> PhaseResult:
+    return PhaseResult(phase.phase,
+                       power,
+                       power * phase.duration,
+                       duration=phase.duration,
+                       horizontal_speed=phase.horizontal_speed
+                       if horizontal_speed is None else horizontal_speed,
+                       distance=phase.distance,
+                       vertical_speed=phase.vertical_speed,
+                       C_L=C_L)
+
+
+@stage('classII.phase_results')
+def phase_results(aircraft: Aircraft, total_mass: float,
+                  takeoff_power: float) -> tuple[PhaseResult, ...]:
+    """
+    Power and energy of every mission phase.
+    :param aircraft: Aircraft with a mission profile
+    :param total_mass: Total mass in kg the phases are flown at
+    :param takeoff_power: Takeoff power in W
+    :return: One PhaseResult per phase, in mission order
+    """
+    results = []
+    # missions start on the ground
+    altitude = 0.
+    for phase in aircraft.mission_profile.phases.values():
+        match phase.phase:
+            case Phase.TAKEOFF:
+                result = _takeoff(phase, takeoff_power)
+            case Phase.HOVER_CLIMB:
+                result = _hover_climb(aircraft, phase, total_mass)
+            case Phase.CLIMB:
+                result = _climb_cruise_config(aircraft, phase, total_mass)
+            case Phase.CRUISE:
+                result = _cruise_fixed_velocity(aircraft, phase, total_mass)
+            case Phase.DESCENT:
+                result = _descent(aircraft, phase, altitude)
+            case Phase.LANDING:
+                result = _landing(aircraft, phase, total_mass)
+            case _:
+                logger.error(f'unknown phase {phase.phase}')
+                result = _phase_result(phase, 0.)
+        solver_logger.debug('%s power: %s W', phase.name, result.power)
+        results.append(result)
+        altitude = phase.ending_altitude
+    return tuple(results)
+
+
+@stage('classII.battery_mass')
+def battery_mass(aircraft: Aircraft, phases: tuple[PhaseResult, ...]) -> float:
+    return mass_from_energy(
+        sum(phase.energy for phase in phases),
+        aircraft.battery_energy_density,
+        aircraft.battery_system_efficiency,
+        aircraft.SoC_min,
+    )
+
+
+def _fuselage_mass(aircraft: Aircraft, total_mass: float) -> float:
+    fuselage = aircraft.fuselage
+    return fuselage_mass(total_mass, fuselage.length,
+                         fuselage.maximum_section_perimeter, aircraft.n_pax)
+
+
+def _wing_mass(aircraft: Aircraft, total_mass: float) -> float:
+    wing = aircraft.wing
+    return wing_mass(total_mass, wing.area, aircraft.design_load_factor,
+                     wing.aspect_ratio)
+
+
+def _horizontal_tail_mass(aircraft: Aircraft, total_mass: float) -> float:
+    tail = aircraft.tail
+    return horizontal_tail_mass(total_mass, tail.S_th, tail.AR_th, tail.t_rh)
+
+
+def _vertical_tail_mass(aircraft: Aircraft, total_mass: float) -> float:
+    tail = aircraft.tail
+    return vertical_tail_mass(total_mass, tail.S_tv, tail.AR_tv, tail.t_rv,
+                              tail.lambda_quart_tv)
+
+
+def _landing_gear_mass(aircraft: Aircraft, total_mass: float) -> float:
+    tail = aircraft.tail
+    return landing_gear_mass(total_mass, tail.l_lg, tail.eta_lg)
+
+
+# Mass law of every airframe group, as a function of the aircraft and the total mass in kg it is sized for
+AIRFRAME_GROUPS: Mapping[str, Callable[[Aircraft, float], float]] = {
+    'fuselage': _fuselage_mass,
+    'wing': _wing_mass,
+    'horizontal_tail': _horizontal_tail_mass,
+    'vertical_tail': _vertical_tail_mass,
+    'landing_gear': _landing_gear_mass,
+}
+
+
+@stage('classII.airframe_masses')
+def airframe_masses(aircraft: Aircraft, total_mass: float) -> dict[str, float]:
+    """
+    Masses of the airframe groups.
+    :param aircraft: Aircraft
+    :param total_mass: Total mass in kg the airframe is sized for
+    :return: Mass per group in kg, with the sum under 'total'
+    """
+    masses = {
+        group: law(aircraft, total_mass)
+        for group, law in AIRFRAME_GROUPS.items()
+    }
+    return {'total': sum(masses.values()), **masses}
+
+
+@stage('classII.propulsion_masses')
+def propulsion_masses(aircraft: Aircraft,
+                      takeoff_power: float) -> dict[str, float]:
+    """
+    Masses of all motors and propellers.
+    :param aircraft: Aircraft
+    :param takeoff_power: Takeoff power in W the motors are sized for
+    :return: Mass per group in kg, with the sum under 'total'
+    """
+    power = convert_float(takeoff_power, 'W', 'kW')
+    motors = engine_mass(power, aircraft.motor_power_margin,
+                         aircraft.motor_prop_count) * aircraft.motor_prop_count
+    propellers = propeller_mass(
+        aircraft.propeller_radius, power, aircraft.motor_prop_count,
+        aircraft.propeller_blade_number) * aircraft.motor_prop_count
+    return {
+        'total': motors + propellers,
+        'motors': motors,
+        'propellers': propellers,
+    }
+
+
+@stage('classII.evaluate')
+def evaluate(aircraft: Aircraft | DesignPoint,
+             initial_total_mass: float = None,
+             xtol: float = 1e-8,
+             maxiter: int = 500,
+             fixed_takeoff_power: float = None) -> ClassIIResult:
+    """
+    Evaluate the Class II mass model without modifying the aircraft.
+
+    Like ClassIIModel, the energy and propulsion system are sized at the initial total mass and only the airframe
+    follows the total mass in the fixed point iteration; Iteration repeats the evaluation until both agree.
+    :param aircraft: Aircraft or design point to evaluate
+    :param initial_total_mass: Total mass in kg the energy and propulsion system are sized at, defaults to the total
+    mass of the aircraft, or its payload mass if that is not set
+    :param xtol: Relative convergence tolerance of the fixed point iteration
+    :param maxiter: Maximum number of iterations of the fixed point iteration
+    :param fixed_takeoff_power: Takeoff power in W, instead of the one of the mission profile
+    :return: ClassIIResult
+    """
+    aircraft = as_aircraft(aircraft)
+    if initial_total_mass is None:
+        initial_total_mass = aircraft.total_mass if aircraft.total_mass is not None else aircraft.payload_mass
+    power = takeoff_power(
+        aircraft, initial_total_mass
+    ) if fixed_takeoff_power is None else fixed_takeoff_power
+    phases = phase_results(aircraft, initial_total_mass, power)
+    battery = battery_mass(aircraft, phases)
+    propulsion = propulsion_masses(aircraft, power)
+    total_mass = airframe_closure(aircraft, battery + propulsion['total'],
+                                  initial_total_mass, xtol, maxiter)
+    return class_II_result(aircraft, initial_total_mass, power, phases,
+                           battery, propulsion, total_mass,
+                           airframe_masses(aircraft, total_mass))
+
+
+def airframe_closure(aircraft: Aircraft,
+                     sized_mass: float,
+                     initial_total_mass: float,
+                     xtol: float = 1e-8,
+                     maxiter: int = 500) -> float:
+    """
+    Fixed point of the total mass with the energy and propulsion system fixed and the airframe following the total mass.
+    :param aircraft: Aircraft
+    :param sized_mass: Mass in kg of the battery and the propulsion system
+    :param initial_total_mass: Initial total mass in kg of the fixed point iteration
+    :param xtol: Relative convergence tolerance of the fixed point iteration
+    :param maxiter: Maximum number of iterations of the fixed point iteration
+    :return: Total mass in kg
+    """
+    fixed_mass = sized_mass + aircraft.payload_mass
+    with timed('classII.fixed_point'):
+        return float(
+            fixed_point(
+                lambda m: fixed_mass + airframe_masses(aircraft, m)['total'],
+                initial_total_mass,
+                xtol=xtol,
+                maxiter=maxiter))
+
+
+def class_II_result(aircraft: Aircraft, initial_total_mass: float,
+                    takeoff_power: float, phases: tuple[PhaseResult, ...],
+                    battery: float, propulsion: dict[str, float],
+                    total_mass: float, airframe: dict[str,
+                                                      float]) -> ClassIIResult:
+    """
+    Collect the results of the sub-models into a ClassIIResult.
+    :param aircraft: Aircraft
+    :param initial_total_mass: Total mass in kg the energy and propulsion system are sized at
+    :param takeoff_power: Takeoff power in W
+    :param phases: Result of phase_results
+    :param battery: Battery mass in kg
+    :param propulsion: Result of propulsion_masses
+    :param total_mass: Total mass in kg
+    :param airframe: Result of airframe_masses at the total mass
+    :return: ClassIIResult
+    """
+    breakdown = {
+        'total': total_mass,
+        'payload': {
+            'total': aircraft.payload_mass,
+        },
+        'battery': {
+            'total': battery,
+        },
+        'airframe': airframe,
+        'propulsion': propulsion,
+    }
+    return ClassIIResult(total_mass=total_mass,
+                         initial_total_mass=initial_total_mass,
+                         takeoff_power=takeoff_power,
+                         disk_loading=disk_loading(aircraft,
+                                                   initial_total_mass),
+                         phases=phases,
+                         mass_breakdown=breakdown)
+
+
+def apply_result(aircraft: Aircraft,
+                 result: ClassIIResult,
+                 mass_breakdown: bool = True) -> Aircraft:
+    """
+    Write an evaluation result back onto an aircraft, for the code that reads the sizing outputs from it.
+    :param aircraft: Aircraft to update
+    :param result: Result of evaluate
+    :param mass_breakdown: Also set the mass breakdown
+    :return: The updated aircraft
+    """
+    aircraft.total_mass = result.total_mass
+    aircraft.TA = result.disk_loading
+    aircraft.mission_profile.TAKEOFF.power = result.takeoff_power
+    phases = aircraft.mission_profile.phases
+    for column in ('power', 'energy', 'duration', 'horizontal_speed',
+                   'distance', 'vertical_speed'):
+        phases.column(column)[:] = [
+            getattr(phase_result, column) for phase_result in result.phases
+        ]
+    C_L = np.array([
+        np.nan if phase_result.C_L is None else phase_result.C_L
+        for phase_result in result.phases
+    ])
+    phases.column('C_L')[:] = np.where(np.isnan(C_L), phases.column('C_L'),
+                                       C_L)
+    if mass_breakdown:
+        aircraft.mass_breakdown_dict = result.mass_breakdown_dict()
+        aircraft.mass_breakdown = MassObject.from_mass_dict(
+            'total', aircraft.mass_breakdown_dict)
+    return aircraft
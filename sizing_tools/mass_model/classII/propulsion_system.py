@@ -1,7 +1,8 @@
 from data.concept_parameters.aircraft import Aircraft
-from data.concept_parameters.mission_profile import Phase
-from sizing_tools.formula.emperical import engine_mass
+from sizing_tools.formula.emperical import engine_mass, propeller_mass
+from sizing_tools.mass_model.classII.evaluation import takeoff_power
 from sizing_tools.mass_model.mass_model import MassModel
+from utility.profiling import stage
 from utility.unit_conversion import convert_float
 
 
@@ -9,6 +10,7 @@ class PropulsionSystemMassModel(MassModel):
 
     def __init__(self, aircraft: Aircraft, total_mass: float):
         super().__init__(aircraft, total_mass)
+        self.takeoff_power = takeoff_power(aircraft, total_mass)
 
     @property
     def necessary_parameters(self) -> list[str]:
@@ -22,7 +24,7 @@ class PropulsionSystemMassModel(MassModel):
         Calculate the mass of the motor
         :return: mass of the motor in kg
         """
-        power = self.aircraft.mission_profile.TAKEOFF.power
+        power = self.takeoff_power
         return engine_mass(convert_float(power, 'W', 'kW'),
                            self.aircraft.motor_power_margin,
                            self.aircraft.motor_prop_count)
@@ -32,12 +34,13 @@ class PropulsionSystemMassModel(MassModel):
         Calculate the mass of the propeller
         :return: mass of the propeller in kg
         """
-        power = self.aircraft.mission_profile.TAKEOFF.power
-        return 0.144 * (2 * self.aircraft.propeller_radius *
-                        (convert_float(power, 'W', 'kW') /
-                         self.aircraft.motor_prop_count) *
-                        self.aircraft.propeller_blade_number**0.5)**0.782
+        power = self.takeoff_power
+        return propeller_mass(self.aircraft.propeller_radius,
+                              convert_float(power, 'W', 'kW'),
+                              self.aircraft.motor_prop_count,
+                              self.aircraft.propeller_blade_number)
 
+    @stage('classII.propulsion_system')
     def total_mass(self, **kwargs) -> float:
         """
         Calculate the total mass of the propulsion system
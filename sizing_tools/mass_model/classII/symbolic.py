@@ -0,0 +1,142 @@
+"""
+The Class II mass closure as a CasADi graph.
+
+BatchClassIIModel only uses the formulas of sizing_tools.formula, which accept CasADi symbols, so evaluating it on a
+DesignBatch of CasADi values builds the symbolic mass estimation F(M, x). The closure M = F(M, x) is solved by a
+CasADi Newton rootfinder, which differentiates its solution implicitly, so the sized outputs of a design have exact
+Jacobians with respect to the design variables. CasADi's map evaluates the graph for many designs at once.
+
+    model = SymbolicClassIIModel(concept_C2_1, ['wing.span', 'propeller_radius'])
+    model.evaluate([[12, 0.8], [14, 0.75]])['total_mass']
+    model.jacobian([14, 0.75])['total_mass']
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import fields, replace
+from typing import Sequence
+
+import casadi as ca
+import numpy as np
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.mass_model.classII.batch import PATH_FIELDS, BatchClassIIModel, DesignBatch
+
+# Outputs of the sized design
+OUTPUTS = ('total_mass', 'energy', 'battery_mass', 'takeoff_power')
+# Fields that stay numeric, the altitudes only enter the (tabulated) atmosphere model
+NUMERIC_FIELDS = ('id', 'phases', 'segments', 'phase_ending_altitude')
+
+
+@contextmanager
+def numpy_mode():
+    """
+    Numpy functions on CasADi values give CasADi values, without the legacy behaviour warning, within the context.
+    The global CasADi option is restored afterwards, so other users of CasADi, e.g. AeroSandbox, are not affected.
+    """
+    mode = ca.GlobalOptions.getNumpyMode()
+    ca.GlobalOptions.setNumpyMode(1)
+    try:
+        yield
+    finally:
+        ca.GlobalOptions.setNumpyMode(mode)
+
+
+def symbolic_batch(batch: DesignBatch, paths: Sequence[str],
+                   x: ca.SX) -> DesignBatch:
+    """
+    Batch of one design point whose values are CasADi expressions.
+    :param batch: Batch with the values of one design point
+    :param paths: Aircraft attribute paths of the design variables, see DesignBatch.set_path
+    :param x: Symbols of the design variables, one per path
+    :return: DesignBatch of object arrays of CasADi SX values
+    """
+    to_sx = np.vectorize(ca.SX, otypes=[object])
+    symbolic = replace(
+        batch, **{
+            f.name: to_sx(getattr(batch, f.name))
+            for f in fields(batch) if f.name not in NUMERIC_FIELDS
+        })
+    for j, path in enumerate(paths):
+        getattr(symbolic, PATH_FIELDS[path])[0] = x[j]
+    return symbolic
+
+
+class SymbolicClassIIModel:
+    """
+    Mass closure of an aircraft as a function of design variables, with exact derivatives.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 paths: Sequence[str],
+                 initial_total_mass: float = 1500.):
+        """
+        :param aircraft: Aircraft with the values of everything that is not a design variable
+        :param paths: Aircraft attribute paths of the design variables, DesignBatch fields
+        :param initial_total_mass: Initial guess of the closure, and the mass of the takeoff power if it is not set
+        """
+        unknown = [path for path in paths if path not in PATH_FIELDS]
+        if unknown:
+            raise ValueError(f'{unknown} are not design batch fields')
+        self.paths = tuple(paths)
+        self.batch = DesignBatch.from_aircraft(aircraft)
+        self.initial_total_mass = initial_total_mass
+        x = ca.SX.sym('x', len(self.paths))
+        M = ca.SX.sym('M')
+        with numpy_mode():
+            model = BatchClassIIModel(
+                symbolic_batch(self.batch, self.paths, x), initial_total_mass)
+            total_mass = np.array([M], dtype=object)
+            estimation = model.total_mass_estimation(total_mass)[0]
+            energy = model.phase_energy(total_mass).sum(axis=1)[0]
+            battery_mass = model.battery_mass(total_mass)[0]
+        self.estimation = ca.Function('total_mass_estimation', [M, x],
+                                      [estimation], ['M', 'x'], ['F'])
+        outputs = ca.Function(
+            'outputs', [M, x],
+            [M, energy, battery_mass, model.takeoff_power[0]], ['M', 'x'],
+            list(OUTPUTS))
+        self.closure = ca.rootfinder(
+            'mass_closure', 'newton',
+            ca.Function('residual', [M, x], [estimation - M]))
+
+        X = ca.MX.sym('x', len(self.paths))
+        sized = outputs(self.closure(initial_total_mass, X), X)
+        self.function = ca.Function('sizing', [X], list(sized), ['x'],
+                                    list(OUTPUTS))
+        self.jacobian_function = ca.Function(
+            'sizing_jacobian', [X], [ca.jacobian(value, X) for value in sized],
+            ['x'], list(OUTPUTS))
+
+    @property
+    def x0(self) -> np.ndarray:
+        """Values of the design variables of the aircraft"""
+        return np.array(
+            [getattr(self.batch, PATH_FIELDS[path])[0] for path in self.paths])
+
+    def evaluate(self, x: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Size many designs in one call of the graph.
+        :param x: Values of the design variables, shape (k,) or (n, k)
+        :return: Value per output, shape (n,)
+        """
+        x = np.atleast_2d(np.asarray(x, dtype=float))
+        results = self.function.map(len(x))(x.T)
+        return {
+            output: np.asarray(value).ravel()
+            for output, value in zip(OUTPUTS, results)
+        }
+
+    def jacobian(self, x: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        Exact derivatives of the sized outputs of a design.
+        :param x: Values of the design variables, shape (k,)
+        :return: Gradient per output with respect to x, shape (k,)
+        """
+        results = self.jacobian_function(np.asarray(x, dtype=float))
+        return {
+            output: np.asarray(value).ravel()
+            for output, value in zip(OUTPUTS, results)
+        }
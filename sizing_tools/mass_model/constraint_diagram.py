@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+from scipy.constants import g
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.formula.constraint import climb_power_loading, cruise_power_loading, stall_wing_loading, \
+    vertical_climb_power_loading
+
+C_L_MAX = 1.1
+# Wing loading grid in N/m^2 of the Class I diagram
+DEFAULT_WING_LOADING = np.arange(1, 2000)
+# Power loading constraints of the diagram, by their attribute on ConstraintDiagram
+POWER_CONSTRAINTS = {
+    'cruise': 'Cruise',
+    'vertical_climb': 'Vertical Climb',
+    'climb': 'Cruise Climb',
+}
+
+
+def _value(aircraft: Aircraft, path: str) -> float:
+    obj = aircraft
+    for attribute in path.split('.'):
+        obj = getattr(obj, attribute) if obj is not None else None
+    return np.nan if obj is None else obj
+
+
+@dataclass
+class ConstraintInputs:
+    """
+    Struct-of-arrays of the parameters of the constraint diagram, every field has shape (n,).
+
+    A NaN wing area is sized from the total mass at the stall wing loading, which is also what ClassIModel does before
+    evaluating the vertical climb constraint.
+    """
+    cruise_velocity: np.ndarray
+    estimated_CD0: np.ndarray
+    aspect_ratio: np.ndarray
+    oswald_efficiency_factor: np.ndarray
+    propulsion_efficiency: np.ndarray
+    figure_of_merit: np.ndarray
+    v_stall: np.ndarray
+    cruise_altitude: np.ndarray
+    rate_of_climb: np.ndarray
+    climb_vertical_speed: np.ndarray
+    takeoff_load_factor: np.ndarray
+    TA: np.ndarray
+    s_fus: np.ndarray
+    wing_area: np.ndarray
+    total_mass: np.ndarray
+    power_setting: np.ndarray
+    mtow_setting: np.ndarray
+
+    @classmethod
+    def from_aircraft(cls,
+                      aircraft: Aircraft | list[Aircraft],
+                      power_setting: float = 0.75,
+                      mtow_setting: float = 1,
+                      **overrides) -> 'ConstraintInputs':
+        """
+        Collect the parameters of one or more aircraft. Overrides are broadcast against the aircraft, so a single
+        aircraft with an array of aspect ratios gives one set of constraints per aspect ratio.
+        :param aircraft: Aircraft or list of aircraft to take the base values from
+        :param power_setting: Fraction of the maximum power used in cruise
+        :param mtow_setting: Fraction of the MTOW in cruise
+        :param overrides: Arrays or scalars replacing the values of the aircraft, by field name
+        :return: ConstraintInputs
+        """
+        aircraft_list = aircraft if isinstance(aircraft, list) else [aircraft]
+        paths = {
+            'aspect_ratio': 'wing.aspect_ratio',
+            'oswald_efficiency_factor': 'wing.oswald_efficiency_factor',
+            'wing_area': 'wing.area',
+        }
+        data = {
+            field.name:
+            np.array([
+                _value(ac, paths.get(field.name, field.name))
+                for ac in aircraft_list
+            ],
+                     dtype=float)
+            for field in fields(cls)
+            if field.name not in ('climb_vertical_speed', 'power_setting',
+                                  'mtow_setting')
+        }
+        data['climb_vertical_speed'] = np.array([
+            ac.mission_profile.phases[Phase.CLIMB].vertical_speed
+            for ac in aircraft_list
+        ],
+                                                dtype=float)
+        data['power_setting'] = power_setting
+        data['mtow_setting'] = mtow_setting
+
+        unknown = set(overrides) - set(data)
+        if unknown:
+            raise ValueError(f'Unknown constraint input fields: {unknown}')
+        data.update(overrides)
+        n, = np.broadcast_shapes(*(np.shape(value) for value in data.values()))
+        return cls(
+            **{
+                key:
+                np.array(np.broadcast_to(np.asarray(value, dtype=float), (
+                    n, )))
+                for key, value in data.items()
+            })
+
+    def __len__(self) -> int:
+        return len(self.cruise_velocity)
+
+    def __getitem__(self, item) -> 'ConstraintInputs':
+        return ConstraintInputs(
+            **{
+                field.name: np.atleast_1d(getattr(self, field.name)[item])
+                for field in fields(self)
+            })
+
+
+@dataclass
+class ConstraintDiagram:
+    """
+    W/P-W/S diagram of n aircraft over a grid of m wing loadings. The power loading constraints have shape (n, m), the
+    stall wing loading shape (n,). A design is feasible below the stall wing loading and below all power loading
+    constraints.
+    """
+    wing_loading: np.ndarray
+    stall: np.ndarray
+    cruise: np.ndarray
+    vertical_climb: np.ndarray
+    climb: np.ndarray
+
+    @property
+    def power_loading(self) -> np.ndarray:
+        """Maximum feasible power loading in N/W per aircraft and wing loading, NaN above the stall wing loading"""
+        envelope = np.minimum(np.minimum(self.cruise, self.vertical_climb),
+                              self.climb)
+        return np.where(self.feasible, envelope, np.nan)
+
+    @property
+    def feasible(self) -> np.ndarray:
+        """Wing loadings of the grid that satisfy the stall constraint, shape (n, m)"""
+        return self.wing_loading <= self.stall[:, None]
+
+    def design_point(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Design point with the highest feasible power loading (lowest power) of each aircraft, on the grid.
+        :return: Wing loading in N/m^2 and power loading in N/W, both of shape (n,); NaN if no wing loading is feasible
+        """
+        power_loading = self.power_loading
+        best = np.argmax(np.where(np.isnan(power_loading), -np.inf,
+                                  power_loading),
+                         axis=1)
+        rows = np.arange(len(best))
+        wing_loading = np.broadcast_to(self.wing_loading, power_loading.shape)
+        return (np.where(self.feasible[rows, best], wing_loading[rows, best],
+                         np.nan), power_loading[rows, best])
+
+
+def constraint_diagram(
+        inputs: ConstraintInputs,
+        wing_loading: np.ndarray = DEFAULT_WING_LOADING) -> ConstraintDiagram:
+    """
+    Evaluate all constraints of the W/P-W/S diagram for a batch of aircraft at once.
+    :param inputs: Parameters of n aircraft
+    :param wing_loading: Wing loading grid in N/m^2, shape (m,), or (n, m) for a grid per aircraft
+    :return: ConstraintDiagram
+    """
+    wing_loading = np.asarray(wing_loading, dtype=float)
+    # like ClassIModel, an aircraft without cruise altitude cruises at sea level
+    rho = density(np.nan_to_num(inputs.cruise_altitude))
+    stall = stall_wing_loading(inputs.v_stall, rho, C_L_MAX)
+    wing_area = np.where(np.isnan(inputs.wing_area),
+                         inputs.total_mass * g / stall, inputs.wing_area)
+    column = lambda values: values[:, None]
+    return ConstraintDiagram(
+        wing_loading=wing_loading,
+        stall=stall,
+        cruise=cruise_power_loading(wing_loading,
+                                    column(inputs.cruise_velocity),
+                                    column(inputs.estimated_CD0),
+                                    column(inputs.aspect_ratio),
+                                    column(inputs.oswald_efficiency_factor),
+                                    column(inputs.propulsion_efficiency),
+                                    column(rho),
+                                    density(),
+                                    power_setting=column(inputs.power_setting),
+                                    mtow_setting=column(inputs.mtow_setting)),
+        vertical_climb=vertical_climb_power_loading(
+            wing_loading, column(inputs.takeoff_load_factor),
+            column(inputs.climb_vertical_speed), column(inputs.s_fus),
+            column(wing_area), column(inputs.figure_of_merit),
+            column(inputs.propulsion_efficiency), column(inputs.TA),
+            column(rho)),
+        climb=climb_power_loading(wing_loading, column(inputs.rate_of_climb),
+                                  column(inputs.estimated_CD0),
+                                  column(inputs.aspect_ratio),
+                                  column(inputs.oswald_efficiency_factor),
+                                  column(inputs.propulsion_efficiency),
+                                  column(rho)))
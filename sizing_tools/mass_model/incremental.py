@@ -0,0 +1,293 @@
+"""
+Incremental re-sizing of one aircraft after edits of single parameters.
+
+IncrementalSizing splits the sizing of Iteration.run into the sub-models of the functional core in
+classII/evaluation.py, as nodes of a dependency graph. Every node declares the design point paths it reads and the
+nodes whose results it uses. An edit only marks the nodes that depend on the edited paths as dirty, and asking for a
+result only recomputes the dirty nodes it needs. The mass closure is warm started from the previous converged total
+mass, with the takeoff power kept at the one sized at the initial guess, so the results match those of Iteration.
+
+    sizing = IncrementalSizing(concept_C2_1)
+    sizing.result.total_mass
+    sizing.update({'tail.S_th': 3.5})      # the propulsion system and the takeoff power stay valid
+    sizing.result.mass_breakdown['airframe']['horizontal_tail']
+    sizing.what_if(payload_mass=450).total_mass    # evaluated without changing the state
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.mass_model.classII.closure import ClosureResult, mass_closure
+from sizing_tools.mass_model.classII.evaluation import AIRFRAME_GROUPS, ClassIIResult, airframe_closure, \
+    PhaseResult, apply_result, battery_mass, class_II_result, phase_results, propulsion_masses, takeoff_power
+from utility.log import solver_logger
+
+# Design point paths read by the sub-models, a path also stands for all paths below it
+PHASE_PATHS = ('mission_profile', 'cruise_velocity', 'estimated_CD0', 'wing',
+               'propulsion_efficiency', 'propeller_radius', 'motor_prop_count',
+               'figure_of_merit')
+BATTERY_PATHS = ('battery_energy_density', 'battery_system_efficiency',
+                 'SoC_min')
+PROPULSION_PATHS = ('motor_power_margin', 'motor_prop_count',
+                    'propeller_radius', 'propeller_blade_number')
+AIRFRAME_PATHS = {
+    'fuselage':
+    ('fuselage.length', 'fuselage.maximum_section_perimeter', 'n_pax'),
+    'wing': ('wing', 'design_load_factor'),
+    'horizontal_tail': ('tail.S_th', 'tail.AR_th', 'tail.t_rh'),
+    'vertical_tail':
+    ('tail.S_tv', 'tail.AR_tv', 'tail.t_rv', 'tail.lambda_quart_tv'),
+    'landing_gear': ('tail.l_lg', 'tail.eta_lg'),
+}
+
+
+@dataclass(frozen=True)
+class Node:
+    name: str
+    # called with the aircraft and the values of the nodes, in order
+    function: Callable[..., Any]
+    nodes: tuple[str, ...] = ()
+    paths: tuple[str, ...] = ()
+
+
+class IncrementalSizing:
+    """
+    Class II sizing of an aircraft that only recomputes what an edit affects.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 initial_guess: float = 1500,
+                 tolerance: float = 1e-6,
+                 max_iterations: int = 100,
+                 tol_classII: float = 1e-8,
+                 max_iterations_classII: int = 500,
+                 method: str = 'newton'):
+        """
+        :param aircraft: Aircraft or design point to size
+        :param initial_guess: Initial total mass in kg, at which the takeoff power is sized, see Iteration
+        :param tolerance: Convergence tolerance on the total mass in kg
+        :param max_iterations: Maximum number of iterations of the mass closure
+        :param tol_classII: Relative tolerance of the Class II fixed point iteration
+        :param max_iterations_classII: Maximum number of iterations of the Class II fixed point iteration
+        :param method: 'newton' or 'anderson', see closure.mass_closure
+        """
+        point = aircraft if isinstance(
+            aircraft, DesignPoint) else DesignPoint.from_aircraft(aircraft)
+        # like Iteration, the total mass of the aircraft is the initial guess
+        self.point = point.replace(total_mass=initial_guess)
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.tol_classII = tol_classII
+        self.max_iterations_classII = max_iterations_classII
+        self.method = method
+        airframe_paths = tuple(path for paths in AIRFRAME_PATHS.values()
+                               for path in paths)
+        nodes = [
+            Node('takeoff_power',
+                 lambda aircraft: takeoff_power(aircraft, aircraft.total_mass),
+                 paths=('total_mass', 'mission_profile.TAKEOFF',
+                        'propeller_radius', 'motor_prop_count',
+                        'figure_of_merit')),
+            Node('propulsion',
+                 propulsion_masses,
+                 nodes=('takeoff_power', ),
+                 paths=PROPULSION_PATHS),
+            Node('closure',
+                 self._closure,
+                 nodes=('takeoff_power', ),
+                 paths=(*PHASE_PATHS, *BATTERY_PATHS, *PROPULSION_PATHS,
+                        *airframe_paths, 'payload_mass')),
+            Node('phases',
+                 lambda aircraft, closure, power: phase_results(
+                     aircraft, closure.total_mass, power),
+                 nodes=('closure', 'takeoff_power'),
+                 paths=PHASE_PATHS),
+            Node('battery',
+                 battery_mass,
+                 nodes=('phases', ),
+                 paths=BATTERY_PATHS),
+            Node('total_mass',
+                 self._total_mass,
+                 nodes=('closure', 'battery', 'propulsion'),
+                 paths=(*airframe_paths, 'payload_mass')),
+            *(Node(f'{group}_mass',
+                   law,
+                   nodes=('total_mass', ),
+                   paths=AIRFRAME_PATHS[group])
+              for group, law in AIRFRAME_GROUPS.items()),
+            Node('result',
+                 self._result,
+                 nodes=('closure', 'takeoff_power', 'phases', 'battery',
+                        'propulsion', 'total_mass',
+                        *(f'{group}_mass' for group in AIRFRAME_GROUPS)),
+                 paths=('payload_mass', 'propeller_radius',
+                        'motor_prop_count')),
+        ]
+        self.nodes = {node.name: node for node in nodes}
+        for node in nodes:
+            unknown = [path for path in node.paths if not self._matching(path)]
+            if unknown:
+                raise ValueError(
+                    f'{node.name} reads {unknown}, which are not design point paths'
+                )
+        self._values: dict[str, Any] = {}
+        self._dirty = set(self.nodes)
+        self._aircraft: Aircraft | None = None
+        self.recomputed: list[str] = []
+
+    def _matching(self, path: str) -> list[str]:
+        """Design point paths equal to or below a path"""
+        return [
+            p for p in self.point.schema.paths
+            if p == path or p.startswith(f'{path}.')
+        ]
+
+    def dependents(self, path: str, transitive: bool = True) -> set[str]:
+        """
+        Nodes affected by an edit of a design point path.
+        :param path: Design point path, e.g. 'tail.S_th'
+        :param transitive: Also the nodes that depend on the affected nodes
+        :return: Names of the nodes
+        """
+        affected = {
+            node.name
+            for node in self.nodes.values()
+            if any(path == p or path.startswith(f'{p}.') for p in node.paths)
+        }
+        while transitive:
+            downstream = {
+                node.name
+                for node in self.nodes.values()
+                if affected.intersection(node.nodes)
+            } - affected
+            if not downstream:
+                break
+            affected |= downstream
+        return affected
+
+    def _overrides(self, overrides: dict[str, float] | None,
+                   kwargs: dict[str, float]) -> dict[str, float]:
+        overrides = {**(overrides or {}), **kwargs}
+        index = self.point.schema.index
+        unknown = [path for path in overrides if path not in index]
+        if unknown:
+            raise ValueError(f'{unknown} are not design point paths')
+        return overrides
+
+    def update(self,
+               overrides: dict[str, float] = None,
+               **kwargs: float) -> set[str]:
+        """
+        Edit design point paths; the affected nodes are recomputed when their results are needed.
+        :param overrides: New values by design point path, e.g. {'wing.span': 12}
+        :param kwargs: New values of top-level Aircraft fields
+        :return: Names of the nodes marked dirty
+        """
+        overrides = self._overrides(overrides, kwargs)
+        changed = {
+            path: value
+            for path, value in overrides.items()
+            if not self.point[path] == value
+        }
+        dirty = set()
+        for path in changed:
+            dirty |= self.dependents(path)
+        self.point = self.point.replace(changed)
+        if self._aircraft is not None:
+            # the aircraft is edited in place, building a new one costs more than most re-sizings
+            self.point.update_aircraft(self._aircraft, changed)
+        self._dirty |= dirty
+        return dirty
+
+    def what_if(self,
+                overrides: dict[str, float] = None,
+                **kwargs: float) -> ClassIIResult:
+        """
+        Result of an edit, without keeping it; the cached results of the current design stay valid.
+        :param overrides: New values by design point path
+        :param kwargs: New values of top-level Aircraft fields
+        :return: ClassIIResult of the edited design
+        """
+        # unknown paths raise before any state is changed
+        overrides = self._overrides(overrides, kwargs)
+        point, values, dirty = self.point, dict(self._values), set(self._dirty)
+        try:
+            self.update(overrides)
+            return self.result
+        finally:
+            self.point, self._values, self._dirty = point, values, dirty
+            if self._aircraft is not None:
+                point.update_aircraft(self._aircraft, overrides)
+
+    @property
+    def aircraft(self) -> Aircraft:
+        """Aircraft of the current design point, the sub-models read their inputs from"""
+        if self._aircraft is None:
+            self._aircraft = self.point.to_aircraft()
+        return self._aircraft
+
+    def __getitem__(self, name: str) -> Any:
+        """Value of a node, recomputing it and the dirty nodes it depends on"""
+        if name not in self.nodes:
+            raise KeyError(f'Unknown node {name}')
+        if name in self._dirty:
+            node = self.nodes[name]
+            inputs = [self[dependency] for dependency in node.nodes]
+            self._values[name] = node.function(self.aircraft, *inputs)
+            self._dirty.discard(name)
+            self.recomputed.append(name)
+        return self._values[name]
+
+    @property
+    def result(self) -> ClassIIResult:
+        self.recomputed = []
+        result = self['result']
+        if self.recomputed:
+            solver_logger.debug('Recomputed %s', self.recomputed)
+        return result
+
+    @property
+    def closure(self) -> ClosureResult:
+        return self['closure']
+
+    def sized_aircraft(self) -> Aircraft:
+        """
+        :return: A new Aircraft of the current design point with the sizing results, like Iteration.run
+        """
+        aircraft = self.point.to_aircraft()
+        return apply_result(aircraft, self.result)
+
+    def _closure(self, aircraft: Aircraft, power: float) -> ClosureResult:
+        # warm started from the previous solution, the takeoff power stays the one of the initial guess
+        previous = self._values.get('closure')
+        return mass_closure(aircraft,
+                            aircraft.total_mass if previous is None
+                            or not previous.converged else previous.total_mass,
+                            tolerance=self.tolerance,
+                            maxiter=self.max_iterations,
+                            method=self.method,
+                            fixed_takeoff_power=power)
+
+    def _total_mass(self, aircraft: Aircraft, closure: ClosureResult,
+                    battery: float, propulsion: dict[str, float]) -> float:
+        # the airframe fixed point of evaluate, started at the closure solution
+        return airframe_closure(aircraft, battery + propulsion['total'],
+                                closure.total_mass, self.tol_classII,
+                                self.max_iterations_classII)
+
+    @staticmethod
+    def _result(aircraft: Aircraft, closure: ClosureResult, power: float,
+                phases: tuple[PhaseResult,
+                              ...], battery: float, propulsion: dict[str,
+                                                                     float],
+                total_mass: float, *airframe: float) -> ClassIIResult:
+        masses = dict(zip(AIRFRAME_GROUPS, airframe))
+        return class_II_result(aircraft, closure.total_mass, power, phases,
+                               battery, propulsion, total_mass, {
+                                   'total': sum(masses.values()),
+                                   **masses
+                               })
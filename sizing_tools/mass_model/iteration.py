@@ -1,24 +1,33 @@
-import copy
+from __future__ import annotations
 
-from matplotlib import pyplot as plt
+from typing import TYPE_CHECKING
 
 from data.concept_parameters.aircraft import Aircraft
-from data.concept_parameters.concepts import concept_C1_5, concept_C2_1, concept_C2_6, all_concepts
-from data.literature.evtols import joby_s4
+from data.concept_parameters.design_point import DesignPoint, as_aircraft
+from sizing_tools.cache import SizingCache, canonical_hash, sizing_cache
 from sizing_tools.mass_model.classI import ClassIModel
 from sizing_tools.mass_model.classII.classII import ClassIIModel
-from sizing_tools.misc_plots.mass_breakdown import plot_mass_breakdown
+from sizing_tools.mass_model.classII.closure import ClosureResult, mass_closure
+from sizing_tools.mass_model.classII.evaluation import apply_result, evaluate
 from sizing_tools.model import Model
-from utility.log import logger
+from utility.log import logger, solver_logger
 from utility.plotting import show
+from utility.profiling import stage
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 
 class Iteration(Model):
 
-    def __init__(self, aircraft: Aircraft, initial_guess: float = 1500):
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 initial_guess: float = 1500):
+        aircraft = as_aircraft(aircraft)
         aircraft.total_mass = initial_guess
         super().__init__(aircraft)
         self.aircraft_list = []
+        self.closure: ClosureResult | None = None
 
     @property
     def necessary_parameters(self) -> list[str]:
@@ -33,17 +42,53 @@ class Iteration(Model):
             'total_mass',
         ]
 
+    @stage('iteration.run')
     def run(self,
             tolerance: float = 1e-6,
             max_iterations: int = 100,
             tol_classII: float = 1e-8,
-            max_iterations_classII: int = 500) -> Aircraft:
-        logger.debug('Starting fixed point iteration')
+            max_iterations_classII: int = 500,
+            method: str = 'newton',
+            cache: SizingCache | None = sizing_cache) -> Aircraft:
+        """
+        Size the aircraft by solving the mass closure.
+        :param tolerance: Convergence tolerance on the total mass in kg
+        :param max_iterations: Maximum number of iterations of the mass closure
+        :param tol_classII: Relative tolerance of the Class II fixed point iteration
+        :param max_iterations_classII: Maximum number of iterations of the Class II fixed point iteration
+        :param method: 'newton' or 'anderson' for the accelerated solver in closure.py, 'nested' for repeated Class II
+        fixed point iterations
+        :param cache: Cache of the results of the accelerated solvers, None to always solve
+        :return: The sized aircraft
+        """
+        solver_logger.debug('Starting fixed point iteration')
         if self.aircraft.total_mass is None:
             logger.warning(f"Total mass is not defined for {self.aircraft.id}")
             self.aircraft.total_mass = 1500
+        if method != 'nested':
+            key = self._cache_key(cache, method, tolerance, max_iterations,
+                                  tol_classII, max_iterations_classII)
+            cached = cache.get(key) if key is not None else None
+            if cached is None:
+                closure = mass_closure(self.aircraft,
+                                       self.aircraft.total_mass,
+                                       tolerance=tolerance,
+                                       maxiter=max_iterations,
+                                       method=method)
+                result = evaluate(self.aircraft,
+                                  closure.total_mass,
+                                  xtol=tol_classII,
+                                  maxiter=max_iterations_classII,
+                                  fixed_takeoff_power=closure.takeoff_power)
+                if key is not None:
+                    cache.put(key, (closure, result))
+            else:
+                closure, result = cached
+            self.closure = closure
+            apply_result(self.aircraft, result)
+            return self.aircraft
         for i in range(max_iterations):
-            logger.debug(f'Iteration {i}')
+            solver_logger.debug('Iteration %d', i)
             old_total_mass = self.aircraft.total_mass
             ClassIIModel(self.aircraft).total_mass(
                 xtol=tol_classII, maxiter=max_iterations_classII)
@@ -52,8 +97,19 @@ class Iteration(Model):
                 break
         return self.aircraft
 
+    def _cache_key(self, cache: SizingCache | None, *settings) -> str | None:
+        if cache is None or not cache.enabled:
+            return None
+        try:
+            point = DesignPoint.from_aircraft(self.aircraft)
+        except ValueError:
+            return None
+        return canonical_hash('Iteration.run', point, settings)
+
     @show
     def plot_iteration_data(self) -> tuple[plt.Figure, plt.Axes]:
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots()
 
         total_masses = [aircraft.total_mass for aircraft in self.aircraft_list]
@@ -73,6 +129,9 @@ class Iteration(Model):
 
 
 if __name__ == '__main__':
+    from data.concept_parameters.concepts import all_concepts
+    from sizing_tools.misc_plots.mass_breakdown import plot_mass_breakdown
+
     # all_concepts.append(joby_s4)
     for concept in all_concepts:
         iteration = Iteration(concept)
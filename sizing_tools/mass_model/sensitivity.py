@@ -1,5 +1,4 @@
 from concurrent.futures import ThreadPoolExecutor
-from copy import deepcopy
 from typing import Callable
 
 import numpy as np
@@ -7,21 +6,27 @@ import pandas as pd
 from matplotlib import pyplot as plt
 
 from data.concept_parameters.aircraft import Aircraft
-from data.literature.evtol_performance import plot_mass_over_payload as plot_mass_over_payload_data, vtol_data
+from data.concept_parameters.design_point import DesignPoint
+from data.literature.evtol_performance import plot_mass_over_payload as plot_mass_over_payload_data, load_vtol_data
 from data.literature.evtol_performance import plot_range_over_mass as plot_range_over_mass_data
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
 from sizing_tools.mass_model.iteration import Iteration
+from sizing_tools.sweep import DesignSweep
 from utility.plotting import show, save, save_with_name
-from utility.unit_conversion import convert_float
+from utility.unit_conversion import convert_float, convert_array
 
 
 class MassEstimation:
 
     def __init__(self, initial_aircraft: Aircraft):
         self.initial_aircraft = initial_aircraft
+        self.initial_point = DesignPoint.from_aircraft(initial_aircraft)
 
     def mass_over(self, array: np.ndarray,
                   ac_func: Callable[[float], Aircraft]) -> np.ndarray:
         Iteration(self.initial_aircraft).run()
+        # the variants start from the sized aircraft, which has its takeoff power set
+        self.initial_point = DesignPoint.from_aircraft(self.initial_aircraft)
         with ThreadPoolExecutor() as executor:
             mass = list(
                 executor.map(
@@ -30,6 +35,15 @@ class MassEstimation:
                     run(tolerance=1e-5, tol_classII=1e-6).total_mass, array))
         return np.array(mass)
 
+    def batch_mass_over(self, **overrides: np.ndarray) -> np.ndarray:
+        """
+        Total mass over arrays of design parameters, solved as one vectorized batch.
+        :param overrides: Arrays of DesignBatch fields (or range in m) to sweep
+        :return: Total mass in kg per design point
+        """
+        batch = DesignBatch.from_aircraft(self.initial_aircraft, **overrides)
+        return BatchClassIIModel(batch).total_mass(xtol=1e-6).total_mass
+
     @show
     @save
     def plot_total_mass_over_payload(self) -> tuple[plt.Figure, plt.Axes]:
@@ -52,35 +66,35 @@ class MassEstimation:
 
     def plot_mass_over_payload(self, ax: plt.Axes) -> plt.Axes:
         payloads = np.linspace(80, 500, 21)  # kg
-        masses = self.mass_over(payloads, self.ac_func_payload)
+        masses = self.batch_mass_over(payload_mass=payloads)
         ax.plot(payloads, masses, label=self.initial_aircraft.full_name)
         return ax
 
     def plot_range_over_mass(self, ax: plt.Axes) -> plt.Axes:
         ranges = np.linspace(50, 250, 21)  # km
-        masses = self.mass_over(ranges, self.ac_func_range)
+        masses = self.batch_mass_over(range=convert_array(ranges, 'km', 'm'))
         ax.plot(ranges, masses, label=self.initial_aircraft.full_name)
         return ax
 
     @show
     @save_with_name(
         lambda self: f'{self.initial_aircraft.id}_mass_over_payload_and_range')
-    def plot_mass_over_payload_and_range(self) -> tuple[plt.Figure, plt.Axes]:
+    def plot_mass_over_payload_and_range(self,
+                                         resolution: int = 11
+                                         ) -> tuple[plt.Figure, plt.Axes]:
         fig, ax = plt.subplots(figsize=(10, 6))
-        payloads = np.linspace(80, 500, 11)  # kg
-        ranges = np.linspace(50, 200, 11)  # km
+        payloads = np.linspace(80, 500, resolution)  # kg
+        ranges = np.linspace(50, 200, resolution)  # km
 
         # Create a grid of payload and range values
         payload_grid, range_grid = np.meshgrid(payloads, ranges)
 
         # Calculate the corresponding mass for each pair of payload and range
-        mass_grid = self.mass_over([
-            (payload, r)
-            for payload, r in zip(np.ravel(payload_grid), np.ravel(range_grid))
-        ], self.ac_func_payload_range)
-
-        # Reshape the mass values to match the shape of the payload and range grids
-        mass_grid = mass_grid.reshape(payload_grid.shape)
+        results = DesignSweep(self.initial_aircraft, {
+            'range': convert_array(ranges, 'km', 'm'),
+            'payload_mass': payloads
+        }).run().load()
+        mass_grid = results['total_mass'].reshape(payload_grid.shape)
 
         # Create a contour plot
         contour = ax.contourf(payload_grid,
@@ -105,28 +119,28 @@ class MassEstimation:
         return fig, ax
 
     def ac_func_payload(self, payload: float) -> Aircraft:
-        aircraft = deepcopy(self.initial_aircraft)
-        aircraft.payload_mass = payload
-        return aircraft
+        return self.initial_point.replace(payload_mass=payload).to_aircraft()
 
     def ac_func_range(self, r: float) -> Aircraft:
-        aircraft = deepcopy(self.initial_aircraft)
-        distance = convert_float(r, 'km', 'm')
-        aircraft.mission_profile.CRUISE.distance = distance
-        aircraft.mission_profile.CRUISE.duration = distance / aircraft.mission_profile.CRUISE.horizontal_speed
-        return aircraft
+        return self._range_point(self.initial_point, r).to_aircraft()
 
     def ac_func_payload_range(self, payload: float, r: float) -> Aircraft:
-        aircraft = deepcopy(self.initial_aircraft)
-        aircraft.payload_mass = payload
+        return self._range_point(
+            self.initial_point.replace(payload_mass=payload), r).to_aircraft()
+
+    @staticmethod
+    def _range_point(point: DesignPoint, r: float) -> DesignPoint:
         distance = convert_float(r, 'km', 'm')
-        aircraft.mission_profile.CRUISE.distance = distance
-        aircraft.mission_profile.CRUISE.duration = distance / aircraft.mission_profile.CRUISE.horizontal_speed
-        return aircraft
+        return point.replace({
+            'mission_profile.CRUISE.distance':
+            distance,
+            'mission_profile.CRUISE.duration':
+            distance / point['mission_profile.CRUISE.horizontal_speed'],
+        })
 
 
 def reduced_vtol_data() -> pd.DataFrame:
-    df = vtol_data.copy()
+    df = load_vtol_data().copy()
     return df
 
 
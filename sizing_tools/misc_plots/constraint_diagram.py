@@ -0,0 +1,29 @@
+import matplotlib.pyplot as plt
+
+from sizing_tools.mass_model.constraint_diagram import POWER_CONSTRAINTS, ConstraintDiagram
+
+
+def plot_constraint_diagram(
+        diagram: ConstraintDiagram,
+        index: int = 0,
+        ax: plt.Axes = None) -> tuple[plt.Figure, plt.Axes]:
+    """
+    Plot the W/P-W/S diagram of one aircraft of a batch.
+    :param diagram: Constraint diagram of a batch of aircraft
+    :param index: Aircraft of the batch to plot
+    :param ax: Axes to plot in, a new figure if None
+    """
+    if ax is None:
+        fig, ax = plt.subplots(figsize=(6, 6))
+    else:
+        fig = ax.figure
+    wing_loading = diagram.wing_loading if diagram.wing_loading.ndim == 1 else diagram.wing_loading[
+        index]
+
+    ax.axvline(x=diagram.stall[index], label=' Stall Speed', color='red')
+    for constraint, label in POWER_CONSTRAINTS.items():
+        ax.plot(wing_loading, getattr(diagram, constraint)[index], label=label)
+    ax.set_xlabel('W/S [N/m$^2$]')
+    ax.set_ylabel('W/P [N/W]')
+    ax.legend(loc='upper right')
+    return fig, ax
@@ -21,7 +21,7 @@ def plot_energy_breakdown_per_phase(
         if phase.energy > 0
     ]
     labels = [
-        phase.phase.value.replace('_', ' ').capitalize()
+        phase.name.lower().replace('_', ' ').capitalize()
         for phase in aircraft.mission_profile.phases.values()
         if phase.energy > 0
     ]
@@ -0,0 +1,206 @@
+"""
+Headless report of all figures of a set of concepts.
+
+The concepts are sized once in this process, after which the figures are drawn with the Agg backend in a process
+pool and written to explicit paths: <output_dir>/<aircraft id>_<figure>.<format>. A manifest in the output directory
+records the hash of the data and plotting code of every figure, so that only figures whose inputs changed are drawn
+again. Run `python -m sizing_tools.misc_plots.report [output_dir]` to regenerate the report of all concepts.
+"""
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
+
+from data.concept_parameters.aircraft import Aircraft
+from sizing_tools.cache import canonical_hash
+from sizing_tools.mass_model.iteration import Iteration
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+# Default output directory, next to the figures of the @save decorator
+REPORT_PATH = Path(__file__).resolve().parents[2] / 'figures' / 'report'
+MANIFEST = 'manifest.json'
+
+
+@dataclass(frozen=True)
+class ReportFigure:
+    # 'module:function' of the plot function, imported in the worker processes so that the main process does not
+    # import matplotlib
+    plot: str
+    # Data of a sized aircraft the figure is drawn from
+    inputs: Callable[[Aircraft], Any]
+    # Modules whose source code the figure depends on, besides the one of the plot function
+    modules: tuple[str, ...] = ()
+
+
+@dataclass
+class ReportResult:
+    rendered: list[Path] = field(default_factory=list)
+    unchanged: list[Path] = field(default_factory=list)
+    failed: dict[Path, str] = field(default_factory=dict)
+
+
+def _full_aircraft(aircraft: Aircraft) -> dict:
+    return aircraft.model_dump()
+
+
+def plot_wp_ws(aircraft: Aircraft) -> tuple[plt.Figure, plt.Axes]:
+    """W/P-W/S diagram of the Class I model, without saving it"""
+    from sizing_tools.mass_model.classI import ClassIModel
+
+    return inspect.unwrap(ClassIModel.plot_wp_ws)(ClassIModel(aircraft))
+
+
+FIGURES = {
+    'mass_breakdown':
+    ReportFigure('sizing_tools.misc_plots.mass_breakdown:plot_mass_breakdown',
+                 lambda aircraft: aircraft.mass_breakdown_dict),
+    'energy_breakdown':
+    ReportFigure(
+        'sizing_tools.misc_plots.energy_distribution:plot_energy_breakdown_per_phase',
+        lambda aircraft: [(phase.name, phase.energy)
+                          for phase in aircraft.mission_profile.phases.values(
+                          )]),
+    'loading_diagram':
+    ReportFigure('sizing_tools.misc_plots.hinge_loading:plot_load',
+                 _full_aircraft,
+                 modules=('sizing_tools.hinge_loading', )),
+    'wp_ws':
+    ReportFigure('sizing_tools.misc_plots.report:plot_wp_ws',
+                 _full_aircraft,
+                 modules=('sizing_tools.mass_model.classI',
+                          'sizing_tools.mass_model.constraint_diagram',
+                          'sizing_tools.formula.constraint',
+                          'sizing_tools.misc_plots.constraint_diagram')),
+}
+
+
+def _source(module: str) -> bytes:
+    # read without importing, plotting modules import matplotlib
+    return Path(importlib.util.find_spec(module).origin).read_bytes()
+
+
+def figure_key(name: str, aircraft: Aircraft, format: str) -> str:
+    """Hash of everything a figure is drawn from: its data, the plotting code and the plot settings"""
+    figure = FIGURES[name]
+    modules = (figure.plot.split(':')[0], *figure.modules,
+               'utility.plotting.plot_settings')
+    return canonical_hash('report', name, format, figure.inputs(aircraft),
+                          [_source(module).decode() for module in modules])
+
+
+def solve(concepts: list[Aircraft]) -> list[Aircraft]:
+    """Size copies of the concepts"""
+    return [Iteration(deepcopy(concept)).run() for concept in concepts]
+
+
+def _init_worker():
+    import matplotlib
+
+    matplotlib.use('Agg')
+
+
+def _render(plot: str, aircraft: Aircraft, path: Path) -> str | None:
+    """Draw one figure and write it to path, return the error message if it could not be drawn"""
+    import matplotlib.pyplot as plt
+
+    from utility.plotting import apply_plot_params
+
+    module, function = plot.split(':')
+    plot_function = inspect.unwrap(
+        getattr(importlib.import_module(module), function))
+    apply_plot_params()
+    try:
+        fig, _ = plot_function(aircraft)
+    except (ValueError, TypeError, KeyError) as e:
+        plt.close('all')
+        return f'{type(e).__name__}: {e}'
+    fig.tight_layout()
+    temporary = path.with_name(f'.{path.name}')
+    # without a creation date the same figure is written to the same bytes
+    fig.savefig(
+        temporary,
+        format=path.suffix[1:],
+        bbox_inches='tight',
+        metadata={'CreationDate': None} if path.suffix == '.pdf' else None)
+    os.replace(temporary, path)
+    plt.close(fig)
+    return None
+
+
+def render_report(concepts: list[Aircraft],
+                  output_dir: Path | str = REPORT_PATH,
+                  figures: tuple[str, ...] = tuple(FIGURES),
+                  format: str = 'pdf',
+                  max_workers: int = None,
+                  force: bool = False) -> ReportResult:
+    """
+    Size the concepts and draw their figures, skipping figures whose inputs did not change since the last report.
+    :param concepts: Aircraft to report on
+    :param output_dir: Directory of the figures and the manifest
+    :param figures: Names of the figures in FIGURES to draw for every concept
+    :param format: File format, e.g. 'pdf', 'png' or 'svg'
+    :param max_workers: Number of worker processes, drawn in this process, with its backend, if 1
+    :param force: Draw all figures, even the unchanged ones
+    :return: ReportResult with the paths of the drawn, unchanged and failed figures
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_dir / MANIFEST
+    manifest = json.loads(
+        manifest_file.read_text()) if manifest_file.exists() else {}
+
+    result = ReportResult()
+    jobs = []
+    for aircraft in solve(concepts):
+        for name in figures:
+            path = output_dir / f'{aircraft.id}_{name}.{format}'
+            key = figure_key(name, aircraft, format)
+            if not force and path.exists() and manifest.get(path.name) == key:
+                result.unchanged.append(path)
+            else:
+                jobs.append((FIGURES[name].plot, aircraft, path, key))
+    logger.info(
+        f'Drawing {len(jobs)} figures, {len(result.unchanged)} unchanged')
+
+    plots, aircraft, paths, keys = zip(*jobs) if jobs else ((), ) * 4
+    max_workers = max_workers or min(os.cpu_count() or 1, max(len(jobs), 1))
+    if max_workers == 1:
+        import matplotlib.pyplot as plt
+
+        # the backend of this process is kept, the figures are only not shown while they are drawn
+        with plt.ioff():
+            errors = list(map(_render, plots, aircraft, paths))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 initializer=_init_worker) as executor:
+            errors = list(executor.map(_render, plots, aircraft, paths))
+
+    for path, key, error in zip(paths, keys, errors):
+        if error is None:
+            result.rendered.append(path)
+            manifest[path.name] = key
+        else:
+            logger.warning(f'Could not draw {path.name}: {error}')
+            result.failed[path] = error
+            manifest.pop(path.name, None)
+    manifest_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    return result
+
+
+if __name__ == '__main__':
+    from data.concept_parameters.concepts import all_concepts
+
+    render_report(all_concepts,
+                  sys.argv[1] if len(sys.argv) > 1 else REPORT_PATH)
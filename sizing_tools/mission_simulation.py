@@ -0,0 +1,134 @@
+"""
+Time-stepped simulation of the mission of a batch of design points.
+
+The Class II model multiplies one power per phase by the phase duration. The simulation instead steps through every
+phase, evaluating the power at the altitude (and so the air density) of each time step, and integrates the energy
+and state of charge of the battery. Results are streamed as SimulationChunk arrays of at most `chunk_size` time steps,
+so long missions and large batches never have to be held in memory at once.
+"""
+from dataclasses import dataclass
+from math import ceil
+from typing import Iterator
+
+import numpy as np
+
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from utility.unit_conversion import convert_float
+
+
+@dataclass(frozen=True)
+class SimulationChunk:
+    """Consecutive time steps of one phase, all arrays have shape (n, k) for n design points and k time steps"""
+    phase: Phase
+    phase_index: int
+    time: np.ndarray  # s since the start of the mission, at the end of each step
+    altitude: np.ndarray  # m, at the end of each step
+    power: np.ndarray  # W, at the middle of each step
+    energy: np.ndarray  # J used since the start of the mission, at the end of each step
+    state_of_charge: np.ndarray  # at the end of each step
+
+
+class MissionSimulation:
+    """
+    Simulation of the mission of all design points of a DesignBatch at once.
+
+    Every phase is flown in the same number of steps by all design points, each with its own step of at most
+    `time_step`, so the design points stay aligned in the arrays. The altitude changes linearly from the ending
+    altitude of the previous phase to the ending altitude of the phase. The mass of a battery-electric aircraft does
+    not change during the mission, so it is constant.
+    """
+
+    def __init__(self,
+                 batch: DesignBatch,
+                 total_mass: np.ndarray,
+                 battery_mass: np.ndarray = None,
+                 time_step: float = 1.,
+                 chunk_size: int = 1024,
+                 initial_altitude: float = 0.):
+        """
+        :param batch: Design points to simulate
+        :param total_mass: Total mass per design point in kg, e.g. the result of the mass closure
+        :param battery_mass: Battery mass per design point in kg, as sized by the Class II model if None
+        :param time_step: Maximum time step in s
+        :param chunk_size: Maximum number of time steps per chunk
+        :param initial_altitude: Altitude in m at the start of the mission
+        """
+        self.batch = batch
+        self.model = BatchClassIIModel(batch)
+        self.total_mass = np.broadcast_to(np.asarray(total_mass, dtype=float),
+                                          (len(batch), ))
+        if battery_mass is None:
+            battery_mass = self.model.battery_mass(self.total_mass)
+        # energy the battery can deliver, the inverse of formula.battery.mass_from_energy without the reserve
+        self.battery_energy = battery_mass * convert_float(
+            batch.battery_energy_density, 'kWh',
+            'W*s') * batch.battery_system_efficiency
+        self.time_step = time_step
+        self.chunk_size = chunk_size
+        self.initial_altitude = initial_altitude
+
+    def run(self) -> Iterator[SimulationChunk]:
+        batch = self.batch
+        n = len(batch)
+        time = np.zeros(n)
+        energy = np.zeros(n)
+        altitude = np.full(n, self.initial_altitude, dtype=float)
+        for i, phase in enumerate(batch.phases):
+            duration = batch.phase_duration[:, i]
+            start_altitude = altitude
+            end_altitude = batch.phase_ending_altitude[:, i]
+            steps = max(1, ceil(duration.max(initial=0.) / self.time_step))
+            dt = duration / steps
+            level = np.array_equal(start_altitude, end_altitude)
+            for start in range(0, steps, self.chunk_size):
+                # design points on the last axis, as BatchClassIIModel.power expects
+                step = np.arange(start, min(start + self.chunk_size,
+                                            steps))[:, None]
+                # in level flight the power is the same for all steps
+                middle = start_altitude if level else start_altitude + (
+                    end_altitude - start_altitude) * (step + 0.5) / steps
+                power = np.broadcast_to(
+                    self.model.power(phase, self.total_mass, density(middle),
+                                     batch.phase_vertical_speed[:, i]),
+                    (len(step), n))
+                step_energy = np.cumsum(power * dt, axis=0) + energy
+                step_time = time + (step + 1) * dt
+                step_altitude = start_altitude + (
+                    end_altitude - start_altitude) * (step + 1) / steps
+                energy = step_energy[-1]
+                yield SimulationChunk(
+                    phase=phase,
+                    phase_index=i,
+                    time=step_time.T,
+                    altitude=step_altitude.T,
+                    power=power.T,
+                    energy=step_energy.T,
+                    state_of_charge=(1 - step_energy / self.battery_energy).T)
+            time = time + duration
+            altitude = end_altitude
+
+    def summary(self) -> dict[str, np.ndarray]:
+        """
+        Run the simulation and keep only the totals.
+        :return: Energy per phase in J with shape (n, n_phases), total energy in J, and the final and minimum state
+            of charge, each with shape (n,)
+        """
+        phase_energy = np.zeros_like(self.batch.phase_duration)
+        minimum = np.ones(len(self.batch))
+        previous = np.zeros(len(self.batch))
+        energy = previous
+        state_of_charge = minimum
+        for chunk in self.run():
+            energy = chunk.energy[:, -1]
+            phase_energy[:, chunk.phase_index] += energy - previous
+            previous = energy
+            state_of_charge = chunk.state_of_charge[:, -1]
+            minimum = np.minimum(minimum, chunk.state_of_charge.min(axis=1))
+        return {
+            'phase_energy': phase_energy,
+            'energy': energy,
+            'state_of_charge': state_of_charge,
+            'minimum_state_of_charge': minimum,
+        }
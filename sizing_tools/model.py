@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
 
 from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint, as_aircraft
 
 
 class Model(ABC):
 
-    def __init__(self, aircraft: Aircraft):
-        self.aircraft = aircraft
+    def __init__(self, aircraft: Aircraft | DesignPoint):
+        self.aircraft = as_aircraft(aircraft)
         self._check_input()
 
     @property
@@ -1,11 +1,12 @@
 from functools import cache
 from math import log10, sqrt
 
-from aerosandbox import Atmosphere
+import numpy as np
 from scipy.constants import g
 
 from data.concept_parameters.aircraft import Aircraft
 from sizing_tools.formula.sound import SPL_1_max, tip_mach_number
+from sizing_tools.mass_model.classII.batch import DesignBatch
 from sizing_tools.model import Model
 from utility.unit_conversion import convert_float
 
@@ -50,6 +51,36 @@ class NoiseModel(Model):
                           (self.sound_pressure_level_1m_1engine(power) / 10))
 
 
+class BatchNoiseModel:
+    """
+    Vectorized version of NoiseModel for all design points of a DesignBatch.
+    """
+
+    def __init__(self, batch: DesignBatch):
+        self.batch = batch
+
+    def sound_pressure_level_1m_1engine(self, power: np.ndarray) -> np.ndarray:
+        """
+        :param power: Power of all engines in W per design point
+        :return: Sound pressure level of 1 engine at 1m in dB
+        """
+        b = self.batch
+        return SPL_1_max(
+            convert_float(power / b.motor_prop_count, 'W',
+                          'kW'), b.propeller_radius * 2,
+            tip_mach_number(b.propeller_radius * 2,
+                            b.propeller_rotation_speed),
+            b.propeller_blade_number)
+
+    def sound_pressure_level_1m(self, power: np.ndarray) -> np.ndarray:
+        """
+        :param power: Power of all engines in W per design point
+        :return: Sound pressure level of all engines at 1m in dB
+        """
+        return self.sound_pressure_level_1m_1engine(power) + 10 * np.log10(
+            self.batch.motor_prop_count)
+
+
 if __name__ == '__main__':
     from data.literature.evtols import joby_s4
     noise_model = NoiseModel(joby_s4)
@@ -0,0 +1,279 @@
+"""
+Gradient-based multidisciplinary design optimization over the sizing chain.
+
+The total mass is the fixed point M = F(M, x) of the Class II mass estimation F for design variables x. Its
+derivatives follow from the implicit function theorem, dM/dx = dF/dx / (1 - dF/dM), with the partial derivatives of
+F evaluated by complex step through the vectorized BatchClassIIModel. Every other output G(M, x) then has the total
+derivative dG/dx_j = Im G(M + ih dM/dx_j, x + ih e_j) / h, so one closure solve and two batched evaluations give the
+values and gradients of all outputs, exact to machine precision, without finite differences around the closure.
+
+    problem = DesignOptimization(concept_C2_1, {'wing.span': (8, 14), 'propeller_radius': (0.5, 1.2)},
+                                 constraints={'hinge_moment': 12e3, 'noise': 125})
+    result = problem.optimize()
+    result.design_point.to_aircraft()
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+from scipy.constants import g
+from scipy.optimize import minimize
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.hinge_loading import BatchHingeLoadingModel
+from sizing_tools.mass_model.classII.batch import PATH_FIELDS, BatchClassIIModel, DesignBatch
+from sizing_tools.mass_model.constraint_diagram import C_L_MAX
+from sizing_tools.noise import BatchNoiseModel
+from utility.log import logger
+
+# Outputs that can be the objective or constrained, see DesignOptimization.outputs
+OUTPUTS = ('total_mass', 'energy', 'hinge_load', 'hinge_moment', 'noise',
+           'stall_speed')
+# Step of the complex step derivatives, far below the rounding error of the real part
+COMPLEX_STEP = 1e-30
+
+
+@dataclass(frozen=True)
+class SizedDesign:
+    x: np.ndarray
+    # value and gradient with respect to x of every output
+    outputs: dict[str, float]
+    gradients: dict[str, np.ndarray]
+    converged: bool
+
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    design_variables: dict[str, float]
+    objective: float
+    outputs: dict[str, float]
+    success: bool
+    message: str
+    iterations: int
+    evaluations: int
+    design_point: DesignPoint
+
+
+class DesignOptimization:
+    """
+    Minimize the total mass or mission energy of an aircraft over continuous design variables, subject to upper limits
+    on the outputs.
+
+    Design variables are DesignBatch fields by their Aircraft attribute path, e.g. 'wing.area', 'wing.span',
+    'propeller_radius', 'cruise_velocity', 'hinge_location' or 'battery_energy_density'. The range of the mission is
+    kept when the cruise velocity changes. The stall speed is limited to the v_stall of the aircraft unless given.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft,
+                 design_variables: dict[str, tuple[float, float]],
+                 objective: str = 'total_mass',
+                 constraints: dict[str, float] = None,
+                 xtol: float = 1e-12):
+        """
+        :param aircraft: Aircraft with the values of everything that is not a design variable
+        :param design_variables: Lower and upper bound per Aircraft attribute path
+        :param objective: Output to minimize, 'total_mass' or 'energy'
+        :param constraints: Upper limit per output, see OUTPUTS
+        :param xtol: Relative tolerance of the mass closure
+        """
+        unknown = [
+            path for path in design_variables if path not in PATH_FIELDS
+        ]
+        if unknown:
+            raise ValueError(f'{unknown} are not design batch fields')
+        unknown = [
+            output for output in (objective, *(constraints or {}))
+            if output not in OUTPUTS
+        ]
+        if unknown:
+            raise ValueError(f'Unknown outputs {unknown}')
+        self.aircraft = aircraft
+        self.point = DesignPoint.from_aircraft(aircraft)
+        self.base = DesignBatch.from_design_points([self.point])
+        self.paths = tuple(design_variables)
+        self.lower, self.upper = np.array(
+            [design_variables[path] for path in self.paths], dtype=float).T
+        self.objective = objective
+        self.constraints = {
+            'stall_speed': aircraft.v_stall,
+            **(constraints or {})
+        }
+        self.xtol = xtol
+        self.cruise = self.base.phases.index(Phase.CRUISE)
+        self.range = self.base.cruise_velocity * self.base.phase_duration[:,
+                                                                          self.
+                                                                          cruise]
+        # like ClassIModel, the stall speed is evaluated at cruise altitude
+        self.rho_stall = density(aircraft.cruise_altitude or 0)
+        self.evaluations = 0
+        self._last: SizedDesign | None = None
+
+    @property
+    def x0(self) -> np.ndarray:
+        """Values of the design variables of the aircraft, clipped to the bounds"""
+        return np.clip([self.point[path] for path in self.paths], self.lower,
+                       self.upper)
+
+    def _batch(self, x: np.ndarray) -> DesignBatch:
+        """Batch with one design point per row of x, complex if x is"""
+        x = np.atleast_2d(x)
+        batch = self.base[np.zeros(len(x), dtype=int)]
+        dtype = np.result_type(x, float)
+        # the altitudes only enter the (real) atmosphere model
+        batch = replace(
+            batch, **{
+                f.name: getattr(batch, f.name).astype(dtype)
+                for f in fields(batch)
+                if f.name not in ('id', 'phases', 'segments',
+                                  'phase_ending_altitude')
+            })
+        for j, path in enumerate(self.paths):
+            setattr(batch, PATH_FIELDS[path], x[:, j])
+        batch.phase_duration[:,
+                             self.cruise] = self.range / batch.cruise_velocity
+        return batch
+
+    def outputs(self, model: BatchClassIIModel,
+                total_mass: np.ndarray) -> dict[str, np.ndarray]:
+        """
+        All outputs of design points at a given total mass, complex safe.
+        :param model: Class II model of the design points
+        :param total_mass: Total mass in kg per design point
+        :return: Value per output and design point
+        """
+        batch = model.batch
+        breakdown = model.mass_breakdown(total_mass)
+        hinge_load, hinge_moment = BatchHingeLoadingModel(
+            batch, breakdown).shear_and_moment_at_hinge()
+        # the sound pressure level of all engines at 1 m at takeoff power
+        noise = BatchNoiseModel(batch).sound_pressure_level_1m(
+            model.takeoff_power)
+        return {
+            'total_mass':
+            total_mass,
+            'energy':
+            model.phase_energy(total_mass).sum(axis=1),
+            'hinge_load':
+            hinge_load,
+            'hinge_moment':
+            hinge_moment,
+            'noise':
+            noise,
+            'stall_speed':
+            np.sqrt(2 * total_mass * g /
+                    (self.rho_stall * batch.wing_area * C_L_MAX)),
+        }
+
+    def evaluate(self, x: np.ndarray) -> SizedDesign:
+        """
+        Size the design and differentiate all outputs with respect to the design variables.
+        :param x: Values of the design variables
+        :return: SizedDesign
+        """
+        x = np.asarray(x, dtype=float)
+        if self._last is not None and np.array_equal(x, self._last.x):
+            return self._last
+        self.evaluations += 1
+        k = len(self.paths)
+        h = COMPLEX_STEP
+        result = BatchClassIIModel(self._batch(x)).total_mass(xtol=self.xtol)
+        total_mass = result.total_mass[0]
+
+        # partial derivatives of the mass estimation: row 0 steps the mass, row j + 1 design variable j
+        steps = x + 1j * h * np.vstack([np.zeros(k), np.eye(k)])
+        model = BatchClassIIModel(self._batch(steps))
+        estimate = model.total_mass_estimation(total_mass +
+                                               1j * h * np.eye(k + 1)[:, 0])
+        dF_dM = estimate[0].imag / h
+        dM_dx = estimate[1:].imag / h / (1 - dF_dM)
+
+        # total derivatives of all outputs, stepping the mass along with each design variable
+        model = BatchClassIIModel(self._batch(x + 1j * h * np.eye(k)))
+        outputs = self.outputs(model, total_mass + 1j * h * dM_dx)
+        self._last = SizedDesign(x=x,
+                                 outputs={
+                                     key: float(value[0].real)
+                                     for key, value in outputs.items()
+                                 },
+                                 gradients={
+                                     key: value.imag / h
+                                     for key, value in outputs.items()
+                                 },
+                                 converged=bool(result.converged[0]))
+        return self._last
+
+    def optimize(self,
+                 x0: np.ndarray = None,
+                 tol: float = 1e-8,
+                 maxiter: int = 100) -> OptimizationResult:
+        """
+        Solve the design problem with SLSQP, on design variables scaled to [0, 1] by their bounds.
+        :param x0: Initial values of the design variables, those of the aircraft if None
+        :param tol: Tolerance of the optimizer
+        :param maxiter: Maximum number of iterations
+        :return: OptimizationResult
+        """
+        x0 = self.x0 if x0 is None else np.asarray(x0, dtype=float)
+        span = self.upper - self.lower
+        unscale = lambda u: self.lower + u * span
+        reference = {
+            output: abs(value) or 1.
+            for output, value in self.evaluate(x0).outputs.items()
+        }
+        reference.update({
+            output: abs(limit) or 1.
+            for output, limit in self.constraints.items()
+        })
+
+        def objective(u):
+            return self.evaluate(
+                unscale(u)).outputs[self.objective] / reference[self.objective]
+
+        def objective_gradient(u):
+            return self.evaluate(unscale(u)).gradients[
+                self.objective] * span / reference[self.objective]
+
+        constraints = [{
+            'type':
+            'ineq',
+            'fun':
+            lambda u, output=output, limit=limit: (limit - self.evaluate(
+                unscale(u)).outputs[output]) / reference[output],
+            'jac':
+            lambda u, output=output: -self.evaluate(unscale(u)).gradients[
+                output] * span / reference[output],
+        } for output, limit in self.constraints.items()]
+        solution = minimize(objective, (x0 - self.lower) / span,
+                            jac=objective_gradient,
+                            bounds=[(0, 1)] * len(self.paths),
+                            constraints=constraints,
+                            method='SLSQP',
+                            tol=tol,
+                            options={'maxiter': maxiter})
+        x = unscale(np.clip(solution.x, 0, 1))
+        sized = self.evaluate(x)
+        if not solution.success:
+            logger.warning(
+                f'Optimization of {self.aircraft.id} did not converge: {solution.message}'
+            )
+        design_variables = dict(zip(self.paths, map(float, x)))
+        overrides = dict(design_variables)
+        if 'cruise_velocity' in overrides:
+            segment = self.base.segments[self.cruise]
+            overrides[f'mission_profile.{segment}.duration'] = float(
+                self.range[0] / overrides['cruise_velocity'])
+        overrides['total_mass'] = sized.outputs['total_mass']
+        return OptimizationResult(design_variables=design_variables,
+                                  objective=sized.outputs[self.objective],
+                                  outputs=sized.outputs,
+                                  success=bool(solution.success)
+                                  and sized.converged,
+                                  message=solution.message,
+                                  iterations=solution.nit,
+                                  evaluations=self.evaluations,
+                                  design_point=self.point.replace(overrides))
@@ -0,0 +1,337 @@
+"""
+Multi-objective search of the trade-off between total mass, mission energy, noise and hinge moment.
+
+ParetoSearch runs NSGA-II over design parameters given by their Aircraft attribute path, evaluating every generation
+as one batch with sweep.evaluate_samples. Every evaluated design is offered to a ParetoArchive, which keeps the
+non-dominated set of all evaluations so far, not only of the current population. With a checkpoint file the search
+state is written after every generation, and a search that is started again with the same settings resumes from it.
+
+    search = ParetoSearch(concept_C2_1, relative_bounds(concept_C2_1, ['wing.span', 'propeller_radius', ...], 0.3))
+    front = search.run(generations=100, checkpoint=save_path / 'pareto_C2_1.npz')
+    front.to_dataframe()
+"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+
+from data.concept_parameters.aircraft import Aircraft
+from sizing_tools.cache import canonical_hash
+from sizing_tools.mass_model.classII.batch import DesignBatch
+from sizing_tools.sweep import evaluate_samples, save_npz
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Objectives to minimize, columns of sweep.evaluate_batch; of the loads the magnitude is minimized
+OBJECTIVES = ('total_mass', 'energy', 'noise', 'hinge_moment')
+LOADS = ('hinge_load', 'hinge_moment')
+
+
+def dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pareto dominance for minimization, broadcasting over all but the last axis.
+    :param a: Objectives, shape (..., m)
+    :param b: Objectives, shape (..., m)
+    :return: Whether a dominates b
+    """
+    return np.all(a <= b, axis=-1) & np.any(a < b, axis=-1)
+
+
+def non_dominated_sort(objectives: np.ndarray) -> np.ndarray:
+    """
+    Front of every point, 0 for the non-dominated points, 1 for the points only dominated by those, and so on.
+    :param objectives: Objectives of n points, shape (n, m)
+    :return: Front per point, shape (n,)
+    """
+    dominated_by = dominates(objectives[:, None], objectives[None])
+    count = dominated_by.sum(axis=0)
+    front = np.full(len(objectives), -1)
+    current = np.flatnonzero(count == 0)
+    rank = 0
+    while current.size:
+        front[current] = rank
+        count = count - dominated_by[current].sum(axis=0)
+        current = np.flatnonzero((count == 0) & (front < 0))
+        rank += 1
+    return front
+
+
+def crowding_distance(objectives: np.ndarray) -> np.ndarray:
+    """
+    NSGA-II crowding distance of the points of one front, infinite for the extremes of every objective.
+    :param objectives: Objectives of n points, shape (n, m)
+    :return: Crowding distance per point, shape (n,)
+    """
+    n, m = objectives.shape
+    distance = np.zeros(n)
+    if n < 3:
+        return np.full(n, np.inf)
+    order = np.argsort(objectives, axis=0)
+    ordered = np.take_along_axis(objectives, order, axis=0)
+    span = ordered[-1] - ordered[0]
+    span[span == 0] = 1
+    gaps = (ordered[2:] - ordered[:-2]) / span
+    for j in range(m):
+        distance[order[1:-1, j]] += gaps[:, j]
+        distance[order[[0, -1], j]] = np.inf
+    return distance
+
+
+class ParetoArchive:
+    """
+    Non-dominated set of all designs offered to it, updated one batch at a time.
+
+    A batch is first reduced to its own non-dominated designs, which are then compared to the archive in one
+    broadcast per chunk: designs dominated by (or equal to) an archived design are rejected, and archived designs
+    dominated by a new design are removed.
+    """
+
+    def __init__(self, parameters: Sequence[str], objectives: Sequence[str]):
+        self.parameters = tuple(parameters)
+        self.objectives = tuple(objectives)
+        self.x = np.empty((0, len(self.parameters)))
+        self.f = np.empty((0, len(self.objectives)))
+        self.evaluations = 0
+
+    def __len__(self) -> int:
+        return len(self.f)
+
+    def update(self,
+               x: np.ndarray,
+               f: np.ndarray,
+               chunk_size: int = 256) -> int:
+        """
+        :param x: Parameters of n designs, shape (n, k)
+        :param f: Objectives of the designs, shape (n, m); designs with non-finite objectives are ignored
+        :param chunk_size: Number of new designs compared to the archive at once
+        :return: Number of designs added to the archive
+        """
+        self.evaluations += len(f)
+        valid = np.all(np.isfinite(f), axis=1)
+        x, f = x[valid], f[valid]
+        # duplicates within the batch neither dominate each other nor add to the front
+        f, unique = np.unique(f, axis=0, return_index=True)
+        x = x[unique]
+        keep = ~dominates(f[:, None], f[None]).any(axis=0)
+        x, f = x[keep], f[keep]
+        accepted = np.ones(len(f), dtype=bool)
+        removed = np.zeros(len(self.f), dtype=bool)
+        for start in range(0, len(f), chunk_size):
+            chunk = f[start:start + chunk_size]
+            archive = self.f[None]
+            accepted[start:start + chunk_size] = ~np.any(
+                np.all(archive <= chunk[:, None], axis=-1), axis=1)
+            removed |= dominates(chunk[:, None], archive).any(axis=0)
+        self.x = np.concatenate([self.x[~removed], x[accepted]])
+        self.f = np.concatenate([self.f[~removed], f[accepted]])
+        return int(accepted.sum())
+
+    def state(self) -> dict[str, np.ndarray]:
+        return {
+            'archive_x': self.x,
+            'archive_f': self.f,
+            'evaluations': np.array(self.evaluations)
+        }
+
+    def restore(self, state: dict[str, np.ndarray]):
+        self.x = state['archive_x']
+        self.f = state['archive_f']
+        self.evaluations = int(state['evaluations'])
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(np.hstack([self.x, self.f]),
+                            columns=[*self.parameters, *self.objectives])
+
+
+def _evaluate_objectives(base: DesignBatch, paths: tuple[str, ...],
+                         objectives: tuple[str, ...],
+                         samples: np.ndarray) -> np.ndarray:
+    columns = evaluate_samples(base, paths, objectives, samples)
+    f = np.stack([
+        np.abs(columns[name]) if name in LOADS else columns[name]
+        for name in objectives
+    ],
+                 axis=1)
+    f[~columns['converged']] = np.inf
+    return f
+
+
+class ParetoSearch:
+    """
+    NSGA-II search over design parameters within bounds, with simulated binary crossover and polynomial mutation on
+    the parameters scaled to [0, 1].
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft,
+                 bounds: dict[str, tuple[float, float]],
+                 objectives: Sequence[str] = OBJECTIVES,
+                 population_size: int = 100,
+                 crossover_eta: float = 15.,
+                 mutation_eta: float = 20.):
+        """
+        :param aircraft: Aircraft with the values of all parameters that are not searched
+        :param bounds: Lower and upper bound per Aircraft attribute path, see DesignBatch.set_path
+        :param objectives: Columns of sweep.evaluate_batch to minimize
+        :param population_size: Number of designs per generation, the evaluations per generation
+        :param crossover_eta: Distribution index of the crossover, higher gives children closer to their parents
+        :param mutation_eta: Distribution index of the mutation
+        """
+        self.aircraft = aircraft
+        self.base = DesignBatch.from_aircraft(aircraft)
+        self.parameters = tuple(bounds)
+        self.lower, self.upper = np.array(
+            [bounds[path] for path in self.parameters], dtype=float).T
+        self.objectives = tuple(objectives)
+        self.population_size = population_size
+        self.crossover_eta = crossover_eta
+        self.mutation_eta = mutation_eta
+
+    def _evaluate(self, unit: np.ndarray, executor: Executor | None,
+                  max_workers: int) -> np.ndarray:
+        samples = self.lower + unit * (self.upper - self.lower)
+        evaluate = partial(_evaluate_objectives, self.base, self.parameters,
+                           self.objectives)
+        if executor is None:
+            return evaluate(samples)
+        return np.concatenate(
+            list(executor.map(evaluate, np.array_split(samples, max_workers))))
+
+    @staticmethod
+    def _select(rank: np.ndarray, crowding: np.ndarray, n: int,
+                rng: np.random.Generator) -> np.ndarray:
+        """Binary tournaments on front, then crowding distance"""
+        a, b = rng.integers(0, len(rank), size=(2, n))
+        better = (rank[a] < rank[b]) | ((rank[a] == rank[b]) &
+                                        (crowding[a] > crowding[b]))
+        return np.where(better, a, b)
+
+    def _offspring(self, parents: np.ndarray,
+                   rng: np.random.Generator) -> np.ndarray:
+        n, k = parents.shape
+        first, second = parents[:n // 2], parents[n // 2:2 * (n // 2)]
+        # simulated binary crossover of every parameter with probability 0.5
+        u = rng.random(first.shape)
+        beta = np.where(u <= 0.5, (2 * u)**(1 / (self.crossover_eta + 1)),
+                        (1 / (2 * (1 - u)))**(1 / (self.crossover_eta + 1)))
+        beta = np.where(rng.random(first.shape) < 0.5, beta, 1)
+        children = np.concatenate([
+            0.5 * ((1 + beta) * first + (1 - beta) * second),
+            0.5 * ((1 - beta) * first + (1 + beta) * second)
+        ])
+        if len(children) < n:
+            children = np.concatenate([children, parents[-1:]])
+        # polynomial mutation of every parameter with probability 1 / k
+        u = rng.random(children.shape)
+        delta = np.where(u < 0.5, (2 * u)**(1 / (self.mutation_eta + 1)) - 1,
+                         1 - (2 * (1 - u))**(1 / (self.mutation_eta + 1)))
+        mutate = rng.random(children.shape) < 1 / k
+        return np.clip(children + mutate * delta, 0, 1)
+
+    @staticmethod
+    def _rank(f: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Front and crowding distance within the front of every design"""
+        # designs that did not converge have infinite objectives and end up in the last front
+        rank = non_dominated_sort(np.nan_to_num(f, posinf=np.finfo(float).max))
+        crowding = np.zeros(len(f))
+        for front in np.unique(rank):
+            members = rank == front
+            crowding[members] = crowding_distance(f[members])
+        return rank, crowding
+
+    def _survivors(self, unit: np.ndarray,
+                   f: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        rank, crowding = self._rank(f)
+        order = np.lexsort((-crowding, rank))[:self.population_size]
+        return unit[order], f[order]
+
+    def _signature(self, seed: int) -> str:
+        return canonical_hash('pareto', self.base,
+                              list(self.parameters), self.lower, self.upper,
+                              list(self.objectives), self.population_size,
+                              self.crossover_eta, self.mutation_eta, seed)
+
+    def run(self,
+            generations: int = 100,
+            seed: int = 0,
+            checkpoint: Path | str = None,
+            max_workers: int = 1) -> ParetoArchive:
+        """
+        :param generations: Number of generations, the search evaluates (generations + 1) * population_size designs
+        :param seed: Seed of the search
+        :param checkpoint: .npz file to write the state to after every generation, and to resume from
+        :param max_workers: Number of worker processes each generation is split over, evaluated in this process if 1
+        :return: ParetoArchive of all evaluated designs
+        """
+        rng = np.random.default_rng(seed)
+        archive = ParetoArchive(self.parameters, self.objectives)
+        signature = self._signature(seed)
+        checkpoint = Path(checkpoint) if checkpoint is not None else None
+        generation = 0
+        unit = f = None
+        if checkpoint is not None and checkpoint.exists():
+            with np.load(checkpoint) as state:
+                state = dict(state)
+            if str(state['signature']) != signature:
+                raise ValueError(
+                    f'{checkpoint} holds the state of another search')
+            archive.restore(state)
+            unit, f = state['population_x'], state['population_f']
+            generation = int(state['generation'])
+            rng.bit_generator.state = json.loads(str(state['rng']))
+            logger.info(
+                f'Resuming the search of {self.aircraft.id} at generation {generation}'
+            )
+
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers) if max_workers > 1 else None
+        try:
+            if unit is None:
+                unit = rng.random((self.population_size, len(self.parameters)))
+                f = self._evaluate(unit, executor, max_workers)
+                archive.update(self._scale(unit), f)
+                self._save(checkpoint, signature, 0, unit, f, archive, rng)
+            for generation in range(generation + 1, generations + 1):
+                rank, crowding = self._rank(f)
+                parents = unit[self._select(rank, crowding,
+                                            self.population_size, rng)]
+                children = self._offspring(parents, rng)
+                f_children = self._evaluate(children, executor, max_workers)
+                archive.update(self._scale(children), f_children)
+                unit, f = self._survivors(np.concatenate([unit, children]),
+                                          np.concatenate([f, f_children]))
+                self._save(checkpoint, signature, generation, unit, f, archive,
+                           rng)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        logger.info(
+            f'{self.aircraft.id}: {len(archive)} non-dominated designs of {archive.evaluations} evaluations'
+        )
+        return archive
+
+    def _scale(self, unit: np.ndarray) -> np.ndarray:
+        return self.lower + unit * (self.upper - self.lower)
+
+    @staticmethod
+    def _save(checkpoint: Path | None, signature: str, generation: int,
+              unit: np.ndarray, f: np.ndarray, archive: ParetoArchive,
+              rng: np.random.Generator):
+        if checkpoint is None:
+            return
+        save_npz(checkpoint,
+                 signature=signature,
+                 generation=generation,
+                 population_x=unit,
+                 population_f=f,
+                 rng=json.dumps(rng.bit_generator.state),
+                 **archive.state())
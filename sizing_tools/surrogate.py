@@ -0,0 +1,488 @@
+"""
+Surrogate models of the sizing chain for instant predictions over a design domain.
+
+A SurrogateModel fits a Gaussian process to designs sized by sweep.evaluate_samples. Every output has a quadratic
+trend, which captures most of the smooth response of the mass closure, and the outputs share a Matern 5/2 kernel on
+the domain scaled to [0, 1], whose length scale per parameter maximizes the marginal likelihood. Sharing the kernel, a
+batch of queries costs a few matrix products for all outputs at once. Besides the prediction, the process gives its
+standard deviation, an estimate of the prediction error at every query.
+
+Training is adaptive: after an initial Latin hypercube, batches of designs are added where the largest relative
+standard deviation is predicted, until CONFIDENCE times it and the leave-one-out error of the designs are below the
+tolerance. Queries outside the trained domain, or with a larger estimated error than accepted, are sized exactly
+instead.
+
+    surrogate = SurrogateModel(concept_C2_1, relative_bounds(concept_C2_1, ['wing.span', 'propeller_radius'], 0.2))
+    surrogate.train(tolerance=1e-3).save(save_path / 'surrogate_C2_1.npz')
+    prediction = SurrogateModel.load(save_path / 'surrogate_C2_1.npz', concept_C2_1).predict(samples)
+    prediction.values['total_mass'], prediction.errors['total_mass']
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Sequence
+
+import numpy as np
+from scipy.linalg import LinAlgError, cho_factor, solve_triangular
+from scipy.stats import qmc
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.cache import canonical_hash
+from sizing_tools.mass_model.classII.batch import DesignBatch
+from sizing_tools.sweep import evaluate_samples, save_npz
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Predicted outputs, columns of sweep.evaluate_batch
+OUTPUTS = ('total_mass', 'battery_mass', 'takeoff_power', 'hinge_load')
+# Candidate length scales of the kernel, on the domain scaled to [0, 1]
+LENGTH_SCALES = np.geomspace(0.1, 10, 21)
+# Variance added to the diagonal of the kernel matrix, relative to the process variance
+NUGGET = 1e-9
+# Number of queries predicted at once
+BLOCK_SIZE = 256
+# Standard deviations of the prediction within which training has to reach the tolerance
+CONFIDENCE = 3
+
+
+def quadratic_features(u: np.ndarray) -> np.ndarray:
+    """
+    :param u: Points of shape (n, k)
+    :return: Constant, linear and quadratic terms, shape (n, 1 + k + k (k + 1) / 2)
+    """
+    i, j = np.triu_indices(u.shape[1])
+    return np.hstack([np.ones((len(u), 1)), u, u[:, i] * u[:, j]])
+
+
+class GaussianProcess:
+    """
+    Universal kriging: Gaussian process regression of several outputs with a quadratic trend each, estimated by
+    generalized least squares, and a shared Matern 5/2 kernel. The uncertainty of the trend is part of the predicted
+    variance, so the error estimate stays honest on few training points.
+
+    Everything that does not depend on the queries is computed once, so the mean costs one kernel row per query,
+    O(n) for n training points, and the standard deviation one triangular solve, O(n^2).
+    """
+
+    def __init__(self, u: np.ndarray, y: np.ndarray, length_scale: np.ndarray):
+        """
+        :param u: Training points of shape (n, k), more than there are trend terms
+        :param y: Training values of shape (n, m)
+        :param length_scale: Length scale of the kernel per dimension, shape (k,)
+        :raises LinAlgError: If the kernel matrix is not positive definite
+        """
+        self.u = u
+        self.length_scale = np.asarray(length_scale, dtype=float)
+        n = len(u)
+        self.scale = np.std(y, axis=0)
+        self.scale[self.scale == 0] = 1.
+        y = y / self.scale
+        # the training points as the right factor of the squared distances, -2 a.b + |a|^2 + |b|^2, in one product
+        points = self._scaled(u)
+        self._points = np.vstack(
+            [points.T,
+             np.ones(n),
+             np.einsum('ij,ij->i', points, points)])
+        K = self.kernel(u)
+        K[np.diag_indices(n)] += NUGGET
+        self.cholesky = cho_factor(K, lower=True)[0]
+        # everything whitened by the Cholesky factor L of K: G = L^-1 F = Q R
+        inverse = solve_triangular(self.cholesky,
+                                   np.eye(n),
+                                   lower=True,
+                                   check_finite=False)
+        self.G = inverse @ quadratic_features(u)
+        Q, self.R = np.linalg.qr(self.G)
+        white = inverse @ y
+        self.trend = solve_triangular(self.R, Q.T @ white, check_finite=False)
+        # the quadratic terms of the trend as one upper triangular matrix per output
+        k = u.shape[1]
+        self._quadratic = np.zeros((k, k, y.shape[1]))
+        self._quadratic[np.triu_indices(k)] = self.trend[1 + k:]
+        residual = white - Q @ (Q.T @ white)
+        self.alpha = inverse.T @ residual
+        # restricted maximum likelihood estimate of the process variance and its log likelihood
+        p = self.R.shape[0]
+        self.variance = np.maximum(
+            np.sum(residual**2, axis=0) / (n - p),
+            np.finfo(float).tiny)
+        self.log_likelihood = -(n - p) / 2 * np.sum(np.log(
+            self.variance)) - y.shape[1] * (
+                np.sum(np.log(np.diag(self.cholesky))) +
+                np.sum(np.log(np.abs(np.diag(self.R)))))
+        # leave-one-out residuals in closed form, alpha_i / P_ii with P = L^-T (I - Q Q^T) L^-1
+        projected = inverse - Q @ (Q.T @ inverse)
+        self.loo_error = self.alpha / np.sum(projected**2,
+                                             axis=0)[:, None] * self.scale
+
+    @classmethod
+    def fit(cls,
+            u: np.ndarray,
+            y: np.ndarray,
+            length_scale: np.ndarray = None,
+            sweeps: int = 2) -> 'GaussianProcess':
+        """
+        Process of the length scales with the largest marginal likelihood, by coordinate search over LENGTH_SCALES.
+        :param u: Training points of shape (n, k)
+        :param y: Training values of shape (n, m)
+        :param length_scale: Initial length scales, the middle of LENGTH_SCALES if None
+        :param sweeps: Number of sweeps over all dimensions
+        :return: GaussianProcess
+        """
+        k = u.shape[1]
+        best = cls(
+            u, y,
+            np.full(k, LENGTH_SCALES[len(LENGTH_SCALES) // 2])
+            if length_scale is None else length_scale)
+        for _ in range(sweeps):
+            for i in range(k):
+                for value in LENGTH_SCALES:
+                    length_scale = best.length_scale.copy()
+                    length_scale[i] = value
+                    try:
+                        process = cls(u, y, length_scale)
+                    except LinAlgError:
+                        continue
+                    if process.log_likelihood > best.log_likelihood:
+                        best = process
+        return best
+
+    def _scaled(self, u: np.ndarray) -> np.ndarray:
+        # the factor sqrt(5) of the Matern 5/2 distance is part of the scaling
+        return u * (np.sqrt(5) / self.length_scale)
+
+    def kernel(self, u: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Matern 5/2 kernel to the training points, smooth enough for the mass closure and better conditioned than the
+        squared exponential.
+        :param u: Points of shape (q, k)
+        :param out: Buffers of shape (2, q, n) to compute the kernel in, so blocks of queries reuse their memory
+        :return: Kernel of shape (q, n)
+        """
+        if out is None:
+            out = np.empty((2, len(u), len(self.u)))
+        r, k = out
+        a = self._scaled(u)
+        np.matmul(np.hstack([
+            -2 * a,
+            np.einsum('ij,ij->i', a, a)[:, None],
+            np.ones((len(a), 1))
+        ]),
+                  self._points,
+                  out=r)
+        np.maximum(r, 0, out=r)
+        np.sqrt(r, out=r)
+        np.negative(r, out=k)
+        np.exp(k, out=k)
+        # 1 + r + r^2 / 3 = ((r + 1.5)^2 + 0.75) / 3, in place
+        r += 1.5
+        np.square(r, out=r)
+        r += 0.75
+        k *= r
+        k *= 1 / 3
+        return k
+
+    def _trend(self, u: np.ndarray) -> np.ndarray:
+        """The quadratic trend as a quadratic form, without the features of the queries"""
+        q, k = u.shape
+        linear = self.trend[1:k + 1]
+        quadratic = (u @ self._quadratic.reshape(k, -1)).reshape(q, k, -1)
+        return self.trend[0] + u @ linear + np.einsum('qj,qjm->qm', u,
+                                                      quadratic)
+
+    def predict(self,
+                u: np.ndarray,
+                std: bool = True) -> tuple[np.ndarray, np.ndarray | None]:
+        """
+        :param u: Query points of shape (q, k)
+        :param std: Also compute the standard deviation, which costs most of the prediction
+        :return: Mean and standard deviation (None if not computed) of the prediction, shape (q, m)
+        """
+        mean = self._trend(u)
+        deviation = np.empty_like(mean) if std else None
+        buffers = np.empty((2, min(len(u), BLOCK_SIZE), len(self.u)))
+        # in blocks of queries whose kernel stays in the cache
+        for start in range(0, len(u), BLOCK_SIZE):
+            block = slice(start, start + BLOCK_SIZE)
+            rows = len(u[block])
+            k = self.kernel(u[block], buffers[:, :rows])
+            mean[block] += k @ self.alpha
+            if not std:
+                continue
+            # the kernel is shared, so the outputs only differ in their process variance
+            v = solve_triangular(self.cholesky,
+                                 k.T,
+                                 lower=True,
+                                 check_finite=False)
+            w = solve_triangular(self.R,
+                                 quadratic_features(u[block]).T - self.G.T @ v,
+                                 trans='T',
+                                 check_finite=False)
+            correlation = 1 - np.einsum('nq,nq->q', v, v) + np.einsum(
+                'pq,pq->q', w, w)
+            deviation[block] = np.sqrt(
+                np.maximum(correlation, 0)[:, None] * self.variance)
+        mean *= self.scale
+        if std:
+            deviation *= self.scale
+        return mean, deviation
+
+
+@dataclass(frozen=True)
+class SurrogatePrediction:
+    # per output, one value per query; the error is the standard deviation of the prediction, 0 for exact values,
+    # None if not estimated
+    values: dict[str, np.ndarray]
+    errors: dict[str, np.ndarray] | None
+    # whether the query was sized exactly
+    exact: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame({
+            **self.values,
+            **{
+                f'{output}_error': error
+                for output, error in (self.errors or {}).items()
+            },
+            'exact': self.exact,
+        })
+
+
+class SurrogateModel:
+    """
+    Surrogate of the Class II sizing outputs of an aircraft over bounds of design parameters.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft | DesignPoint,
+                 bounds: dict[str, tuple[float, float]],
+                 outputs: Sequence[str] = OUTPUTS):
+        """
+        :param aircraft: Aircraft with the values of all inputs that are not parameters of the surrogate
+        :param bounds: Lower and upper bound of the trained domain per Aircraft attribute path, see
+            DesignBatch.set_path
+        :param outputs: Columns of sweep.evaluate_batch to predict
+        """
+        self.base = DesignBatch.from_aircraft(aircraft)
+        self.parameters = tuple(bounds)
+        for path in self.parameters:
+            # raises for unsupported paths before any design is sized
+            self.base[[0]].set_path(path, np.nan)
+        self.lower, self.upper = np.array(
+            [bounds[path] for path in self.parameters], dtype=float).T
+        self.outputs = tuple(outputs)
+        self.u = np.empty((0, len(self.parameters)))
+        self.y = np.empty((0, len(self.outputs)))
+        self.process: GaussianProcess | None = None
+
+    @property
+    def trained(self) -> bool:
+        return self.process is not None
+
+    @property
+    def bounds(self) -> dict[str, tuple[float, float]]:
+        return {
+            path: (float(lower), float(upper))
+            for path, lower, upper in zip(self.parameters, self.lower,
+                                          self.upper)
+        }
+
+    def _signature(self) -> str:
+        return canonical_hash('surrogate', self.base, list(self.parameters),
+                              self.lower, self.upper, list(self.outputs))
+
+    def _scale(self, unit: np.ndarray) -> np.ndarray:
+        return self.lower + unit * (self.upper - self.lower)
+
+    def _unit(self, samples: np.ndarray) -> np.ndarray:
+        return (samples - self.lower) / (self.upper - self.lower)
+
+    def _size(self, unit: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        columns = evaluate_samples(self.base, self.parameters, self.outputs,
+                                   self._scale(unit))
+        converged = columns['converged']
+        if not converged.all():
+            logger.warning(
+                f'{(~converged).sum()} of {len(unit)} training designs did not converge and are left out'
+            )
+        y = np.stack([columns[output] for output in self.outputs], axis=1)
+        return unit[converged], y[converged]
+
+    def _fit(self):
+        # the length scales of the previous fit are a good start
+        self.process = GaussianProcess.fit(
+            self.u, self.y,
+            self.process.length_scale if self.trained else None)
+
+    @staticmethod
+    def _relative(mean: np.ndarray, std: np.ndarray) -> np.ndarray:
+        return np.max(std / np.maximum(np.abs(mean),
+                                       np.finfo(float).tiny),
+                      axis=1)
+
+    def _select(self, candidates: np.ndarray, size: int) -> np.ndarray:
+        """
+        Candidates with the largest relative error. After every pick the process is conditioned on its own prediction
+        at it (kriging believer), which only lowers the error around the pick, so a batch spreads out.
+        """
+        process = self.process
+        mean, _ = process.predict(candidates, std=False)
+        u, y = self.u, self.y
+        selected = []
+        for _ in range(min(size, len(candidates))):
+            index = int(np.argmax(
+                self._relative(*process.predict(candidates))))
+            selected.append(candidates[index])
+            u = np.vstack([u, candidates[index]])
+            y = np.vstack([y, mean[index]])
+            candidates = np.delete(candidates, index, axis=0)
+            mean = np.delete(mean, index, axis=0)
+            process = GaussianProcess(u, y, process.length_scale)
+        return np.array(selected)
+
+    def train(self,
+              initial_samples: int = None,
+              max_samples: int = 256,
+              batch_size: int = 16,
+              tolerance: float = 1e-3,
+              candidates: int = 1024,
+              seed: int = 0) -> 'SurrogateModel':
+        """
+        Size designs where the surrogate is least accurate until its estimated error is below the tolerance.
+        :param initial_samples: Size of the initial Latin hypercube, twice the number of trend terms if None
+        :param max_samples: Maximum number of sized designs
+        :param batch_size: Number of designs sized at once per refinement
+        :param tolerance: Largest accepted relative error of any output over the domain, estimated at CONFIDENCE
+            standard deviations of the prediction, and relative leave-one-out error at any design
+        :param candidates: Number of random candidate designs per refinement
+        :param seed: Seed of the samples
+        :return: This model, trained
+        """
+        k = len(self.parameters)
+        rng = np.random.default_rng(seed)
+        if not self.trained:
+            n = initial_samples or 2 * quadratic_features(np.zeros(
+                (1, k))).shape[1]
+            self.u, self.y = self._size(
+                qmc.LatinHypercube(d=k, seed=rng).random(n))
+            self._fit()
+        while True:
+            pool = qmc.LatinHypercube(d=k, seed=rng).random(candidates)
+            # one standard deviation is exceeded at a third of the queries, and the estimate of the process itself is
+            # overconfident on few designs, the cross validation is not
+            error = max(
+                CONFIDENCE * self._relative(*self.process.predict(pool)).max(),
+                self._relative(self.y, self.process.loo_error).max())
+            logger.info(
+                f'Surrogate of {self.base.id[0]} on {len(self.u)} designs, largest relative error {error:.2e}'
+            )
+            if error < tolerance or len(self.u) >= max_samples:
+                break
+            u, y = self._size(
+                self._select(pool, min(batch_size, max_samples - len(self.u))))
+            self.u, self.y = np.vstack([self.u, u]), np.vstack([self.y, y])
+            self._fit()
+        if error >= tolerance:
+            logger.warning(
+                f'Surrogate of {self.base.id[0]} reached {max_samples} designs at a relative error of {error:.2e}'
+            )
+        return self
+
+    def in_domain(self, samples: np.ndarray) -> np.ndarray:
+        """
+        :param samples: Values of the parameters, shape (q, k)
+        :return: Whether each sample lies within the trained bounds
+        """
+        unit = self._unit(np.atleast_2d(samples))
+        eps = 1e-12
+        return np.all((unit >= -eps) & (unit <= 1 + eps), axis=1)
+
+    def predict(self,
+                samples: np.ndarray,
+                fallback: bool = True,
+                max_error: float = None,
+                errors: bool = True) -> SurrogatePrediction:
+        """
+        Predict the outputs of many designs at once.
+        :param samples: Values of the parameters, shape (k,) or (q, k)
+        :param fallback: Size the samples outside the trained domain exactly, otherwise extrapolate
+        :param max_error: Largest accepted relative error, samples with a larger estimate are sized exactly
+        :param errors: Estimate the errors, which costs most of the prediction; always estimated with a max_error
+        :return: SurrogatePrediction
+        """
+        if not self.trained:
+            raise RuntimeError('the surrogate is not trained')
+        samples = np.atleast_2d(np.asarray(samples, dtype=float))
+        unit = self._unit(samples)
+        mean, std = self.process.predict(unit,
+                                         std=errors or max_error is not None)
+        exact = ~self.in_domain(samples) if fallback else np.zeros(
+            len(samples), dtype=bool)
+        if max_error is not None:
+            exact |= self._relative(mean, std) > max_error
+        if exact.any():
+            columns = evaluate_samples(self.base, self.parameters,
+                                       self.outputs, samples[exact])
+            for i, output in enumerate(self.outputs):
+                mean[exact, i] = columns[output]
+                if std is not None:
+                    std[exact, i] = np.where(columns['converged'], 0, np.nan)
+        return SurrogatePrediction(values={
+            output: mean[:, i]
+            for i, output in enumerate(self.outputs)
+        },
+                                   errors={
+                                       output: std[:, i]
+                                       for i, output in enumerate(self.outputs)
+                                   } if errors else None,
+                                   exact=exact)
+
+    def save(self, path: Path | str) -> 'SurrogateModel':
+        """
+        :param path: .npz file to write the training designs and length scales to
+        :return: This model
+        """
+        if not self.trained:
+            raise RuntimeError('the surrogate is not trained')
+        save_npz(path,
+                 signature=self._signature(),
+                 parameters=np.array(self.parameters),
+                 lower=self.lower,
+                 upper=self.upper,
+                 outputs=np.array(self.outputs),
+                 u=self.u,
+                 y=self.y,
+                 length_scale=self.process.length_scale)
+        return self
+
+    @classmethod
+    def load(cls, path: Path | str,
+             aircraft: Aircraft | DesignPoint) -> 'SurrogateModel':
+        """
+        :param path: .npz file written by save
+        :param aircraft: Aircraft the surrogate was trained for, sized exactly outside the trained domain
+        :return: Trained SurrogateModel
+        """
+        with np.load(path) as state:
+            state = dict(state)
+        model = cls(
+            aircraft,
+            dict(
+                zip(state['parameters'].tolist(),
+                    zip(state['lower'], state['upper']))),
+            state['outputs'].tolist())
+        if str(state['signature']) != model._signature():
+            raise ValueError(f'{path} holds the surrogate of another design')
+        model.u, model.y = state['u'], state['y']
+        model.process = GaussianProcess(model.u, model.y,
+                                        state['length_scale'])
+        return model
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, Sequence, TypeVar
+
+import numpy as np
+
+from data.concept_parameters.aircraft import Aircraft
+from sizing_tools.cache import SizingCache, canonical_hash, sizing_cache
+from sizing_tools.hinge_loading import BatchHingeLoadingModel
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.mission_simulation import MissionSimulation
+from sizing_tools.noise import BatchNoiseModel
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar('T')
+
+
+def evaluate_batch(batch: DesignBatch,
+                   xtol: float = 1e-8,
+                   maxiter: int = 500,
+                   optimize_hinge: bool = False,
+                   max_folded_span: float = None,
+                   span_weight: float = 0.,
+                   time_step: float = None) -> dict[str, np.ndarray]:
+    """
+    Size all design points of a batch and collect the results as columns.
+    :param batch: Design points to evaluate
+    :param xtol: Relative convergence tolerance of the mass closure
+    :param maxiter: Maximum number of iterations of the mass closure
+    :param optimize_hinge: Also add the optimal hinge location per design point and the loads there
+    :param max_folded_span: Maximum span in m of the inner wing for the optimal hinge location
+    :param span_weight: Weight in N of the span of the inner wing for the optimal hinge location
+    :param time_step: Also simulate the mission with this time step in s, adding the simulated energy and minimum
+        state of charge
+    :return: Columns with one row per design point
+    """
+    model = BatchClassIIModel(batch)
+    result = model.total_mass(xtol=xtol, maxiter=maxiter)
+    breakdown = model.mass_breakdown(result.total_mass)
+    columns = {
+        'total_mass': result.total_mass,
+        'converged': result.converged,
+        'iterations': result.iterations,
+    }
+    for group, masses in breakdown.items():
+        if isinstance(masses, dict):
+            for key, value in masses.items():
+                columns[f'{group}_mass' if key ==
+                        'total' else f'{group}.{key}_mass'] = value
+    energy = model.phase_energy(result.total_mass)
+    for i, segment in enumerate(batch.segments):
+        columns[f'{segment.lower()}_energy'] = energy[:, i]
+    columns['energy'] = energy.sum(axis=1)
+    columns['takeoff_power'] = model.takeoff_power
+    columns['noise'] = BatchNoiseModel(batch).sound_pressure_level_1m(
+        model.takeoff_power)
+    hinge_model = BatchHingeLoadingModel(batch, breakdown)
+    columns['hinge_load'], columns[
+        'hinge_moment'] = hinge_model.shear_and_moment_at_hinge()
+    if optimize_hinge:
+        (columns['optimal_hinge_location'], columns['optimal_hinge_load'],
+         columns['optimal_hinge_moment']) = hinge_model.optimal_hinge_location(
+             max_folded_span=max_folded_span, span_weight=span_weight)
+    if time_step is not None:
+        simulation = MissionSimulation(
+            batch,
+            result.total_mass,
+            battery_mass=breakdown['battery']['total'],
+            time_step=time_step).summary()
+        columns['simulated_energy'] = simulation['energy']
+        columns['minimum_state_of_charge'] = simulation[
+            'minimum_state_of_charge']
+    return columns
+
+
+def sample_batch(base: DesignBatch, paths: Sequence[str],
+                 samples: np.ndarray) -> DesignBatch:
+    """
+    Variants of a design point, given as samples of Aircraft attribute paths.
+    :param base: Batch with the one design point the samples vary
+    :param paths: Aircraft attribute paths, see DesignBatch.set_path
+    :param samples: Values of shape (n, len(paths))
+    :return: Batch with one design point per sample
+    """
+    batch = base[np.zeros(len(samples), dtype=int)]
+    # range depends on the cruise velocity, so it is set last
+    for j in sorted(range(len(paths)), key=lambda j: paths[j] == 'range'):
+        batch.set_path(paths[j], samples[:, j])
+    return batch
+
+
+def evaluate_samples(base: DesignBatch, paths: Sequence[str],
+                     outputs: Sequence[str],
+                     samples: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Evaluate variants of a design point, given as samples of Aircraft attribute paths.
+    :param base: Batch with the one design point the samples vary
+    :param paths: Aircraft attribute paths, see DesignBatch.set_path
+    :param outputs: Columns of evaluate_batch to keep, 'converged' is always kept
+    :param samples: Values of shape (n, len(paths))
+    :return: Columns with one row per sample
+    """
+    columns = evaluate_batch(sample_batch(base, paths, samples))
+    return {output: columns[output] for output in (*outputs, 'converged')}
+
+
+def map_chunks(function: Callable[[T], dict[str, np.ndarray]],
+               chunks: Sequence[T],
+               max_workers: int = None) -> Iterator[dict[str, np.ndarray]]:
+    """
+    Results of a function of every chunk, in order, spread over a process pool.
+    :param function: Picklable function of a chunk
+    :param chunks: Chunks to evaluate
+    :param max_workers: Number of worker processes, evaluated in this process if 1, one per chunk up to the CPU count
+        if None
+    :return: Iterator over the results, evaluated as they are consumed
+    """
+    max_workers = max_workers or min(os.cpu_count() or 1, max(len(chunks), 1))
+    if max_workers == 1:
+        yield from map(function, chunks)
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(function, chunks)
+
+
+def save_npz(file: Path | str, **arrays: np.ndarray | str | int):
+    """
+    Write arrays to an .npz file, under a temporary name first so an interrupted run never leaves a partial file.
+    :param file: .npz file to write
+    :param arrays: Arrays by name
+    """
+    file = Path(file)
+    temporary = file.with_name(f'.{file.name}')
+    with open(temporary, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temporary, file)
+
+
+class SweepStore:
+    """
+    Columnar store for sweep results. Chunks are kept in memory, or written as .npz files to a directory so large
+    sweeps never have to be held in memory at once.
+    """
+
+    def __init__(self, path: Path | str = None, resume: bool = False):
+        """
+        :param path: Directory to write the chunks to, in memory if None
+        :param resume: Append to the chunks already in the directory; a directory holding chunks is refused otherwise
+        """
+        self.path = Path(path) if path is not None else None
+        self._chunks: list[dict[str, np.ndarray]] = []
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            if not resume and self._chunk_files():
+                raise ValueError(
+                    f'{self.path} already holds {len(self)} chunks, pass resume=True to append to them'
+                )
+
+    def _chunk_files(self) -> list[Path]:
+        return sorted(self.path.glob('chunk_*.npz'))
+
+    def __len__(self) -> int:
+        """Number of chunks in the store"""
+        return len(self._chunks) if self.path is None else len(
+            self._chunk_files())
+
+    def append(self, columns: dict[str, np.ndarray]):
+        if self.path is None:
+            self._chunks.append(columns)
+            return
+        save_npz(self.path / f'chunk_{len(self):06d}.npz', **columns)
+
+    def chunks(self) -> Iterator[dict[str, np.ndarray]]:
+        if self.path is None:
+            yield from self._chunks
+            return
+        for file in self._chunk_files():
+            with np.load(file) as data:
+                yield dict(data)
+
+    def load(self) -> dict[str, np.ndarray]:
+        chunks = list(self.chunks())
+        if not chunks:
+            return {}
+        return {
+            key: np.concatenate([chunk[key] for chunk in chunks])
+            for key in chunks[0]
+        }
+
+    def to_dataframe(self) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(self.load())
+
+    def to_parquet(self, file: Path | str):
+        """Write all results to a Parquet file, needs pyarrow or fastparquet"""
+        self.to_dataframe().to_parquet(file)
+
+
+class DesignSweep:
+    """
+    Full factorial sweep of an aircraft over a grid of parameters, evaluated in vectorized chunks spread over a
+    process pool.
+
+    Parameters are given by their Aircraft attribute path, e.g. 'payload_mass', 'wing.span', 'range' or
+    'mission_profile.CRUISE.duration'; see DesignBatch.set_path for the supported paths.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft,
+                 grid: dict[str, Sequence[float]],
+                 chunk_size: int = 4096):
+        self.aircraft = aircraft
+        self.grid = {path: np.asarray(values) for path, values in grid.items()}
+        self.chunk_size = chunk_size
+
+    def __len__(self) -> int:
+        return int(np.prod([len(values) for values in self.grid.values()]))
+
+    def parameters(self) -> dict[str, np.ndarray]:
+        """Flattened parameter values of all design points, in row-major grid order"""
+        mesh = np.meshgrid(*self.grid.values(), indexing='ij')
+        return {path: m.ravel() for path, m in zip(self.grid, mesh)}
+
+    def design_batch(self) -> DesignBatch:
+        parameters = self.parameters()
+        return sample_batch(DesignBatch.from_aircraft(self.aircraft),
+                            list(parameters),
+                            np.column_stack(list(parameters.values())))
+
+    def chunks(self) -> Iterator[DesignBatch]:
+        batch = self.design_batch()
+        for start in range(0, len(batch), self.chunk_size):
+            yield batch[start:start + self.chunk_size]
+
+    def run(self,
+            store: SweepStore = None,
+            max_workers: int = None,
+            cache: SizingCache | None = sizing_cache,
+            **kwargs) -> SweepStore:
+        """
+        Evaluate all design points and stream the results into the store, one chunk at a time.
+        :param store: Store to write to, an in-memory store if None
+        :param max_workers: Number of worker processes, evaluated in this process if 1
+        :param cache: Cache of evaluated chunks, chunks found in it are not evaluated again; None to always evaluate
+        :param kwargs: Passed on to evaluate_batch
+        :return: The store with one row per design point
+        """
+        store = store if store is not None else SweepStore()
+        parameters = self.parameters()
+        chunks = list(self.chunks())
+        keys = [
+            canonical_hash('evaluate_batch', chunk, kwargs)
+            if cache is not None and cache.enabled else None
+            for chunk in chunks
+        ]
+        cached = [key is not None and key in cache for key in keys]
+        missing = [chunk for chunk, hit in zip(chunks, cached) if not hit]
+        logger.info(
+            f'Sweeping {len(self)} design points of {self.aircraft.full_name} over {list(self.grid)}, '
+            f'{sum(cached)} of {len(chunks)} chunks cached')
+        evaluate = partial(evaluate_batch, **kwargs)
+        evaluated = map_chunks(evaluate, missing, max_workers)
+        self._store_results(
+            store, parameters,
+            self._results(chunks, keys, cached, evaluated, evaluate, cache))
+        return store
+
+    @staticmethod
+    def _results(chunks: list[DesignBatch], keys: list[str | None],
+                 cached: list[bool], evaluated: Iterator[dict[str,
+                                                              np.ndarray]],
+                 evaluate: Callable[[DesignBatch], dict[str, np.ndarray]],
+                 cache: SizingCache | None) -> Iterator[dict[str, np.ndarray]]:
+        """Results of all chunks in order, taken from the cache or from the evaluated chunks"""
+        for chunk, key, hit in zip(chunks, keys, cached):
+            columns = cache.get(key) if hit else None
+            if columns is None:
+                # evicted since the lookup, evaluated here instead
+                columns = evaluate(chunk) if hit else next(evaluated)
+                if key is not None:
+                    cache.put(key, columns)
+            yield columns
+
+    def _store_results(self, store: SweepStore, parameters: dict[str,
+                                                                 np.ndarray],
+                       results: Iterator[dict[str, np.ndarray]]):
+        start = 0
+        not_converged = 0
+        for columns in results:
+            stop = start + len(columns['total_mass'])
+            store.append({
+                **{
+                    path: values[start:stop]
+                    for path, values in parameters.items()
+                },
+                **columns
+            })
+            not_converged += int((~columns['converged']).sum())
+            start = stop
+        if not_converged:
+            logger.warning(f'{not_converged} design points did not converge')
@@ -0,0 +1,303 @@
+"""
+Monte Carlo propagation of input uncertainty through the sizing chain.
+
+Samples of the uncertain inputs are pushed through the Class II mass closure, the hinge loads and the Class I
+vertical climb design point as batched array computations (see sweep.evaluate_batch), in chunks so 10^5 samples
+per concept fit in memory.
+
+Every input path draws its uniform random numbers from its own stream, seeded by the seed and the path. Concepts
+analysed with the same seed therefore see the same random numbers for the same input (common random numbers), so
+the differences between concepts are not drowned in sampling noise:
+
+    distributions = relative_distributions(concept_C2_1, {'estimated_CD0': 0.2, 'TA': 0.1})
+    results = compare_concepts(all_concepts, lambda concept: relative_distributions(concept, spreads), n=10**5)
+    results['C2.1'].difference(results['C1.5'], 'total_mass')
+"""
+from __future__ import annotations
+
+import zlib
+from dataclasses import dataclass
+from functools import partial
+from typing import TYPE_CHECKING, Callable, Sequence
+
+import numpy as np
+from scipy import stats
+from scipy.constants import g
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.design_point import DesignPoint
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.formula.atmosphere import density
+from sizing_tools.formula.constraint import stall_wing_loading
+from sizing_tools.global_sensitivity import capped_upper_bound
+from sizing_tools.mass_model.classII.batch import DesignBatch
+from sizing_tools.mass_model.constraint_diagram import C_L_MAX, ConstraintInputs, constraint_diagram
+from sizing_tools.sweep import evaluate_batch, map_chunks, sample_batch
+from utility.log import logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+OUTPUTS = ('total_mass', 'energy', 'takeoff_power', 'hinge_load',
+           'hinge_moment', 'wing_loading', 'vertical_climb_power')
+# Aircraft attribute paths that only enter the Class I constraint diagram, by their ConstraintInputs field
+CLASS_I_FIELDS = {
+    'TA': 'TA',
+    's_fus': 's_fus',
+    'v_stall': 'v_stall',
+    'takeoff_load_factor': 'takeoff_load_factor',
+}
+PERCENTILES = (5, 50, 95)
+
+
+def relative_distributions(
+        aircraft: Aircraft,
+        spreads: dict[str, float],
+        kind: str = 'normal') -> dict[str, stats.rv_continuous]:
+    """
+    Distributions centred on the values of an aircraft, capped like global_sensitivity.relative_bounds.
+    :param aircraft: Aircraft with the nominal values
+    :param spreads: Relative standard deviation (normal) or half width (uniform, triangular) per attribute path
+    :param kind: 'normal', truncated at three standard deviations, 'uniform' or 'triangular'
+    :return: Frozen scipy.stats distribution per path
+    """
+    point = DesignPoint.from_aircraft(aircraft)
+    distributions = {}
+    for path, spread in spreads.items():
+        value = point[path]
+        if value == 0:
+            raise ValueError(
+                f'{path} of {aircraft.id} is 0, give its distribution explicitly instead of a relative spread'
+            )
+        width = abs(value) * spread
+        half_width = 3 * width if kind == 'normal' else width
+        lower, upper = value - half_width, capped_upper_bound(
+            path, value + half_width)
+        match kind:
+            case 'normal':
+                distributions[path] = stats.truncnorm((lower - value) / width,
+                                                      (upper - value) / width,
+                                                      loc=value,
+                                                      scale=width)
+            case 'uniform':
+                distributions[path] = stats.uniform(lower, upper - lower)
+            case 'triangular':
+                distributions[path] = stats.triang(
+                    (value - lower) / (upper - lower), lower, upper - lower)
+            case _:
+                raise ValueError(f'unknown distribution kind {kind}')
+    return distributions
+
+
+def uniform_samples(paths: Sequence[str], n: int, seed: int = 0) -> np.ndarray:
+    """
+    Common random numbers: the uniform samples of a path only depend on the seed and the path itself, not on the
+    other paths or their order.
+    :param paths: Attribute paths
+    :param n: Number of samples
+    :param seed: Seed shared by all concepts that are compared
+    :return: Uniform samples of shape (n, len(paths))
+    """
+    samples = np.empty((n, len(paths)))
+    for j, path in enumerate(paths):
+        rng = np.random.default_rng([seed, zlib.crc32(path.encode())])
+        samples[:, j] = rng.random(n)
+    return samples
+
+
+def _evaluate_samples(aircraft: Aircraft, base: DesignBatch,
+                      paths: tuple[str, ...], outputs: tuple[str, ...],
+                      samples: np.ndarray) -> dict[str, np.ndarray]:
+    """sweep.evaluate_samples, with the Class I columns and the paths of CLASS_I_FIELDS"""
+    batch_paths = [
+        j for j, path in enumerate(paths) if path not in CLASS_I_FIELDS
+    ]
+    batch = sample_batch(base, [paths[j] for j in batch_paths],
+                         samples[:, batch_paths])
+    columns = evaluate_batch(batch)
+    class_I = {
+        CLASS_I_FIELDS[path]: samples[:, j]
+        for j, path in enumerate(paths) if path in CLASS_I_FIELDS
+    }
+
+    # Class I design point at the sized total mass: the wing is sized at the stall wing loading, where the vertical
+    # climb constraint gives the takeoff power, as in ClassIModel.output
+    inputs = ConstraintInputs.from_aircraft(
+        aircraft,
+        cruise_velocity=batch.cruise_velocity,
+        estimated_CD0=batch.estimated_CD0,
+        aspect_ratio=batch.aspect_ratio,
+        oswald_efficiency_factor=batch.oswald_efficiency_factor,
+        propulsion_efficiency=batch.propulsion_efficiency,
+        figure_of_merit=batch.figure_of_merit,
+        climb_vertical_speed=batch.phase_vertical_speed[:,
+                                                        batch.phases.
+                                                        index(Phase.CLIMB)],
+        wing_area=np.nan,
+        total_mass=columns['total_mass'],
+        **class_I)
+    wing_loading = stall_wing_loading(
+        inputs.v_stall, density(np.nan_to_num(inputs.cruise_altitude)),
+        C_L_MAX)
+    diagram = constraint_diagram(inputs, wing_loading[:, None])
+    columns['wing_loading'] = wing_loading
+    columns['vertical_climb_power'] = g * columns[
+        'total_mass'] / diagram.vertical_climb[:, 0]
+    return {output: columns[output] for output in (*outputs, 'converged')}
+
+
+@dataclass(frozen=True)
+class MonteCarloResult:
+    id: str
+    # sampled value per input path and value per output, one per sample
+    inputs: dict[str, np.ndarray]
+    outputs: dict[str, np.ndarray]
+    converged: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.converged)
+
+    def percentiles(
+            self,
+            percentiles: Sequence[float] = PERCENTILES
+    ) -> dict[str, np.ndarray]:
+        """
+        Percentile bands of the converged samples.
+        :param percentiles: Percentiles in [0, 100]
+        :return: Value per percentile for every output
+        """
+        return {
+            output: np.percentile(values[self.converged], percentiles)
+            for output, values in self.outputs.items()
+        }
+
+    def difference(self,
+                   other: 'MonteCarloResult',
+                   output: str,
+                   percentiles: Sequence[float] = PERCENTILES) -> np.ndarray:
+        """
+        Percentiles of the sample-wise difference of an output to another concept. With common random numbers this is
+        much tighter than the difference of the percentile bands.
+        :param other: Result of the other concept, from the same seed and number of samples
+        :param output: Output to compare
+        :param percentiles: Percentiles in [0, 100]
+        :return: Value of this concept minus the other per percentile
+        """
+        if len(other) != len(self):
+            raise ValueError(
+                f'{self.id} has {len(self)} samples, {other.id} {len(other)}')
+        converged = self.converged & other.converged
+        return np.percentile(
+            (self.outputs[output] - other.outputs[output])[converged],
+            percentiles)
+
+    def to_dataframe(self,
+                     percentiles: Sequence[float] = PERCENTILES
+                     ) -> pd.DataFrame:
+        import pandas as pd
+
+        return pd.DataFrame(self.percentiles(percentiles),
+                            index=[f'p{p:g}' for p in percentiles]).T
+
+
+class MonteCarlo:
+    """
+    Monte Carlo uncertainty propagation for one aircraft.
+    """
+
+    def __init__(self,
+                 aircraft: Aircraft,
+                 distributions: dict[str, stats.rv_continuous],
+                 outputs: Sequence[str] = OUTPUTS,
+                 chunk_size: int = 8192):
+        """
+        :param aircraft: Aircraft with the values of all inputs that are not uncertain
+        :param distributions: Frozen scipy.stats distribution per Aircraft attribute path, see DesignBatch.set_path and
+            CLASS_I_FIELDS for the supported paths
+        :param outputs: Columns of sweep.evaluate_batch, 'wing_loading' or 'vertical_climb_power' to keep
+        :param chunk_size: Number of samples evaluated at once
+        """
+        self.aircraft = aircraft
+        self.base = DesignBatch.from_aircraft(aircraft)
+        self.paths = tuple(distributions)
+        self.distributions = distributions
+        for path in self.paths:
+            if path not in CLASS_I_FIELDS:
+                # raises for unsupported paths before any sample is evaluated
+                self.base[[0]].set_path(path, np.nan)
+        self.outputs = tuple(outputs)
+        self.chunk_size = chunk_size
+
+    def samples(self, n: int, seed: int = 0) -> np.ndarray:
+        """
+        :param n: Number of samples
+        :param seed: Seed of the common random numbers
+        :return: Input samples of shape (n, k)
+        """
+        samples = uniform_samples(self.paths, n, seed)
+        for j, path in enumerate(self.paths):
+            samples[:, j] = self.distributions[path].ppf(samples[:, j])
+        return samples
+
+    def run(self,
+            n: int = 10**4,
+            seed: int = 0,
+            max_workers: int = 1) -> MonteCarloResult:
+        """
+        :param n: Number of samples
+        :param seed: Seed of the common random numbers
+        :param max_workers: Number of worker processes, evaluated in this process if 1
+        :return: MonteCarloResult
+        """
+        samples = self.samples(n, seed)
+        chunks = [
+            samples[start:start + self.chunk_size]
+            for start in range(0, n, self.chunk_size)
+        ]
+        results = list(
+            map_chunks(
+                partial(_evaluate_samples, self.aircraft, self.base,
+                        self.paths, self.outputs), chunks, max_workers))
+        columns = {
+            key: np.concatenate([result[key] for result in results])
+            for key in (*self.outputs, 'converged')
+        }
+        converged = columns.pop('converged')
+        if not converged.all():
+            logger.warning(
+                f'{(~converged).sum()} of {n} samples of {self.aircraft.id} did not converge'
+            )
+        return MonteCarloResult(id=self.aircraft.id,
+                                inputs={
+                                    path: samples[:, j]
+                                    for j, path in enumerate(self.paths)
+                                },
+                                outputs=columns,
+                                converged=converged)
+
+
+def compare_concepts(concepts: Sequence[Aircraft],
+                     distributions: dict[str, stats.rv_continuous]
+                     | Callable[[Aircraft], dict[str, stats.rv_continuous]],
+                     n: int = 10**4,
+                     seed: int = 0,
+                     max_workers: int = 1,
+                     **kwargs) -> dict[str, MonteCarloResult]:
+    """
+    Run the Monte Carlo analysis of several concepts with common random numbers.
+    :param concepts: Aircraft to compare
+    :param distributions: Distributions shared by all concepts, or a function giving those of a concept
+    :param n: Number of samples per concept
+    :param seed: Seed shared by all concepts
+    :param max_workers: Number of worker processes per concept
+    :param kwargs: Passed on to MonteCarlo
+    :return: MonteCarloResult per concept id
+    """
+    return {
+        concept.id:
+        MonteCarlo(
+            concept,
+            distributions(concept) if callable(distributions) else
+            distributions, **kwargs).run(n, seed, max_workers)
+        for concept in concepts
+    }
@@ -1,26 +1,45 @@
+from functools import lru_cache
 from pathlib import Path
 
-import pandas as pd
-import pint
+raw_data_path = Path(__file__).parent.parent.parent / "data"
+# Created by the code that writes to it, not on import
+save_path = Path(__file__).parent.parent / "save"
 
-if pd.__version__ == "2.0.0rc0":
-    import pyarrow
 
-    pd.options.mode.dtype_backend = 'pyarrow'
-    float_type = pd.ArrowDtype(pyarrow.float64())
-    int_type = pd.ArrowDtype(pyarrow.int64())
-    bool_type = pd.ArrowDtype(pyarrow.bool_())
-else:
-    float_type = 'float64'
-    int_type = 'int64'
-    bool_type = 'bool'
+@lru_cache(maxsize=1)
+def _dtypes() -> tuple:
+    import pandas as pd
+
+    if pd.__version__ == "2.0.0rc0":
+        import pyarrow
+
+        pd.options.mode.dtype_backend = 'pyarrow'
+        return (pd.ArrowDtype(pyarrow.float64()),
+                pd.ArrowDtype(pyarrow.int64()), pd.ArrowDtype(pyarrow.bool_()))
+    return 'float64', 'int64', 'bool'
+
+
+@lru_cache(maxsize=1)
+def unit_registry():
+    """The pint unit registry, built on first use since that takes a large part of the import time"""
+    import pint
+
+    # fraction and percent may already be defined by pint
+    ureg = pint.UnitRegistry(system="mks", on_redefinition='ignore')
+    ureg.define('fraction = [] = frac')
+    ureg.define('percent = 1e-2 frac = %')
+    ureg.define('ddmmyy = [] = ddmmyy')
+    return ureg
 
-raw_data_path = Path(__file__).parent.parent.parent / "data"
-save_path = Path(__file__).parent.parent / "save"
-save_path.mkdir(parents=True, exist_ok=True)
 
-ureg = pint.UnitRegistry(system="mks")
-Q_ = ureg.Quantity
-ureg.define('fraction = [] = frac')
-ureg.define('percent = 1e-2 frac = %')
-ureg.define('ddmmyy = [] = ddmmyy')
+def __getattr__(name: str):
+    # pandas and pint are only imported when these are first used
+    match name:
+        case 'float_type' | 'int_type' | 'bool_type':
+            return _dtypes()[('float_type', 'int_type',
+                              'bool_type').index(name)]
+        case 'ureg':
+            return unit_registry()
+        case 'Q_':
+            return unit_registry().Quantity
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,15 @@
-import inspect
 import logging
 
-from .log_setup import setup_logging
+from .log_setup import SamplingFilter, setup_logging, stop_logging
 
-frame = inspect.currentframe().f_back
-file_path = frame.f_globals["__file__"]
-file_name = file_path.split("/")[-1].split(".")[0]
-
-logger = logging.getLogger(file_name)
+logger = logging.getLogger('transwing')
+# Logger for records emitted inside the solver loops, which are sampled (see config.json). Pass the values as arguments
+# instead of formatting them into the message, so that dropped records cost no formatting.
+solver_logger = logging.getLogger('transwing.solver')
 
 setup_logging()
 
-__all__ = ['setup_logging', 'logger']
\ No newline at end of file
+__all__ = [
+    'setup_logging', 'stop_logging', 'SamplingFilter', 'logger',
+    'solver_logger'
+]
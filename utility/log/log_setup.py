@@ -2,15 +2,114 @@ import atexit
 import json
 import logging.config
 import logging.handlers
+import os
 import pathlib
+import queue
+from collections import Counter
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Let through the first `burst` records of every message template of a logger, and then every `rate`-th one.
+
+    Meant for high-frequency records of the solver internals, sampled records get the number of records of their
+    template so far as `sample_count`.
+    """
+
+    def __init__(self, rate: int = 100, burst: int = 20):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.counts = Counter()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        key = record.name, record.msg
+        self.counts[key] += 1
+        count = self.counts[key]
+        record.sample_count = count
+        return count <= self.burst or count % self.rate == 0
+
+
+class LazyRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that creates its file, and the directory of it, when the first record is written"""
+
+    def __init__(self, filename: str, **kwargs):
+        super().__init__(filename, delay=True, **kwargs)
+
+    def _open(self):
+        pathlib.Path(self.baseFilename).parent.mkdir(parents=True,
+                                                     exist_ok=True)
+        return super()._open()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the handlers of the listener thread.
+
+    The standard QueueHandler formats every record before putting it on the queue, so that it can be pickled. The queue
+    here never leaves the process, so the record is passed on as is and the logging thread only pays for creating it.
+    Arguments of log calls must therefore not be mutated after the call.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _queue_handlers(names: list[str]):
+    # move the named handlers of the root logger behind a queue, served by a background thread
+    global _listener
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if handler.name in names]
+    if not handlers:
+        return
+    for handler in handlers:
+        root.removeHandler(handler)
+    log_queue = queue.SimpleQueue()
+    queue_handler = DeferredQueueHandler(log_queue)
+    queue_handler.setLevel(min(handler.level for handler in handlers))
+    root.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue,
+                                               *handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Write out all queued records and stop the logging thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+_FACTORIES = {
+    'SamplingFilter': SamplingFilter,
+    'LazyRotatingFileHandler': LazyRotatingFileHandler,
+}
 
 
 def setup_logging():
     config_file = pathlib.Path(__file__).resolve().parent / 'config.json'
     with open(config_file) as f_in:
         config = json.load(f_in)
+    queued = config.pop('queued_handlers', [])
+    # SOLVER_LOG_LEVEL=DEBUG logs (a sample of) the iterations of the solvers
+    if 'SOLVER_LOG_LEVEL' in os.environ:
+        config['loggers']['transwing.solver']['level'] = os.environ[
+            'SOLVER_LOG_LEVEL'].upper()
+    # the classes of this module cannot be imported by name while utility.log is being imported
+    for section in ('filters', 'handlers'):
+        for item in config.get(section, {}).values():
+            if item.get('()') in _FACTORIES:
+                item['()'] = _FACTORIES[item['()']]
 
-    log_file_path = pathlib.Path(config['handlers']['file']['filename'])
-    log_file_path.parent.mkdir(parents=True, exist_ok=True)
-
+    stop_logging()
     logging.config.dictConfig(config)
+    _queue_handlers(queued)
+
+
+atexit.register(stop_logging)
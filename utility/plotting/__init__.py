@@ -1,4 +1,5 @@
 from .plot_functions import show, save, save_with_name
-from .plot_settings import set_plot_params
+from .plot_settings import apply_plot_params, set_plot_params
 
-set_plot_params()
\ No newline at end of file
+# The plot parameters are set by the show and save decorators, so that importing this package does not import
+# matplotlib
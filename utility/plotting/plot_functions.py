@@ -1,13 +1,19 @@
+from __future__ import annotations
+
 import inspect
 import os
+from functools import wraps
 from pathlib import Path
-from typing import Callable, Tuple
-
-import matplotlib.pyplot as plt
+from typing import TYPE_CHECKING, Callable, Tuple
 
 from utility.log import logger
+from utility.plotting.plot_settings import apply_plot_params
 
-plotFunction = Callable[..., Tuple[plt.Figure, plt.Axes]]
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
+# matplotlib is only imported when a decorated plot function is called
+plotFunction = Callable[..., Tuple['plt.Figure', 'plt.Axes']]
 
 
 def show(plot_function: plotFunction) -> plotFunction:
@@ -15,10 +21,14 @@ def show(plot_function: plotFunction) -> plotFunction:
     Decorator to show the plot.
     """
 
+    @wraps(plot_function)
     def show_plot(*args, **kwargs) -> Tuple[plt.Figure, plt.Axes]:
         """
         Show the plot.
         """
+        import matplotlib.pyplot as plt
+
+        apply_plot_params()
         fig, ax = plot_function(*args, **kwargs)
         fig.tight_layout()
         plt.show()
@@ -34,10 +44,12 @@ def save(plot_function: plotFunction,
     Decorator to save the plot to a file.
     """
 
+    @wraps(plot_function)
     def save_plot(*args, **kwargs) -> Tuple[plt.Figure, plt.Axes]:
         """
         Save the plot to a file.
         """
+        apply_plot_params()
         fig, ax = plot_function(*args, **kwargs)
 
         # Construct the file name
@@ -45,11 +57,8 @@ def save(plot_function: plotFunction,
         ).parents[2] / 'figures' / _get_caller_file_name()
         os.makedirs(file_path, exist_ok=True)
         if name_func is None:
+            # the decorators keep the name of the plot function, so @save works on either side of @show
             filename = f"{plot_function.__name__}.pdf"
-            if filename == 'show_plot.pdf':
-                logger.warning(
-                    r"Make sure to use the @save decorator after the @show decorator."
-                )
             filename = filename.strip('plot').strip('_')
         else:
             filename = f"{name_func(args[0]).replace(' ', '_')}.pdf"
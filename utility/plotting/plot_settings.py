@@ -1,4 +1,4 @@
-import matplotlib.pyplot as plt
+from functools import lru_cache
 
 # Define Standard Units
 fsize = 14
@@ -14,6 +14,8 @@ def set_plot_params():
     """
     Set all parameters for the plot.
     """
+    import matplotlib.pyplot as plt
+
     plt.style.use(style)
     # plt.rcParams['text.usetex'] = True
     plt.rcParams['font.size'] = fsize
@@ -26,3 +28,9 @@ def set_plot_params():
     plt.rcParams['xtick.minor.size'] = minor
     plt.rcParams['ytick.major.size'] = major
     plt.rcParams['ytick.minor.size'] = minor
+
+
+@lru_cache(maxsize=1)
+def apply_plot_params():
+    """Set the plot parameters once, before the first plot is drawn"""
+    set_plot_params()
@@ -0,0 +1,192 @@
+"""
+Opt-in timing of the stages of the sizing pipeline.
+
+Functions are instrumented with the `stage` decorator and code blocks with `timed`. While profiling is disabled
+(the default) both only check one flag. Enable it for the whole process with PROFILE=1, or for a block with
+
+    with profiling() as profiler:
+        Iteration(concept_C2_1).run()
+    print(profiler.format_report())
+    profiler.write_collapsed(save_path / 'sizing.folded')
+
+The collapsed stack file can be turned into a flamegraph by flamegraph.pl or loaded directly by speedscope.
+"""
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Iterator, TypeVar
+
+F = TypeVar('F', bound=Callable)
+
+
+@dataclass(frozen=True)
+class StageStats:
+    name: str
+    calls: int
+    total_time: float  # s, nested calls of the same stage counted once
+    self_time: float  # s, without the time spent in other stages
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'path', 'start', 'child_time')
+
+    def __init__(self, profiler: 'Profiler', name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.path = (stack[-1].path if stack else ()) + (self.name, )
+        self.child_time = 0.
+        stack.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = perf_counter() - self.start
+        stack = self.profiler._stack()
+        stack.pop()
+        if stack:
+            stack[-1].child_time += elapsed
+        self.profiler._record(self.path, elapsed, elapsed - self.child_time)
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Call counts and times of the instrumented stages, per call stack"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # call stack of stage names -> [calls, total time, self time]
+        self.stacks: dict[tuple[str, ...], list] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list[_Timer]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _record(self, path: tuple[str, ...], total_time: float,
+                self_time: float):
+        with self._lock:
+            stats = self.stacks.setdefault(path, [0, 0., 0.])
+            stats[0] += 1
+            stats[1] += total_time
+            stats[2] += self_time
+
+    def timed(self, name: str) -> _Timer | _NullTimer:
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+
+    def report(self) -> list[StageStats]:
+        """
+        Statistics per stage, summed over all call stacks.
+        :return: StageStats sorted by total time, largest first
+        """
+        stages: dict[str, list] = {}
+        with self._lock:
+            items = list(self.stacks.items())
+        for path, (calls, total_time, self_time) in items:
+            stats = stages.setdefault(path[-1], [0, 0., 0.])
+            stats[0] += calls
+            # time of a stage nested in itself is already part of the outer call
+            if path[-1] not in path[:-1]:
+                stats[1] += total_time
+            stats[2] += self_time
+        return sorted(
+            (StageStats(name, *stats) for name, stats in stages.items()),
+            key=lambda stats: stats.total_time,
+            reverse=True)
+
+    def format_report(self) -> str:
+        lines = [
+            f'{"stage":<40} {"calls":>10} {"total [ms]":>12} {"self [ms]":>12}'
+        ]
+        for stats in self.report():
+            lines.append(
+                f'{stats.name:<40} {stats.calls:>10} {stats.total_time * 1e3:>12.3f} {stats.self_time * 1e3:>12.3f}'
+            )
+        return '\n'.join(lines)
+
+    def collapsed(self) -> list[str]:
+        """
+        Self time per call stack in the collapsed stack format of flamegraph.pl: `outer;inner microseconds`.
+        """
+        with self._lock:
+            items = sorted(self.stacks.items())
+        return [
+            f'{";".join(path)} {round(self_time * 1e6)}'
+            for path, (_, _, self_time) in items
+        ]
+
+    def write_collapsed(self, path: Path | str):
+        Path(path).write_text('\n'.join(self.collapsed()) + '\n')
+
+
+# Profiler used by `stage`, `timed` and `profiling`, enabled for the whole process with PROFILE=1
+profiler = Profiler(enabled=os.environ.get('PROFILE', '0') == '1')
+
+
+def stage(name: str) -> Callable[[F], F]:
+    """
+    Decorator recording the calls of a function as a stage of the global profiler.
+    :param name: Name of the stage in reports
+    """
+
+    def decorator(func: F) -> F:
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            with _Timer(profiler, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def timed(name: str) -> _Timer | _NullTimer:
+    """Context manager recording a block as a stage of the global profiler"""
+    return profiler.timed(name)
+
+
+@contextmanager
+def profiling(reset: bool = True) -> Iterator[Profiler]:
+    """
+    Enable the global profiler within a block.
+    :param reset: Discard the statistics recorded before
+    :return: The global profiler
+    """
+    enabled = profiler.enabled
+    if reset:
+        profiler.reset()
+    profiler.enabled = True
+    try:
+        yield profiler
+    finally:
+        profiler.enabled = enabled
@@ -1,20 +1,95 @@
 from __future__ import annotations
 
+import os
+import sys
+from fractions import Fraction
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 import numpy as np
-import pandas as pd
 
-from utility import Q_
+from utility.profiling import stage
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# In debug mode every conversion goes through a full pint Quantity, instead of the cached conversion factors
+debug = os.environ.get('UNIT_CONVERSION_DEBUG', '0') == '1'
+
+# Dimension and exact size in SI units of common units, converted without building the pint unit registry (which
+# takes most of the import time of the models). Any other unit is resolved by pint.
+SIMPLE_UNITS = {
+    **dict.fromkeys(('m', 'meter'), ('length', Fraction(1))),
+    **dict.fromkeys(('km', 'kilometer'), ('length', Fraction(1000))),
+    **dict.fromkeys(('ft', 'foot'), ('length', Fraction(3048, 10000))),
+    'm^2': ('area', Fraction(1)),
+    'ft^2': ('area', Fraction(3048, 10000)**2),
+    **dict.fromkeys(('s', 'sec', 'second'), ('time', Fraction(1))),
+    **dict.fromkeys(('min', 'minute'), ('time', Fraction(60))),
+    **dict.fromkeys(('h', 'hour'), ('time', Fraction(3600))),
+    'kg': ('mass', Fraction(1)),
+    'g': ('mass', Fraction(1, 1000)),
+    **dict.fromkeys(('lb', 'lbs'), ('mass', Fraction(45359237, 100000000))),
+    'm/s': ('velocity', Fraction(1)),
+    'km/h': ('velocity', Fraction(1000, 3600)),
+    'W': ('power', Fraction(1)),
+    'kW': ('power', Fraction(1000)),
+    **dict.fromkeys(('J', 'W*s'), ('energy', Fraction(1))),
+    'kJ': ('energy', Fraction(1000)),
+    'Wh': ('energy', Fraction(3600)),
+    'kWh': ('energy', Fraction(3600000)),
+}
+
+
+@lru_cache(maxsize=None)
+def conversion_factor(from_unit: str, to_unit: str) -> tuple[float, float]:
+    """
+    Resolve the conversion between two units once, as y = factor * x + offset.
+    :param from_unit: Unit to convert from
+    :param to_unit: Unit to convert to
+    :return: Multiplier and offset of the conversion
+    """
+    if from_unit in SIMPLE_UNITS and to_unit in SIMPLE_UNITS:
+        from_dimension, from_size = SIMPLE_UNITS[from_unit]
+        to_dimension, to_size = SIMPLE_UNITS[to_unit]
+        if from_dimension == to_dimension:
+            return float(from_size / to_size), 0.
+    from pint.errors import PintError
+
+    from utility import Q_
+
+    try:
+        offset = Q_(0., from_unit).to(to_unit).magnitude
+        factor = Q_(1., from_unit).to(to_unit).magnitude - offset
+    except PintError as e:
+        raise ValueError(
+            f'Cannot convert from {from_unit} to {to_unit}: {e}') from e
+    return factor, offset
+
+
+@stage('unit_conversion')
+def _convert(x, from_unit: str, to_unit: str):
+    factor, offset = conversion_factor(from_unit, to_unit)
+    if debug:
+        from utility import Q_
+
+        return Q_(x, from_unit).to(to_unit).magnitude
+    if offset:
+        return x * factor + offset
+    return x * factor
 
 
 def convert_float(x: float, from_unit: str, to_unit: str) -> float:
     """Convert a float from one unit to another"""
-    return Q_(x, from_unit).to(to_unit).magnitude
+    return _convert(x, from_unit, to_unit)
 
 
 def convert_array(array: np.ndarray | pd.Series, from_unit: str,
                   to_unit: str) -> pd.Series | np.ndarray:
     """Convert an array from one unit to another"""
-    if isinstance(array, pd.Series):
-        return pd.Series(Q_(array.values, from_unit).to(to_unit).magnitude)
+    # a series can only be passed if pandas has been imported already
+    pd = sys.modules.get('pandas')
+    if pd is not None and isinstance(array, pd.Series):
+        return pd.Series(_convert(array.values, from_unit, to_unit))
 
-    return Q_(array, from_unit).to(to_unit).magnitude
+    return _convert(np.asarray(array), from_unit, to_unit)
@@ -0,0 +1,39 @@
+"""
+Benchmark of Iteration.run with the closed-form optimal lift coefficients against the numerical optimization.
+
+Run with `python -m verification.benchmarks.benchmark_lift_coefficient`.
+"""
+from copy import deepcopy
+from functools import partial
+from timeit import repeat
+from unittest.mock import patch
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.formula.aero import C_D_from_CL, C_L_climb_opt, C_L_cruise_opt
+from sizing_tools.mass_model.iteration import Iteration
+from utility.log import logger
+
+
+def time_iteration(concept, number: int = 3) -> float:
+    return min(
+        repeat(lambda: Iteration(deepcopy(concept)).run(cache=None),
+               number=1,
+               repeat=number))
+
+
+def main():
+    for concept in all_concepts:
+        analytic_time = time_iteration(concept)
+        with patch.multiple('sizing_tools.mass_model.classII.evaluation',
+                            C_L_climb_opt=partial(C_L_climb_opt,
+                                                  drag_polar=C_D_from_CL),
+                            C_L_cruise_opt=partial(C_L_cruise_opt,
+                                                   drag_polar=C_D_from_CL)):
+            numerical_time = time_iteration(concept)
+        logger.info(
+            f'{concept.id}: analytic {analytic_time * 1e3:.1f} ms, numerical {numerical_time * 1e3:.1f} ms, '
+            f'speedup {numerical_time / analytic_time:.1f}x per Iteration.run')
+
+
+if __name__ == '__main__':
+    main()
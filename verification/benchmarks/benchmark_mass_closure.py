@@ -0,0 +1,40 @@
+"""
+Benchmark of the accelerated mass closure against the nested fixed point iterations of Iteration.run, counted in
+evaluations of the airframe mass laws (one per evaluation of the total mass estimate) and in wall time.
+
+Run with `python -m verification.benchmarks.benchmark_mass_closure`.
+"""
+from copy import deepcopy
+from timeit import default_timer
+from unittest.mock import patch
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.mass_model.classII.evaluation import airframe_masses
+from sizing_tools.mass_model.iteration import Iteration
+from utility.log import logger
+
+
+def run(concept, method: str) -> tuple[Iteration, int, float]:
+    iteration = Iteration(deepcopy(concept))
+    with patch('sizing_tools.mass_model.classII.evaluation.airframe_masses', wraps=airframe_masses) as nested, \
+            patch('sizing_tools.mass_model.classII.closure.airframe_masses', wraps=airframe_masses) as closure:
+        start = default_timer()
+        iteration.run(method=method, cache=None)
+        duration = default_timer() - start
+    return iteration, nested.call_count + closure.call_count, duration
+
+
+def main():
+    for concept in all_concepts:
+        _, nested_evaluations, nested_time = run(concept, 'nested')
+        for method in ('newton', 'anderson'):
+            iteration, evaluations, duration = run(concept, method)
+            logger.info(
+                f'{concept.id} {method}: {iteration.closure.iterations} iterations, {evaluations} evaluations '
+                f'({duration * 1e3:.1f} ms) against {nested_evaluations} nested evaluations '
+                f'({nested_time * 1e3:.1f} ms), final residual {iteration.closure.residuals[-1]:.1e} kg'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Minimal benchmark harness for the pytest benchmark suite.
+
+Wall times are the best of several repeats. They are compared relative to a fixed reference workload timed next to
+them, so that a uniformly slower or busier machine does not show up as a regression. Evaluations count calls of the
+airframe mass laws (one per evaluation of the total mass estimate) and allocations are the peak of traced memory during
+one call. Baselines are stored as JSON and are only meaningful on the machine that recorded them.
+"""
+import json
+import os
+import platform
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable
+from unittest.mock import patch
+
+import numpy as np
+
+from sizing_tools.mass_model.classII.evaluation import airframe_masses
+
+# Set BENCHMARK=1 to run the benchmarks, BENCHMARK_UPDATE=1 to record new baselines and BENCHMARK_THRESHOLD to change
+# the allowed relative slowdown
+enabled = os.environ.get('BENCHMARK', '0') == '1' or os.environ.get(
+    'BENCHMARK_UPDATE', '0') == '1'
+update = os.environ.get('BENCHMARK_UPDATE', '0') == '1'
+threshold = float(os.environ.get('BENCHMARK_THRESHOLD', '0.5'))
+baseline_file = Path(
+    os.environ.get('BENCHMARK_BASELINES',
+                   Path(__file__).parent / 'baselines.json'))
+
+# Names the mass laws are called by, to count evaluations
+COUNTED_FUNCTIONS = (
+    'sizing_tools.mass_model.classII.evaluation.airframe_masses',
+    'sizing_tools.mass_model.classII.closure.airframe_masses',
+)
+
+
+@dataclass
+class Measurement:
+    time: float  # s per call
+    evaluations: int  # calls of the mass laws per call
+    allocations: int  # peak traced memory in bytes during one call
+    reference: float  # s per call of the reference workload, measured next to the function
+
+
+def _reference_workload():
+    # mix of interpreted code and small numpy operations, like the sizing models
+    total = 0.
+    for i in range(200):
+        total += float(np.sqrt(np.arange(16.) * i).sum())
+    return total
+
+
+def _time(func: Callable[..., Any], setup: Callable[[], tuple] | None,
+          number: int) -> float:
+    total = 0.
+    for _ in range(number):
+        args = setup() if setup is not None else ()
+        start = perf_counter()
+        func(*args)
+        total += perf_counter() - start
+    return total
+
+
+def _best_time(func: Callable[..., Any], setup: Callable[[], tuple] | None,
+               repeat: int, min_time: float) -> float:
+    """Fastest time per call of repeats that each take at least min_time"""
+    number = 1
+    while (duration := _time(func, setup, number)) < min_time:
+        number *= max(2, min(10, int(min_time / max(duration, 1e-9))))
+    times = [duration
+             ] + [_time(func, setup, number) for _ in range(repeat - 1)]
+    return min(times) / number
+
+
+def measure(func: Callable[..., Any],
+            setup: Callable[[], tuple] = None,
+            repeat: int = 7,
+            min_time: float = 0.05) -> Measurement:
+    """
+    Measure a function.
+    :param func: Function to measure, called with the arguments returned by setup
+    :param setup: Untimed function returning the arguments of func, called before every call
+    :param repeat: Number of repeats, the fastest one is used
+    :param min_time: Minimum duration of a repeat in s, short calls are repeated until it is reached
+    :return: Measurement
+    """
+    reference = _best_time(_reference_workload, None, repeat, min_time)
+    time = _best_time(func, setup, repeat, min_time)
+
+    args = setup() if setup is not None else ()
+    with ExitStack() as stack:
+        mocks = [
+            stack.enter_context(patch(target, wraps=airframe_masses))
+            for target in COUNTED_FUNCTIONS
+        ]
+        func(*args)
+    evaluations = sum(mock.call_count for mock in mocks)
+
+    # lazily filled caches make the first calls allocate more, so the lowest peak of a few calls is used
+    peaks = []
+    for _ in range(3):
+        args = setup() if setup is not None else ()
+        tracemalloc.start()
+        try:
+            func(*args)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+    reference = min(reference,
+                    _best_time(_reference_workload, None, repeat, min_time))
+    return Measurement(time, evaluations, min(peaks), reference)
+
+
+def load_baselines() -> dict[str, dict[str, float]]:
+    if not baseline_file.exists():
+        return {}
+    return json.loads(baseline_file.read_text())['benchmarks']
+
+
+def save_baselines(baselines: dict[str, Measurement]):
+    data = {
+        'environment': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+        },
+        'benchmarks': {
+            **load_baselines(),
+            **{
+                name: asdict(measurement)
+                for name, measurement in baselines.items()
+            }
+        },
+    }
+    baseline_file.write_text(json.dumps(data, indent=2, sort_keys=True))
+
+
+def regressions(name: str, measurement: Measurement,
+                baseline: dict[str, float]) -> list[str]:
+    """
+    Compare a measurement to its baseline.
+    :return: Descriptions of every metric that got worse by more than the threshold
+    """
+    found = []
+    # baseline time scaled to the current speed of the machine
+    expected = baseline['time'] * measurement.reference / baseline['reference']
+    if measurement.time > expected * (1 + threshold):
+        found.append(
+            f'{name}: {measurement.time * 1e3:.3f} ms against {expected * 1e3:.3f} ms '
+            f'({baseline["time"] * 1e3:.3f} ms when recorded)')
+    if measurement.evaluations > baseline['evaluations']:
+        found.append(
+            f'{name}: {measurement.evaluations} evaluations against {baseline["evaluations"]}'
+        )
+    if measurement.allocations > baseline['allocations'] * (1 + threshold):
+        found.append(
+            f'{name}: {measurement.allocations} bytes allocated against {baseline["allocations"]}'
+        )
+    return found
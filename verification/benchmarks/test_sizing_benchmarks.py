@@ -0,0 +1,100 @@
+"""
+Benchmarks of the hot paths of the sizing pipeline, for every concept and the Joby S4.
+
+Skipped unless BENCHMARK=1; see harness.py for the other settings. Record baselines on the machine that runs the
+comparison with `BENCHMARK_UPDATE=1 python -m pytest verification/benchmarks`.
+"""
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from data.literature.evtols import joby_s4
+from sizing_tools.cache import sizing_cache
+from sizing_tools.hinge_loading import HingeLoadingModel
+from sizing_tools.mass_model.classI import ClassIModel
+from sizing_tools.mass_model.classII.classII import ClassIIModel
+from sizing_tools.mass_model.classII.energy_system import EnergySystemMassModel
+from sizing_tools.mass_model.iteration import Iteration
+from sizing_tools.mass_model.sensitivity import MassEstimation
+from utility.unit_conversion import convert_float
+from verification.benchmarks import harness
+
+pytestmark = pytest.mark.skipif(not harness.enabled,
+                                reason='benchmarks run with BENCHMARK=1')
+
+AIRCRAFT = [*all_concepts, joby_s4]
+
+
+@pytest.fixture(scope='module', autouse=True)
+def no_sizing_cache():
+    sizing_cache.enabled = False
+    yield
+    sizing_cache.enabled = True
+
+
+@pytest.fixture(scope='module')
+def sized():
+    return {
+        aircraft.id: Iteration(deepcopy(aircraft)).run()
+        for aircraft in AIRCRAFT
+    }
+
+
+def _convert_floats(aircraft):
+    for phase in aircraft.mission_profile.phases.values():
+        convert_float(phase.horizontal_speed, 'm/s', 'km/h')
+        convert_float(phase.distance, 'm', 'km')
+        convert_float(phase.duration, 's', 'min')
+        convert_float(phase.energy, 'J', 'kWh')
+
+
+BENCHMARKS = {
+    'ClassIIModel.total_mass':
+    (lambda model: model.total_mass(), lambda aircraft, sized: lambda:
+     (ClassIIModel(deepcopy(sized), initial_total_mass=1500.), )),
+    'Iteration.run':
+    (lambda iteration: iteration.run(), lambda aircraft, sized: lambda:
+     (Iteration(deepcopy(aircraft)), )),
+    'ClassIModel.output':
+    (lambda model: model.output(), lambda aircraft, sized: lambda:
+     (ClassIModel(deepcopy(sized)), )),
+    'HingeLoadingModel.shear_and_moment_at_hinge':
+    (lambda model: model.shear_and_moment_at_hinge(),
+     lambda aircraft, sized: lambda: (HingeLoadingModel(deepcopy(sized)), )),
+    'EnergySystemMassModel.estimate_energy':
+    (lambda model: model.estimate_energy(), lambda aircraft, sized: lambda:
+     (EnergySystemMassModel(sized, 1500.), )),
+    'MassEstimation.mass_over': (lambda estimation: estimation.mass_over(
+        np.linspace(200., 500., 4), estimation.ac_func_payload),
+                                 lambda aircraft, sized: lambda:
+                                 (MassEstimation(deepcopy(sized)), )),
+    'convert_float': (_convert_floats, lambda aircraft, sized: lambda:
+                      (sized, )),
+}
+
+# Benchmarks that do not apply to an aircraft, by aircraft id
+NOT_APPLICABLE = {
+    # the Joby S4 has no wing fold
+    ('HingeLoadingModel.shear_and_moment_at_hinge', joby_s4.id),
+}
+
+
+@pytest.mark.parametrize('aircraft', AIRCRAFT, ids=lambda a: a.id)
+@pytest.mark.parametrize('benchmark', BENCHMARKS)
+def test_benchmark(benchmark, aircraft, sized):
+    if (benchmark, aircraft.id) in NOT_APPLICABLE:
+        pytest.skip(f'{benchmark} does not apply to {aircraft.id}')
+    func, make_setup = BENCHMARKS[benchmark]
+    setup = make_setup(aircraft, sized[aircraft.id])
+    name = f'{benchmark}[{aircraft.id}]'
+    measurement = harness.measure(func, setup)
+    baseline = harness.load_baselines().get(name)
+    if harness.update or baseline is None:
+        harness.save_baselines({name: measurement})
+        if not harness.update:
+            pytest.skip(f'recorded a new baseline for {name}')
+        return
+    found = harness.regressions(name, measurement, baseline)
+    assert not found, 'performance regression: ' + '; '.join(found)
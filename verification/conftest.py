@@ -0,0 +1,11 @@
+import pytest
+
+from sizing_tools.cache import sizing_cache
+
+
+@pytest.fixture(autouse=True, scope='session')
+def memory_sizing_cache():
+    """Keep the shared sizing cache in memory, so the tests do not write to the save directory"""
+    path, sizing_cache.path = sizing_cache.path, None
+    yield
+    sizing_cache.path = path
@@ -0,0 +1,56 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.mass_model.classII.batch import DesignBatch
+
+
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_design_point_round_trip(concept):
+    point = DesignPoint.from_aircraft(concept)
+    exclude = {'mass_breakdown'}
+    assert point.to_aircraft().model_dump(
+        exclude=exclude) == concept.model_dump(exclude=exclude)
+    assert pickle.loads(pickle.dumps(point)) == point
+
+
+def test_design_point_replace_leaves_original_unchanged():
+    point = DesignPoint.from_aircraft(all_concepts[0])
+    variant = point.replace({'wing.span': 12.}, payload_mass=500.)
+    assert variant.payload_mass == 500. and variant['wing.span'] == 12.
+    assert point.payload_mass == all_concepts[0].payload_mass
+    assert point.to_aircraft().wing.span == all_concepts[0].wing.span
+    with pytest.raises(AttributeError):
+        point.payload_mass = 500.
+    with pytest.raises(ValueError):
+        point.values[0] = 1.
+
+
+def test_update_aircraft_matches_new_aircraft():
+    point = DesignPoint.from_aircraft(all_concepts[0])
+    aircraft = point.to_aircraft()
+    overrides = {
+        'wing.span': 12.,
+        'tail.S_th': 3.,
+        'payload_mass': 500.,
+        'mission_profile.CRUISE.duration': 1200.,
+    }
+    variant = point.replace(overrides)
+    assert variant.update_aircraft(aircraft, overrides) is aircraft
+    assert DesignPoint.from_aircraft(aircraft) == variant
+    assert aircraft.wing.aspect_ratio == variant.to_aircraft(
+    ).wing.aspect_ratio
+
+
+def test_batch_from_design_points():
+    points = [DesignPoint.from_aircraft(concept) for concept in all_concepts]
+    batch = DesignBatch.from_design_points(
+        [point.replace(payload_mass=400.) for point in points])
+    expected = DesignBatch.from_aircraft(list(all_concepts), payload_mass=400.)
+    for name in ('payload_mass', 'wing_span', 'phase_duration',
+                 'takeoff_power'):
+        np.testing.assert_array_equal(getattr(batch, name),
+                                      getattr(expected, name))
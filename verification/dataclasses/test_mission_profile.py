@@ -0,0 +1,107 @@
+import json
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.aircraft import Aircraft
+from data.concept_parameters.concepts import concept_C2_1
+from data.concept_parameters.design_point import DesignPoint
+from data.concept_parameters.mission_profile import SEGMENT_FIELDS, MissionPhase, MissionProfile, Phase
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.mass_model.classII.closure import mass_closure
+
+
+def _segment(segment: MissionPhase, **changes) -> MissionPhase:
+    return MissionPhase(**{**segment.to_dict(), 'name': None, **changes})
+
+
+def _split_cruise(aircraft, legs: int):
+    """Aircraft with the cruise of its mission flown in equal legs, followed by a reserve hover"""
+    aircraft = deepcopy(aircraft)
+    segments = []
+    for segment in aircraft.mission_profile.phases.values():
+        if segment.phase == Phase.CRUISE:
+            segments += [
+                _segment(segment,
+                         duration=segment.duration / legs,
+                         distance=segment.distance / legs) for _ in range(legs)
+            ]
+        else:
+            segments.append(_segment(segment))
+    aircraft.mission_profile = MissionProfile(name='multi-leg',
+                                              phases=segments)
+    return aircraft
+
+
+@pytest.fixture
+def aircraft():
+    return _split_cruise(concept_C2_1, 3)
+
+
+def test_repeated_segments(aircraft):
+    profile = aircraft.mission_profile
+    assert profile.phases.names == [
+        'TAKEOFF', 'HOVER_CLIMB', 'CLIMB', 'CRUISE', 'CRUISE_2', 'CRUISE_3',
+        'DESCENT', 'LANDING'
+    ]
+    assert profile.CRUISE is profile.phases[Phase.CRUISE] is profile.phases[3]
+    profile.CRUISE_2.duration = 100.
+    assert profile.phases.column('duration')[4] == 100.
+    assert profile.phases[4].phase == Phase.CRUISE
+    reserve = profile.phases.append(
+        MissionPhase(Phase.LANDING, 120., 0., 0., 0., 0., name='RESERVE'))
+    assert profile.RESERVE is reserve and len(profile.phases) == 9
+    assert profile.LANDING.name == 'LANDING'
+
+
+def test_cruise_legs_size_like_one_cruise(aircraft):
+    single = mass_closure(deepcopy(concept_C2_1))
+    legs = mass_closure(aircraft)
+    np.testing.assert_allclose(legs.total_mass, single.total_mass, rtol=1e-9)
+
+    batch = DesignBatch.from_aircraft(aircraft)
+    assert batch.phases.count(Phase.CRUISE) == 3
+    np.testing.assert_allclose(
+        BatchClassIIModel(batch).total_mass().total_mass,
+        legs.total_mass,
+        rtol=1e-6)
+
+
+def test_reserve_leg_increases_mass(aircraft):
+    reserve = deepcopy(aircraft)
+    reserve.mission_profile.phases.append(
+        _segment(reserve.mission_profile.CRUISE, name='DIVERSION'))
+    assert mass_closure(reserve).total_mass > mass_closure(aircraft).total_mass
+
+
+def test_design_point_keeps_segments(aircraft):
+    point = DesignPoint.from_aircraft(aircraft)
+    assert point.schema.segments == tuple(aircraft.mission_profile.phases)
+    assert point.replace({
+        'mission_profile.CRUISE_3.duration': 60.
+    }).to_aircraft().mission_profile.CRUISE_3.duration == 60.
+    assert point.to_aircraft(
+    ).mission_profile.phases == aircraft.mission_profile.phases
+
+
+def test_json_round_trip(aircraft):
+    copy = Aircraft.model_validate_json(aircraft.model_dump_json())
+    assert copy.mission_profile.phases == aircraft.mission_profile.phases
+
+    # the former format stores the segments by the value of their phase, without name
+    data = json.loads(concept_C2_1.model_dump_json())
+    data['mission_profile']['phases'] = {
+        segment['phase']: {
+            column: segment[column]
+            for column in ('phase', *SEGMENT_FIELDS)
+        }
+        for segment in data['mission_profile']['phases']
+    }
+    copy = Aircraft.model_validate_json(json.dumps(data))
+    assert copy.mission_profile.phases.names == list(
+        concept_C2_1.mission_profile.phases)
+    np.testing.assert_array_equal(
+        copy.mission_profile.phases.column('duration'),
+        concept_C2_1.mission_profile.phases.column('duration'))
+    assert copy.mission_profile.CRUISE.phase == Phase.CRUISE
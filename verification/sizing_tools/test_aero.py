@@ -0,0 +1,17 @@
+import numpy as np
+import pytest
+
+from sizing_tools.formula.aero import C_D_from_CL, C_L_climb_opt, C_L_cruise_opt
+
+
+@pytest.mark.parametrize('C_L_opt', [C_L_climb_opt, C_L_cruise_opt])
+def test_closed_form_matches_numerical_optimum(C_L_opt):
+    analytic = C_L_opt(0.04, 7.2, 0.85)
+    numerical = C_L_opt(0.04, 7.2, 0.85, drag_polar=C_D_from_CL)
+    assert analytic == pytest.approx(numerical, rel=1e-4)
+
+
+def test_closed_form_accepts_arrays():
+    C_D0 = np.array([0.03, 0.04])
+    np.testing.assert_allclose(C_L_climb_opt(C_D0, 7.2, 0.85),
+                               np.sqrt(3) * C_L_cruise_opt(C_D0, 7.2, 0.85))
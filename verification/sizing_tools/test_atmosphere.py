@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from aerosandbox import Atmosphere
+
+from sizing_tools.formula import atmosphere
+
+
+@pytest.mark.parametrize('name', [
+    'density',
+    'pressure',
+    'temperature',
+    'speed_of_sound',
+])
+def test_table_matches_aerosandbox(name):
+    altitudes = np.array([0., 1.5, 457.2, 500., 4572., 5999.5, 8000.])
+    expected = getattr(Atmosphere(altitude=altitudes), name)()
+    np.testing.assert_allclose(getattr(atmosphere, name)(altitudes),
+                               expected,
+                               rtol=1e-8)
+
+
+def test_scalar_lookup_is_cached():
+    atmosphere._state.cache_clear()
+    atmosphere.density(500.)
+    atmosphere.density(500.)
+    assert atmosphere._state.cache_info().hits == 1
+    assert atmosphere.density(500.) == pytest.approx(
+        Atmosphere(altitude=500.).density())
@@ -0,0 +1,42 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.mass_model.iteration import Iteration
+
+
+@pytest.fixture
+def concepts():
+    return [deepcopy(concept) for concept in all_concepts]
+
+
+def test_batch_matches_iteration(concepts):
+    result = BatchClassIIModel(
+        DesignBatch.from_aircraft(concepts)).total_mass()
+    expected = [Iteration(concept).run().total_mass for concept in concepts]
+    assert result.converged.all()
+    np.testing.assert_allclose(result.total_mass, expected, rtol=1e-8)
+
+
+def test_batch_overrides_broadcast(concepts):
+    payloads = np.linspace(100, 500, 7)
+    batch = DesignBatch.from_aircraft(concepts[0], payload_mass=payloads)
+    result = BatchClassIIModel(batch).total_mass()
+    assert len(batch) == 7
+    assert np.all(np.diff(result.total_mass) > 0)
+
+
+def test_batch_range_sets_cruise_duration(concepts):
+    batch = DesignBatch.from_aircraft(concepts[0],
+                                      range=[50e3, 100e3],
+                                      cruise_velocity=50)
+    cruise = batch.phases.index(concepts[0].mission_profile.CRUISE.phase)
+    np.testing.assert_allclose(batch.phase_duration[:, cruise], [1e3, 2e3])
+
+
+def test_batch_unknown_field_raises(concepts):
+    with pytest.raises(ValueError):
+        DesignBatch.from_aircraft(concepts[0], not_a_field=1)
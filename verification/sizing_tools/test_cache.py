@@ -0,0 +1,71 @@
+from copy import deepcopy
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C1_5, concept_C2_6
+from data.concept_parameters.design_point import DesignPoint
+from sizing_tools.cache import SizingCache, canonical_hash, model_modules
+from sizing_tools.mass_model.iteration import Iteration
+from sizing_tools.sweep import DesignSweep
+
+
+@pytest.fixture
+def point():
+    return DesignPoint.from_aircraft(concept_C1_5)
+
+
+def test_canonical_hash_is_content_addressed(point):
+    assert canonical_hash(point) == canonical_hash(
+        DesignPoint.from_aircraft(deepcopy(concept_C1_5)))
+    assert canonical_hash(point) != canonical_hash(
+        point.replace(payload_mass=point.payload_mass + 1e-9))
+    assert canonical_hash(point) == canonical_hash(point.replace(TA=1e3))
+    assert canonical_hash(np.array([0.])) == canonical_hash(np.array([-0.]))
+    assert canonical_hash({'a': 1, 'b': 2}) == canonical_hash({'b': 2, 'a': 1})
+    with pytest.raises(TypeError):
+        canonical_hash(object())
+
+
+def test_model_version_covers_imported_modules():
+    modules = model_modules()
+    for module in ('sizing_tools.mass_model.classII.evaluation',
+                   'sizing_tools.formula.sound', 'sizing_tools.noise',
+                   'sizing_tools.formula.constraint',
+                   'sizing_tools.mission_simulation',
+                   'utility.unit_conversion'):
+        assert module in modules
+
+
+def test_cache_reads_back_from_disk(tmp_path):
+    SizingCache(tmp_path).put('key', {'total_mass': 1200.})
+    cache = SizingCache(tmp_path)
+    assert cache.get('key') == {'total_mass': 1200.}
+    assert cache.get('other') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.clear()
+    assert 'key' not in SizingCache(tmp_path)
+
+
+def test_iteration_skips_cached_design(tmp_path):
+    cache = SizingCache(tmp_path)
+    expected = Iteration(deepcopy(concept_C1_5)).run(cache=cache)
+    with patch('sizing_tools.mass_model.iteration.mass_closure') as closure:
+        aircraft = Iteration(deepcopy(concept_C1_5)).run(cache=cache)
+    closure.assert_not_called()
+    assert aircraft.total_mass == expected.total_mass
+    assert aircraft.mass_breakdown_dict == expected.mass_breakdown_dict
+
+
+def test_sweep_skips_cached_chunks():
+    cache = SizingCache()
+    sweep = DesignSweep(deepcopy(concept_C2_6),
+                        {'payload_mass': np.linspace(200, 400, 6)},
+                        chunk_size=4)
+    expected = sweep.run(max_workers=1, cache=cache).load()
+    with patch('sizing_tools.sweep.evaluate_batch') as evaluate:
+        results = sweep.run(max_workers=1, cache=cache).load()
+    evaluate.assert_not_called()
+    np.testing.assert_array_equal(results['total_mass'],
+                                  expected['total_mass'])
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from data.concept_parameters.design_point import DesignPoint
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.mass_model.classII.classII import ClassIIModel
+from sizing_tools.mass_model.classII.evaluation import apply_result, evaluate
+
+
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_evaluate_does_not_modify_aircraft(concept):
+    aircraft = deepcopy(concept)
+    before = aircraft.model_dump()
+    result = evaluate(aircraft, 1500.)
+    assert aircraft.model_dump() == before
+    assert aircraft.mission_profile.CRUISE.power is None
+    with pytest.raises(TypeError):
+        result.mass_breakdown['airframe']['wing'] = 0.
+
+
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_adapter_matches_evaluate(concept):
+    aircraft = deepcopy(concept)
+    aircraft.total_mass = 1500.
+    ClassIIModel(aircraft).mass_breakdown()
+    expected = apply_result(deepcopy(concept), evaluate(concept, 1500.))
+    assert aircraft.mass_breakdown_dict == expected.mass_breakdown_dict
+    assert aircraft.mission_profile.energy == expected.mission_profile.energy
+    assert aircraft.TA == expected.TA
+
+
+def test_evaluate_threads():
+    points = [
+        DesignPoint.from_aircraft(all_concepts[0]).replace(payload_mass=p)
+        for p in np.linspace(200., 500., 8)
+    ]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = list(
+            executor.map(lambda p: evaluate(p, 1500.).total_mass, points))
+    serial = [evaluate(p, 1500.).total_mass for p in points]
+    assert parallel == serial
+
+
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_descent_has_positive_duration(concept):
+    phases = {phase.phase: phase for phase in evaluate(concept, 1500.).phases}
+    descent = phases[Phase.DESCENT]
+    lost = concept.cruise_altitude - concept.mission_profile.DESCENT.ending_altitude
+    assert descent.vertical_speed < 0
+    assert descent.duration > 0
+    assert descent.duration * -descent.vertical_speed == pytest.approx(lost)
+    assert descent.distance == pytest.approx(descent.horizontal_speed *
+                                             descent.duration)
+    assert descent.energy == 0
@@ -0,0 +1,44 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.mass_model.classI import ClassIModel
+from sizing_tools.mass_model.constraint_diagram import ConstraintInputs, constraint_diagram
+
+WING_LOADING = np.linspace(50, 1500, 300)
+
+
+@pytest.fixture
+def concepts():
+    concepts = [deepcopy(concept) for concept in all_concepts]
+    for concept in concepts:
+        concept.total_mass = 2150
+        ClassIModel(concept).w_s_stall_speed()
+    return concepts
+
+
+def test_batch_matches_class_I_model(concepts):
+    diagram = constraint_diagram(ConstraintInputs.from_aircraft(concepts),
+                                 WING_LOADING)
+    assert diagram.cruise.shape == (len(concepts), len(WING_LOADING))
+    for i, concept in enumerate(concepts):
+        model = ClassIModel(concept)
+        np.testing.assert_allclose(diagram.stall[i], model.w_s_stall_speed())
+        np.testing.assert_allclose(diagram.cruise[i], model._wp(WING_LOADING))
+        np.testing.assert_allclose(diagram.vertical_climb[i],
+                                   model.ver_climb(WING_LOADING))
+        np.testing.assert_allclose(diagram.climb[i],
+                                   model.steady_climb(WING_LOADING))
+
+
+def test_design_point_is_best_feasible_point(concepts):
+    inputs = ConstraintInputs.from_aircraft(concepts[0], TA=[300, 400, 500])
+    diagram = constraint_diagram(inputs, WING_LOADING)
+    wing_loading, power_loading = diagram.design_point()
+    assert np.all(wing_loading <= diagram.stall)
+    np.testing.assert_array_equal(power_loading,
+                                  np.nanmax(diagram.power_loading, axis=1))
+    # rotors with a higher disk loading need more power to take off
+    assert np.all(np.diff(power_loading) < 0)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_1
+from sizing_tools import global_sensitivity
+from sizing_tools.global_sensitivity import SensitivityAnalysis, relative_bounds
+from sizing_tools.sweep import SweepStore
+
+PARAMETERS = ('battery_energy_density', 'figure_of_merit', 'tail.S_th')
+
+
+@pytest.fixture
+def analysis():
+    return SensitivityAnalysis(concept_C2_1,
+                               relative_bounds(concept_C2_1, PARAMETERS),
+                               outputs=('total_mass', 'takeoff_power'),
+                               chunk_size=256)
+
+
+def test_sobol_indices(analysis):
+    indices = analysis.sobol(n=256, max_workers=1, bootstrap=20)
+    first, total = indices.first_order['total_mass'], indices.total_order[
+        'total_mass']
+    # the battery dominates the mass, the horizontal tail barely matters
+    assert np.argmax(first) == 0
+    assert total[2] < 0.05
+    assert np.all(total >= first - 0.05)
+    assert np.sum(first) == pytest.approx(1, abs=0.1)
+    # the takeoff power does not depend on the battery energy density directly
+    assert indices.total_order['takeoff_power'][1] > indices.total_order[
+        'takeoff_power'][2]
+    assert indices.to_dataframe().shape[0] == 2 * len(PARAMETERS)
+
+
+def test_sobol_confidence_is_narrow(analysis):
+    indices = analysis.sobol(n=1024, max_workers=1)
+    for output in analysis.outputs:
+        assert np.all(indices.first_order_confidence[output] < 0.1)
+        assert np.all(indices.total_order_confidence[output] < 0.1)
+    # the estimates do not depend on an offset of the output
+    f = np.random.default_rng(0).random((5, 64))
+    for estimate, offset in zip(
+            SensitivityAnalysis._sobol_estimates(f[0], f[1], f[2:]),
+            SensitivityAnalysis._sobol_estimates(f[0] + 1e3, f[1] + 1e3,
+                                                 f[2:] + 1e3)):
+        np.testing.assert_allclose(offset, estimate)
+
+
+def test_morris_ranks_parameters(analysis):
+    indices = analysis.morris(trajectories=20, max_workers=1)
+    mu_star = indices.mu_star['total_mass']
+    assert mu_star[0] > mu_star[2]
+    assert mu_star[1] > mu_star[2]
+    # a higher energy density gives a lighter aircraft
+    assert indices.mu['total_mass'][0] < 0
+
+
+def test_resumes_from_store(analysis, tmp_path, monkeypatch):
+    first = analysis.sobol(n=128, max_workers=1, store=tmp_path)
+    assert len(SweepStore(tmp_path, resume=True)) == int(
+        np.ceil(128 * (len(PARAMETERS) + 2) / 256))
+
+    # all chunks are in the store, so nothing is evaluated again
+    def evaluate(*args):
+        raise AssertionError('evaluated a stored chunk')
+
+    monkeypatch.setattr(global_sensitivity, 'evaluate_samples', evaluate)
+    second = analysis.sobol(n=128, max_workers=1, store=tmp_path)
+    np.testing.assert_array_equal(second.first_order['total_mass'],
+                                  first.first_order['total_mass'])
+
+    with pytest.raises(ValueError):
+        analysis.morris(trajectories=4, max_workers=1, store=tmp_path)
+
+
+def test_refuses_store_of_a_sweep(analysis, tmp_path):
+    SweepStore(tmp_path).append({'total_mass': np.zeros(3)})
+    with pytest.raises(ValueError):
+        analysis.sobol(n=16, max_workers=1, store=tmp_path)
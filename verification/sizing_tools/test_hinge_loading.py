@@ -0,0 +1,70 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.hinge_loading import BatchHingeLoadingModel, HingeLoadingModel
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.mass_model.iteration import Iteration
+
+
+@pytest.fixture(scope='module')
+def batch_model():
+    batch = DesignBatch.from_aircraft([deepcopy(c) for c in all_concepts])
+    model = BatchClassIIModel(batch)
+    return BatchHingeLoadingModel(
+        batch, model.mass_breakdown(model.total_mass().total_mass))
+
+
+def test_batch_hinge_matches_scalar(batch_model):
+    expected = np.array([
+        HingeLoadingModel(Iteration(
+            deepcopy(concept)).run(cache=None)).shear_and_moment_at_hinge()
+        for concept in all_concepts
+    ])
+    np.testing.assert_allclose(np.transpose(
+        batch_model.shear_and_moment_at_hinge()),
+                               expected,
+                               rtol=1e-7)
+
+
+def test_distribution_matches_pointwise_loads(batch_model):
+    eta, shear, moment = batch_model.distribution(np.linspace(0, 1, 11))
+    assert shear.shape == moment.shape == (len(all_concepts), 11)
+    for i, location in enumerate(eta):
+        expected = batch_model.hinge_loads(np.full(len(all_concepts),
+                                                   location))
+        np.testing.assert_allclose(shear[:, i], expected[0])
+        np.testing.assert_allclose(moment[:, i], expected[1])
+
+
+def test_optimal_hinge_location_respects_folded_span(batch_model):
+    location, shear, moment = batch_model.optimal_hinge_location(
+        max_folded_span=8.)
+    assert np.all(location * batch_model.batch.wing_span <= 8.)
+    eta, _, moments = batch_model.distribution()
+    allowed = eta * batch_model.batch.wing_span[:, None] <= 8.
+    np.testing.assert_allclose(
+        np.abs(moment),
+        np.where(allowed, np.abs(moments), np.inf).min(axis=1))
+    assert np.isnan(
+        batch_model.optimal_hinge_location(max_folded_span=-1.)[0]).all()
+
+
+def test_optimal_hinge_location_trades_off_folded_span(batch_model):
+    eta = np.linspace(0, 1, 101)
+    location, _, moment = batch_model.optimal_hinge_location(eta,
+                                                             span_weight=1000.)
+    # with moments on the wing, the optimum lies between root and tip
+    has_moment = np.any(batch_model.distribution(eta)[2] != 0, axis=1)
+    assert has_moment.sum() >= 2
+    assert np.all((location[has_moment] > 0.1) & (location[has_moment] < 0.9))
+    span = batch_model.batch.wing_span
+    cost = np.abs(moment) + 1000. * location * span
+    for step in (-0.01, 0.01):
+        neighbour = np.abs(batch_model.hinge_loads(location + step)[1]) + \
+            1000. * (location + step) * span
+        assert np.all(cost[has_moment] <= neighbour[has_moment])
+    with pytest.raises(ValueError):
+        batch_model.optimal_hinge_location()
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+CORE_MODULES = (
+    'sizing_tools.mass_model.iteration',
+    'sizing_tools.sweep',
+    'sizing_tools.hinge_loading',
+    'data.concept_parameters.concepts',
+    'data.literature.evtol_performance',
+    'data.literature.evtol_comp',
+)
+
+
+def test_core_import_is_free_of_plotting_and_side_effects(tmp_path):
+    # run in a fresh interpreter and an empty working directory, which must stay empty
+    code = (
+        'import sys\n'
+        f'import {", ".join(CORE_MODULES)}\n'
+        "print(sorted(m for m in ('matplotlib', 'pandas', 'pint', 'aerosandbox') if m in sys.modules))\n"
+        'import utility\n'
+        "print(utility.unit_registry.cache_info().currsize)\n")
+    result = subprocess.run([sys.executable, '-c', code],
+                            cwd=tmp_path,
+                            env={
+                                **os.environ, 'PYTHONPATH': str(ROOT)
+                            },
+                            capture_output=True,
+                            text=True,
+                            check=True)
+    assert result.stdout.split('\n')[:2] == ['[]', '0']
+    assert list(tmp_path.iterdir()) == []
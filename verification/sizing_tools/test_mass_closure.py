@@ -0,0 +1,34 @@
+from copy import deepcopy
+
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from sizing_tools.mass_model.classII.closure import closure_residual, mass_closure
+from sizing_tools.mass_model.classII.evaluation import takeoff_power
+from sizing_tools.mass_model.iteration import Iteration
+
+
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_closure_derivative_matches_finite_difference(concept):
+    power = takeoff_power(concept, 1500.)
+    residual, derivative = closure_residual(concept, 1300., power)
+    step = 1e-3
+    assert derivative == pytest.approx(
+        (closure_residual(concept, 1300. + step, power)[0] - residual) / step,
+        rel=1e-6)
+
+
+@pytest.mark.parametrize('method', ['newton', 'anderson'])
+@pytest.mark.parametrize('concept', all_concepts, ids=lambda c: c.id)
+def test_closure_matches_nested_iteration(concept, method):
+    iteration = Iteration(deepcopy(concept))
+    aircraft = iteration.run(method=method)
+    expected = Iteration(deepcopy(concept)).run(method='nested')
+    assert iteration.closure.converged
+    assert iteration.closure.iterations <= 10
+    assert aircraft.total_mass == pytest.approx(expected.total_mass, abs=1e-6)
+
+
+def test_closure_unknown_method_raises():
+    with pytest.raises(ValueError):
+        mass_closure(all_concepts[0], method='bisection')
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import all_concepts
+from data.concept_parameters.mission_profile import Phase
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.mission_simulation import MissionSimulation
+from sizing_tools.sweep import evaluate_batch
+
+
+@pytest.fixture
+def batch():
+    return DesignBatch.from_aircraft(list(all_concepts))
+
+
+def test_simulation_matches_class_II_energy(batch):
+    model = BatchClassIIModel(batch)
+    total_mass = model.total_mass().total_mass
+    expected = model.phase_energy(total_mass)
+    summary = MissionSimulation(batch, total_mass, time_step=1.).summary()
+
+    # level and constant power phases are integrated exactly
+    for phase in (Phase.TAKEOFF, Phase.CRUISE, Phase.DESCENT):
+        i = batch.phases.index(phase)
+        np.testing.assert_allclose(summary['phase_energy'][:, i], expected[:,
+                                                                           i])
+    # the air density changes during the climb, which the Class II model evaluates at the top
+    np.testing.assert_allclose(summary['energy'],
+                               expected.sum(axis=1),
+                               rtol=0.01)
+    # the battery sized by the Class II model keeps its reserve
+    assert np.all(summary['minimum_state_of_charge'] > 0)
+    np.testing.assert_array_equal(summary['state_of_charge'],
+                                  summary['minimum_state_of_charge'])
+
+
+def test_chunks_stream_the_mission(batch):
+    total_mass = np.full(len(batch), 2000.)
+    simulation = MissionSimulation(batch,
+                                   total_mass,
+                                   time_step=0.5,
+                                   chunk_size=64)
+    previous_time = np.zeros(len(batch))
+    for chunk in simulation.run():
+        assert chunk.power.shape == chunk.time.shape == (len(batch),
+                                                         chunk.time.shape[1])
+        assert chunk.time.shape[1] <= 64
+        assert np.all(chunk.time[:, 0] >= previous_time)
+        previous_time = chunk.time[:, -1]
+    np.testing.assert_allclose(previous_time, batch.phase_duration.sum(axis=1))
+    np.testing.assert_allclose(chunk.altitude[:, -1],
+                               batch.phase_ending_altitude[:, -1])
+    np.testing.assert_allclose(
+        simulation.summary()['energy'],
+        MissionSimulation(batch, total_mass, time_step=5.).summary()['energy'],
+        rtol=1e-4)
+
+
+def test_sweep_columns(batch):
+    columns = evaluate_batch(batch, time_step=5.)
+    np.testing.assert_allclose(columns['simulated_energy'],
+                               columns['energy'],
+                               rtol=0.01)
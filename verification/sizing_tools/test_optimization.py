@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_1, concept_C2_6
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.optimization import DesignOptimization
+
+DESIGN_VARIABLES = {
+    'wing.area': (8, 30),
+    'wing.span': (8, 14),
+    'propeller_radius': (0.5, 1.2),
+    'cruise_velocity': (40, 90),
+}
+
+
+def test_gradients_match_finite_differences():
+    problem = DesignOptimization(concept_C2_1, {
+        **DESIGN_VARIABLES, 'hinge_location': (0.1, 0.9)
+    })
+    x = problem.x0
+    sized = problem.evaluate(x)
+    assert sized.outputs['total_mass'] == pytest.approx(1431.945490528648)
+    for j in range(len(x)):
+        step = np.eye(len(x))[j] * 1e-6 * x[j]
+        upper = problem.evaluate(x + step).outputs
+        lower = problem.evaluate(x - step).outputs
+        for output, value in sized.gradients.items():
+            np.testing.assert_allclose(
+                value[j], (upper[output] - lower[output]) / (2 * step[j]),
+                rtol=1e-5,
+                atol=1e-6)
+
+
+def test_optimum_is_stall_limited():
+    result = DesignOptimization(concept_C2_6, DESIGN_VARIABLES).optimize()
+    assert result.success
+    assert result.objective < 1227.8431548597407
+    assert result.outputs['stall_speed'] == pytest.approx(concept_C2_6.v_stall)
+    # the design point has the optimized values and keeps the range
+    batch = DesignBatch.from_design_points([result.design_point])
+    np.testing.assert_allclose(
+        BatchClassIIModel(batch).total_mass(xtol=1e-12).total_mass,
+        result.objective)
+    assert batch.cruise_velocity[0] * batch.phase_duration[
+        0, batch.segments.index('CRUISE')] == pytest.approx(concept_C2_6.range)
+
+
+def test_hinge_moment_limit():
+    unconstrained = DesignOptimization(concept_C2_1,
+                                       DESIGN_VARIABLES).optimize()
+    result = DesignOptimization(concept_C2_1,
+                                DESIGN_VARIABLES,
+                                constraints={
+                                    'hinge_moment': 7000
+                                }).optimize()
+    assert unconstrained.outputs['hinge_moment'] > 7000
+    assert result.success
+    assert result.outputs['hinge_moment'] == pytest.approx(7000, rel=1e-6)
+    with pytest.raises(ValueError):
+        DesignOptimization(concept_C2_1, {'wing.chord': (1, 2)})
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_1
+from sizing_tools.global_sensitivity import relative_bounds
+from sizing_tools.pareto import ParetoArchive, ParetoSearch, crowding_distance, dominates, non_dominated_sort
+
+
+def test_non_dominated_sort():
+    f = np.array([[1, 4], [2, 2], [4, 1], [3, 3], [4, 4], [2, 2]])
+    np.testing.assert_array_equal(non_dominated_sort(f), [0, 0, 0, 1, 2, 0])
+    distance = crowding_distance(f[:3])
+    assert np.isinf(distance[[0, 2]]).all() and np.isfinite(distance[1])
+
+
+def test_archive_keeps_the_non_dominated_set():
+    rng = np.random.default_rng(0)
+    f = rng.random((2000, 3))
+    x = rng.random((2000, 2))
+    archive = ParetoArchive(['a', 'b'], ['f0', 'f1', 'f2'])
+    for start in range(0, len(f), 300):
+        archive.update(x[start:start + 300],
+                       f[start:start + 300],
+                       chunk_size=64)
+    expected = ~dominates(f[:, None], f[None]).any(axis=0)
+    assert archive.evaluations == len(f)
+    np.testing.assert_array_equal(np.sort(archive.f, axis=0),
+                                  np.sort(f[expected], axis=0))
+    # the parameters stay with their objectives
+    np.testing.assert_array_equal(archive.x[np.argsort(archive.f[:, 0])],
+                                  x[expected][np.argsort(f[expected][:, 0])])
+
+
+def test_search_resumes_from_checkpoint(tmp_path):
+    bounds = relative_bounds(
+        concept_C2_1, ['wing.span', 'propeller_radius', 'cruise_velocity'],
+        spread=0.3)
+    search = ParetoSearch(concept_C2_1, bounds, population_size=20)
+    uninterrupted = search.run(generations=6, seed=1)
+    assert uninterrupted.evaluations == 7 * 20
+    assert not dominates(uninterrupted.f[:, None], uninterrupted.f[None]).any()
+
+    checkpoint = tmp_path / 'front.npz'
+    search.run(generations=3, seed=1, checkpoint=checkpoint)
+    resumed = search.run(generations=6, seed=1, checkpoint=checkpoint)
+    assert resumed.evaluations == uninterrupted.evaluations
+    np.testing.assert_array_equal(resumed.f, uninterrupted.f)
+    assert list(resumed.to_dataframe().columns[:3]) == list(bounds)
+
+    with pytest.raises(ValueError):
+        search.run(generations=6, seed=2, checkpoint=checkpoint)
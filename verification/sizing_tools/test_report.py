@@ -0,0 +1,55 @@
+from copy import deepcopy
+
+import matplotlib.pyplot as plt
+
+from data.concept_parameters.concepts import concept_C1_5, concept_C2_1
+from sizing_tools.misc_plots.report import render_report
+
+
+def test_report_renders_only_changed_figures(tmp_path):
+    concepts = [deepcopy(concept_C1_5), deepcopy(concept_C2_1)]
+    figures = ('mass_breakdown', 'energy_breakdown')
+    first = render_report(concepts,
+                          tmp_path,
+                          figures=figures,
+                          format='png',
+                          max_workers=1)
+    assert not first.failed
+    assert sorted(path.name for path in first.rendered) == sorted(
+        f'{concept.id}_{name}.png' for concept in concepts for name in figures)
+    assert all(path.stat().st_size > 0 for path in first.rendered)
+
+    second = render_report(concepts,
+                           tmp_path,
+                           figures=figures,
+                           format='png',
+                           max_workers=1)
+    assert not second.rendered
+    assert len(second.unchanged) == 4
+
+    concepts[1].payload_mass += 50
+    third = render_report(concepts,
+                          tmp_path,
+                          figures=figures,
+                          format='png',
+                          max_workers=1)
+    assert sorted(path.name for path in third.rendered) == sorted(
+        f'{concepts[1].id}_{name}.png' for name in figures)
+
+
+def test_report_keeps_backend(tmp_path):
+    backend, interactive = plt.get_backend(), plt.isinteractive()
+    plt.switch_backend('svg')
+    plt.ion()
+    try:
+        result = render_report([deepcopy(concept_C1_5)],
+                               tmp_path,
+                               figures=('mass_breakdown', ),
+                               format='png',
+                               max_workers=1)
+        assert len(result.rendered) == 1
+        assert plt.get_backend() == 'svg'
+        assert plt.isinteractive()
+    finally:
+        plt.interactive(interactive)
+        plt.switch_backend(backend)
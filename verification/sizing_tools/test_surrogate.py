@@ -0,0 +1,91 @@
+from timeit import repeat
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C1_5, concept_C2_1, concept_C2_6
+from sizing_tools.global_sensitivity import relative_bounds
+from sizing_tools.surrogate import OUTPUTS, SurrogateModel
+from sizing_tools.sweep import evaluate_samples
+from verification.benchmarks import harness
+
+PARAMETERS = ('wing.span', 'propeller_radius', 'battery_energy_density')
+
+
+@pytest.fixture(scope='module')
+def surrogate():
+    return SurrogateModel(concept_C2_1,
+                          relative_bounds(concept_C2_1, PARAMETERS,
+                                          0.1)).train(max_samples=64)
+
+
+def test_predicts_within_error_estimate(surrogate):
+    samples = surrogate._scale(np.random.default_rng(1).random((200, 3)))
+    prediction = surrogate.predict(samples)
+    exact = evaluate_samples(surrogate.base, PARAMETERS, OUTPUTS, samples)
+    assert not prediction.exact.any()
+    for output in OUTPUTS:
+        error = np.abs(prediction.values[output] - exact[output])
+        assert np.all(error < 1e-3 * np.abs(exact[output]))
+        assert np.mean(error < 3 * prediction.errors[output]) > 0.9
+
+
+def test_trains_to_tolerance():
+    parameters = ('battery_energy_density', 'figure_of_merit', 'tail.S_th')
+    surrogate = SurrogateModel(concept_C1_5,
+                               relative_bounds(concept_C1_5, parameters,
+                                               0.1)).train(tolerance=1e-3)
+    samples = surrogate._scale(np.random.default_rng(4).random((2000, 3)))
+    prediction = surrogate.predict(samples)
+    exact = evaluate_samples(surrogate.base, parameters, OUTPUTS, samples)
+    for output in OUTPUTS:
+        error = np.abs(prediction.values[output] - exact[output])
+        assert np.all(error < 1e-3 * np.abs(exact[output]))
+
+
+def test_predicts_mean_without_errors(surrogate):
+    samples = surrogate._scale(np.random.default_rng(3).random((1000, 3)))
+    prediction = surrogate.predict(samples, errors=False)
+    assert prediction.errors is None
+    np.testing.assert_allclose(prediction.values['total_mass'],
+                               surrogate.predict(samples).values['total_mass'])
+
+
+@pytest.mark.skipif(not harness.enabled,
+                    reason='benchmarks run with BENCHMARK=1')
+def test_predicts_faster_than_exact_sizing(surrogate):
+    samples = surrogate._scale(np.random.default_rng(3).random((10**4, 3)))
+    predict = min(
+        repeat(lambda: surrogate.predict(samples, errors=False),
+               number=1,
+               repeat=3))
+    exact = min(
+        repeat(lambda: evaluate_samples(surrogate.base, PARAMETERS, OUTPUTS,
+                                        samples),
+               number=1,
+               repeat=3))
+    assert predict < exact
+
+
+def test_falls_back_outside_domain(surrogate):
+    lower, upper = surrogate.lower, surrogate.upper
+    samples = np.array([(lower + upper) / 2, upper * [1.5, 1, 1]])
+    prediction = surrogate.predict(samples)
+    np.testing.assert_array_equal(prediction.exact, [False, True])
+    exact = evaluate_samples(surrogate.base, PARAMETERS, OUTPUTS, samples[1:])
+    assert prediction.values['total_mass'][1] == exact['total_mass'][0]
+    assert prediction.errors['total_mass'][1] == 0
+    # an accepted error below the estimate sizes every sample exactly
+    assert surrogate.predict(samples, max_error=0).exact.all()
+
+
+def test_save_and_load(surrogate, tmp_path):
+    path = tmp_path / 'surrogate.npz'
+    surrogate.save(path)
+    loaded = SurrogateModel.load(path, concept_C2_1)
+    samples = surrogate._scale(np.random.default_rng(2).random((10, 3)))
+    np.testing.assert_allclose(
+        loaded.predict(samples).values['hinge_load'],
+        surrogate.predict(samples).values['hinge_load'])
+    with pytest.raises(ValueError):
+        SurrogateModel.load(path, concept_C2_6)
@@ -0,0 +1,50 @@
+from copy import deepcopy
+
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_6
+from sizing_tools.mass_model.classII.batch import BatchClassIIModel, DesignBatch
+from sizing_tools.sweep import DesignSweep, SweepStore
+
+
+@pytest.fixture
+def sweep():
+    return DesignSweep(deepcopy(concept_C2_6), {
+        'payload_mass': [200, 300, 400],
+        'wing.span': [10, 12],
+        'mission_profile.CRUISE.duration': [1200, 1800],
+    },
+                       chunk_size=5)
+
+
+def test_sweep_matches_batch(sweep):
+    results = sweep.run(max_workers=1).load()
+    parameters = sweep.parameters()
+    batch = DesignBatch.from_aircraft(sweep.aircraft,
+                                      payload_mass=parameters['payload_mass'],
+                                      wing_span=parameters['wing.span'])
+    batch.set_path('mission_profile.CRUISE.duration',
+                   parameters['mission_profile.CRUISE.duration'])
+    expected = BatchClassIIModel(batch).total_mass().total_mass
+    assert len(results['total_mass']) == len(sweep) == 12
+    assert results['converged'].all()
+    np.testing.assert_allclose(results['total_mass'], expected)
+    np.testing.assert_array_equal(results['wing.span'],
+                                  parameters['wing.span'])
+
+
+def test_sweep_process_pool_writes_store(sweep, tmp_path):
+    store = sweep.run(SweepStore(tmp_path), max_workers=2)
+    assert len(list(tmp_path.glob('chunk_*.npz'))) == 3
+    np.testing.assert_allclose(store.load()['total_mass'],
+                               sweep.run(max_workers=1).load()['total_mass'])
+
+
+def test_store_refuses_used_directory(sweep, tmp_path):
+    sweep.run(SweepStore(tmp_path), max_workers=1)
+    with pytest.raises(ValueError):
+        SweepStore(tmp_path)
+    store = SweepStore(tmp_path, resume=True)
+    store.append(next(store.chunks()))
+    assert len(store.load()['total_mass']) == len(sweep) + 5
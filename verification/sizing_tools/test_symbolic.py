@@ -0,0 +1,63 @@
+import casadi as ca
+import numpy as np
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_1
+from sizing_tools.formula.aero import C_D_from_CL, C_L_climb_opt, hover_power
+from sizing_tools.formula.constraint import cruise_power_loading, vertical_climb_power_loading
+from sizing_tools.formula.emperical import vertical_tail_mass, wing_mass
+from sizing_tools.formula.sound import SPL_1_max
+from sizing_tools.mass_model.classII.symbolic import SymbolicClassIIModel, numpy_mode
+from sizing_tools.optimization import DesignOptimization
+
+FORMULAS = [
+    (C_D_from_CL, (0.5, 0.03, 8, 0.8)),
+    (C_L_climb_opt, (0.03, 8, 0.8)),
+    (hover_power, (20000, 7, 0.75, 1.2)),
+    (wing_mass, (2000, 20, 3.8, 8)),
+    (vertical_tail_mass, (2000, 2, 1.5, 0.2, 0.5)),
+    (SPL_1_max, (100, 1.5, 0.5, 4)),
+    (cruise_power_loading, (600, 60, 0.03, 8, 0.8, 0.85, 1.16, 1.225)),
+    (vertical_climb_power_loading, (600, 1.2, 5, 6, 20, 0.75, 0.85, 400,
+                                    1.225)),
+]
+
+
+@pytest.mark.parametrize('formula, args',
+                         FORMULAS,
+                         ids=[formula.__name__ for formula, _ in FORMULAS])
+def test_formulas_accept_casadi_symbols(formula, args):
+    x = ca.SX.sym('x', len(args))
+    with numpy_mode():
+        symbolic = ca.Function('f', [x],
+                               [formula(*[x[i] for i in range(len(args))])])
+    assert float(symbolic(args)) == pytest.approx(formula(*args))
+    # and broadcast over numpy arrays
+    np.testing.assert_allclose(formula(np.full(3, args[0]), *args[1:]),
+                               formula(*args))
+
+
+def test_symbolic_mass_closure():
+    paths = ['wing.area', 'wing.span', 'propeller_radius']
+    mode = ca.GlobalOptions.getNumpyMode()
+    model = SymbolicClassIIModel(concept_C2_1, paths)
+    # the numpy mode of CasADi is only set while the graph is built
+    assert ca.GlobalOptions.getNumpyMode() == mode
+    x = model.x0
+    assert model.evaluate(x)['total_mass'][0] == pytest.approx(
+        1431.945490528648)
+    np.testing.assert_allclose(
+        model.evaluate(np.stack([x, x * 1.05]))['total_mass'], [
+            model.evaluate(x)['total_mass'][0],
+            model.evaluate(x * 1.05)['total_mass'][0]
+        ])
+    # exact derivatives through the closure, as the implicit complex step derivatives
+    gradients = DesignOptimization(concept_C2_1, {
+        path: (0, 100)
+        for path in paths
+    }).evaluate(x).gradients
+    jacobian = model.jacobian(x)
+    for output in ('total_mass', 'energy'):
+        np.testing.assert_allclose(jacobian[output],
+                                   gradients[output],
+                                   rtol=1e-8)
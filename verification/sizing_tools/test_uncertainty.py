@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from scipy import stats
+
+from data.concept_parameters.concepts import concept_C1_5, concept_C2_1, concept_C2_10
+from sizing_tools.mass_model.classI import ClassIModel
+from sizing_tools.uncertainty import MonteCarlo, compare_concepts, relative_distributions, uniform_samples
+
+SPREADS = {'estimated_CD0': 0.2, 'TA': 0.1, 'battery_energy_density': 0.1}
+
+
+def test_common_random_numbers():
+    samples = uniform_samples(['TA', 'estimated_CD0'], 100, seed=1)
+    np.testing.assert_array_equal(
+        samples[:, ::-1], uniform_samples(['estimated_CD0', 'TA'], 100,
+                                          seed=1))
+    np.testing.assert_array_equal(
+        samples[:, 1],
+        uniform_samples(['estimated_CD0'], 100, 1)[:, 0])
+    assert not np.array_equal(
+        samples, uniform_samples(['TA', 'estimated_CD0'], 100, seed=2))
+
+
+def test_distributions_are_centred_and_capped():
+    distributions = relative_distributions(concept_C2_1, {
+        'TA': 0.1,
+        'figure_of_merit': 0.5
+    })
+    assert distributions['TA'].median() == pytest.approx(concept_C2_1.TA)
+    assert distributions['figure_of_merit'].ppf(1) <= 1
+
+
+def test_percentile_bands():
+    result = MonteCarlo(concept_C2_1,
+                        relative_distributions(concept_C2_1, SPREADS),
+                        chunk_size=1000).run(n=4000)
+    assert result.converged.all()
+    bands = result.percentiles()
+    low, median, high = bands['total_mass']
+    assert low < median < high
+    assert median == pytest.approx(1431.945490528648, rel=0.01)
+    assert result.to_dataframe().loc['hinge_moment',
+                                     'p50'] == bands['hinge_moment'][1]
+
+    # the Class I takeoff power matches ClassIModel at the sized total mass of a sample
+    aircraft = concept_C2_1.model_copy(deep=True)
+    aircraft.total_mass = result.outputs['total_mass'][0]
+    aircraft.estimated_CD0 = result.inputs['estimated_CD0'][0]
+    aircraft.TA = result.inputs['TA'][0]
+    _, takeoff_power = ClassIModel(aircraft).output()
+    assert result.outputs['vertical_climb_power'][0] == pytest.approx(
+        takeoff_power)
+
+
+def test_concept_difference_is_tighter_than_bands():
+    distributions = {
+        'estimated_CD0': stats.norm(0.04, 0.008),
+        'TA': stats.norm(400, 40)
+    }
+    results = compare_concepts([concept_C1_5, concept_C2_1],
+                               distributions,
+                               n=2000)
+    difference = results['C2.1'].difference(results['C1.5'], 'total_mass',
+                                            (5, 95))
+    spread = np.diff(results['C2.1'].percentiles((5, 95))['total_mass'])
+    assert np.diff(difference) < spread / 2
+    with pytest.raises(ValueError):
+        MonteCarlo(concept_C2_1, {'not_a_field': stats.norm()})
+
+
+def test_rejects_relative_spread_of_zero():
+    with pytest.raises(ValueError):
+        relative_distributions(concept_C2_10, {'hinge_location': 0.1})
+
+
+def test_without_uncertain_inputs():
+    result = MonteCarlo(concept_C2_1, {}).run(n=10)
+    assert result.inputs == {}
+    np.testing.assert_allclose(result.outputs['total_mass'],
+                               1431.945490528648,
+                               rtol=1e-6)
@@ -0,0 +1,36 @@
+import logging
+import queue
+
+from utility.log import SamplingFilter, logger, solver_logger
+from utility.log.log_setup import DeferredQueueHandler
+
+
+def _record(msg: str, *args) -> logging.LogRecord:
+    return logging.LogRecord('transwing.solver', logging.DEBUG, __file__, 1,
+                             msg, args, None)
+
+
+def test_sampling_filter_keeps_burst_and_every_nth_record():
+    sampling = SamplingFilter(rate=10, burst=3)
+    kept = [
+        i for i in range(1, 51)
+        if sampling.filter(_record('power: %s W', float(i)))
+    ]
+    assert kept == [1, 2, 3, 10, 20, 30, 40, 50]
+    # other message templates are counted separately
+    assert sampling.filter(_record('iteration %d', 1))
+
+
+def test_deferred_queue_handler_does_not_format():
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    record = _record('power: %s W', 1.)
+    handler.handle(record)
+    queued = log_queue.get_nowait()
+    assert queued is record
+    assert queued.msg == 'power: %s W' and queued.args == (1., )
+
+
+def test_loggers():
+    assert logger.name == 'transwing'
+    assert solver_logger.parent is logger
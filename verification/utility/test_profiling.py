@@ -0,0 +1,72 @@
+from copy import deepcopy
+
+import pytest
+
+from data.concept_parameters.concepts import concept_C2_1
+from sizing_tools.mass_model.iteration import Iteration
+from utility.profiling import Profiler, profiler, profiling, stage, timed
+
+
+@stage('test.outer')
+def _outer():
+    with timed('test.block'):
+        _inner()
+    _inner()
+
+
+@stage('test.inner')
+def _inner():
+    return 1
+
+
+def test_disabled_profiler_records_nothing():
+    profiler.reset()
+    assert not profiler.enabled
+    _outer()
+    assert profiler.report() == []
+
+
+def test_stage_counts_and_stacks():
+    with profiling() as recorded:
+        _outer()
+        _outer()
+    stats = {stats.name: stats for stats in recorded.report()}
+    assert stats['test.outer'].calls == 2
+    assert stats['test.inner'].calls == 4
+    assert stats['test.block'].calls == 2
+    assert stats['test.outer'].total_time >= stats['test.outer'].self_time
+    assert stats['test.outer'].total_time == pytest.approx(
+        sum(stats.self_time for stats in stats.values()))
+    stacks = [line.rsplit(' ', 1)[0] for line in recorded.collapsed()]
+    assert stacks == [
+        'test.outer',
+        'test.outer;test.block',
+        'test.outer;test.block;test.inner',
+        'test.outer;test.inner',
+    ]
+    assert not profiler.enabled
+
+
+def test_recursive_stage_counted_once():
+    local = Profiler(enabled=True)
+    with local.timed('a'):
+        with local.timed('a'):
+            pass
+    (stats, ) = local.report()
+    assert stats.calls == 2
+    assert stats.total_time == pytest.approx(stats.self_time)
+
+
+def test_profiled_iteration(tmp_path):
+    with profiling() as recorded:
+        aircraft = Iteration(deepcopy(concept_C2_1)).run(cache=None)
+    names = {stats.name for stats in recorded.report()}
+    assert {
+        'iteration.run', 'closure.mass_closure', 'classII.evaluate',
+        'classII.fixed_point', 'classII.phase.cruise', 'atmosphere.lookup',
+        'unit_conversion'
+    } <= names
+    assert aircraft.total_mass == pytest.approx(1431.9454905, abs=1e-6)
+    recorded.write_collapsed(tmp_path / 'sizing.folded')
+    lines = (tmp_path / 'sizing.folded').read_text().splitlines()
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
@@ -42,3 +42,19 @@ def test_convert_array_with_pandas_series():
     expected = pd.Series([0.001, 0.002, 0.003])
     pd.testing.assert_series_equal(
         unit_conversion.convert_array(series, 'meter', 'kilometer'), expected)
+
+
+def test_conversion_factor_with_offset():
+    factor, offset = unit_conversion.conversion_factor('degC', 'K')
+    assert factor == pytest.approx(1)
+    assert offset == pytest.approx(273.15)
+    assert unit_conversion.convert_float(20, 'degC',
+                                         'K') == pytest.approx(293.15)
+
+
+def test_convert_float_matches_debug_mode(monkeypatch):
+    fast = unit_conversion.convert_float(1500, 'kg', 'lbs')
+    monkeypatch.setattr(unit_conversion, 'debug', True)
+    assert unit_conversion.convert_float(1500, 'kg',
+                                         'lbs') == pytest.approx(fast,
+                                                                 rel=1e-12)